@@ -2,134 +2,204 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
 import json
+import logging
+import math
+import os
+import hashlib
+import tempfile
 from datetime import datetime
 
-from app.core.database import get_db
-from app.models.database import FinancialUpload, Report, Company
-from app.services.data_processor import DataProcessor
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db
+from app.core.executor import execution_layer, StageTimeout
+from app.models.database import FinancialUpload, Report, Company, AnalysisJob, TransactionFile, PortfolioScore, UploadEnvelope
 from app.services.ai_engine import ai_engine
+from app.services.analysis_cache import analysis_cache
 from app.core.security import encryption_service
 from app.services.report_generator import report_generator
+from app.services.job_queue import job_queue, stored_financial_data, update_analysis
+from app.services.simulation import SCENARIO_AXES, simulate
+from app.services import upload_envelope
+from app.schemas.financial import ScenarioGrid
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 DEMO_COMPANY_ID = 1
+UPLOAD_READ_CHUNK = 1024 * 1024
+
+async def _spool_upload(file: UploadFile) -> Tuple[str, str]:
+    """
+    Stream the upload to a temp file in fixed-size chunks and return its path and
+    sha256 hex digest. The request body is already capped at MAX_UPLOAD_SIZE_MB
+    as it is received (UploadSizeLimitMiddleware); the file itself is checked
+    again while copying.
+    """
+    max_bytes = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+    too_large = HTTPException(status_code=413, detail=f"File too large. Maximum upload size is {settings.MAX_UPLOAD_SIZE_MB} MB.")
+    if file.size is not None and file.size > max_bytes:
+        raise too_large
+
+    spool = tempfile.NamedTemporaryFile(
+        delete=False,
+        suffix=os.path.splitext(file.filename)[1],
+        dir=settings.UPLOAD_SPOOL_DIR or None
+    )
+    written = 0
+    digest = hashlib.sha256()
+    try:
+        with spool:
+            while True:
+                chunk = await file.read(UPLOAD_READ_CHUNK)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise too_large
+                digest.update(chunk)
+                spool.write(chunk)
+    except BaseException:
+        os.remove(spool.name)
+        raise
+    return spool.name, digest.hexdigest()
+
+def _enqueue_upload(company_id: int, filename: str, spool_path: str, params: dict,
+                    content_hash: str, force: bool) -> dict:
+    """
+    Queue the analysis, or return the existing job for identical content (unless
+    force). Blocking; runs on the IO pool with its own session, so a request that
+    gives up on it (StageTimeout) never shares a session with it.
+    """
+    with SessionLocal() as db:
+        # Verify company exists before queueing so the client gets the 404 right away
+        if not db.query(Company.id).filter(Company.id == company_id).first():
+            raise HTTPException(status_code=404, detail=f"Company with ID {company_id} not found. Please log in again.")
+        if not force:
+            job = job_queue.find_duplicate(db, company_id, content_hash)
+            if job is not None:
+                job_queue.touch(db, job)
+                return {"status": "duplicate", "job_id": job.id, "job_status": job.status, "upload_id": job.upload_id}
+        job = job_queue.enqueue(db, company_id, filename, spool_path, params, content_hash)
+        if job.file_path != spool_path:
+            # The same content is already queued or running (a concurrent identical upload)
+            return {"status": "duplicate", "job_id": job.id, "job_status": job.status, "upload_id": job.upload_id}
+        return {"status": "queued", "job_id": job.id}
 
-@router.post("/upload")
+@router.post("/upload", status_code=202)
 async def upload_financial_data(
     file: UploadFile = File(...),
     lang: str = "en",
     industry: str = "General",
     id: int = DEMO_COMPANY_ID,
-    db: Session = Depends(get_db)
+    sheet: Optional[str] = None,
+    force: bool = False,
+    append: bool = False
 ):
+    """
+    Spool the file and queue its analysis. Returns a job id right away; poll
+    GET /financial/jobs/{job_id} until it reports succeeded or failed.
+    Re-uploading identical content (same bytes, industry and sheet) returns the
+    existing job instead of analyzing again; force=true re-analyzes unless that
+    content is still queued or running.
+    Every upload adds its new transactions to the company ledger; with
+    append=true the analysis covers the whole ledger instead of just this file.
+    """
     if not file.filename.endswith(('.csv', '.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="Invalid file format. Please use CSV or Excel.")
     
-    contents = await file.read()
+    spool_path, file_digest = await _spool_upload(file)
+    params = {"lang": lang, "industry": industry, "sheet": sheet, "append": append}
     
     try:
-        financial_data = DataProcessor.process_file(contents, file.filename)
-        if "error" in financial_data:
-            raise HTTPException(status_code=400, detail=financial_data["error"])
-            
-
-
-        print(f"File processed: {file.filename}")
-        
-        ai_analysis = ai_engine.analyze_financials(
-            financial_data=financial_data,
-            industry=industry,
-            language=lang
+        result = await execution_layer.run_io(
+            "enqueue", _enqueue_upload, id, file.filename, spool_path, params,
+            job_queue.content_hash(file_digest, params), force, timeout=settings.STAGE_TIMEOUT_DB_S
         )
-        print("AI Analysis complete")
-        
-        # Verify company exists
-        company = db.query(Company).filter(Company.id == id).first()
-        if not company:
-            raise HTTPException(status_code=404, detail=f"Company with ID {id} not found. Please log in again.")
-        
-        # Extract AI data with robust defaults
-        health_score = int(ai_analysis.get('health_score', 0))
-        status_val = ai_analysis.get('status', 'N/A')
-        summary_val = ai_analysis.get('summary', 'No summary available.')
-        risks_val = ai_analysis.get('risks', [])
-        recs_val = ai_analysis.get('recommendations', [])
-        forecast_val = ai_analysis.get('forecast', '')
-        
-        working_cap_val = ai_analysis.get('working_capital_analysis', {})
-        cost_opt_val = ai_analysis.get('cost_optimization', [])
-        fin_prod_val = ai_analysis.get('financial_products', [])
-        tax_val = ai_analysis.get('bookkeeping_tax_compliance', {})
-        
-        credit_data = ai_analysis.get('creditworthiness', {})
-        credit_score = int(credit_data.get('score', 0)) if isinstance(credit_data, dict) else 0
-        credit_rat = str(credit_data.get('rationale', '')) if isinstance(credit_data, dict) else ''
-
-        # Mandatory Encryption for sensitive fields
-        upload = FinancialUpload(
-            company_id=id,
-            filename=file.filename,
-            total_revenue=float(financial_data.get('total_revenue') or 0),
-            total_expenses=float(financial_data.get('total_expenses') or 0),
-            net_profit=float(financial_data.get('net_profit') or 0),
-            profit_margin=float(financial_data.get('profit_margin') or 0),
-            expense_ratio=float(financial_data.get('expense_ratio') or 0),
-            
-            encrypted_categories=encryption_service.encrypt(json.dumps(financial_data.get('categories', {}))),
-            encrypted_top_expenses=encryption_service.encrypt(json.dumps(financial_data.get('top_expenses', []))),
-            encrypted_monthly_breakdown=encryption_service.encrypt(json.dumps(financial_data.get('monthly_breakdown', []))),
-            
-            health_score=health_score,
-            status=status_val,
-            encrypted_summary=encryption_service.encrypt(summary_val),
-            encrypted_risks=encryption_service.encrypt(json.dumps(risks_val)),
-            encrypted_recommendations=encryption_service.encrypt(json.dumps(recs_val)),
-            forecast_narrative=forecast_val,
-            
-            accounts_receivable=float(financial_data.get('accounts_receivable') or 0.0),
-            accounts_payable=float(financial_data.get('accounts_payable') or 0.0),
-            inventory_value=float(financial_data.get('inventory_value') or 0.0),
-            total_debt=float(financial_data.get('total_debt') or 0.0),
-            
-            creditworthiness_score=credit_score,
-            encrypted_working_capital_analysis=encryption_service.encrypt(json.dumps(working_cap_val)),
-            encrypted_cost_optimization=encryption_service.encrypt(json.dumps(cost_opt_val)),
-            encrypted_financial_products=encryption_service.encrypt(json.dumps(fin_prod_val)),
-            encrypted_bookkeeping_tax=encryption_service.encrypt(json.dumps(tax_val)),
-            encrypted_credit_rationale=encryption_service.encrypt(credit_rat)
-        )
-        
-        db.add(upload)
-        db.commit()
-        db.refresh(upload)
-        
-        report = Report(
-            company_id=id,
-            upload_id=upload.id,
-            title=f"Analysis: {file.filename} ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})",
-            report_type="Ad-hoc",
-            encrypted_content=encryption_service.encrypt(json.dumps({
-                "financial_data": financial_data,
-                "ai_analysis": ai_analysis
-            }))
-        )
-        db.add(report)
-        db.commit()
-        print(f"COMMITTED to database: {upload.id}")
-        
-        return {"status": "success", "upload_id": upload.id}
+        if result["status"] == "duplicate":
+            os.remove(spool_path)
+            logger.info("Duplicate upload %s: reusing job %s (%s)", file.filename, result['job_id'], result['job_status'])
+        else:
+            logger.info("Queued analysis job %s: %s", result['job_id'], file.filename)
+        return result
         
     except HTTPException:
+        os.remove(spool_path)
         raise
-    except Exception as e:
-        db.rollback()
-        print(f"UPLOAD ERROR: {str(e)}")
-        # Provide a cleaner error message instead of the raw technical string
-        if "IntegrityError" in str(e):
-            raise HTTPException(status_code=400, detail="Database integrity error. This might happen if the company ID is invalid.")
-        raise HTTPException(status_code=500, detail="An internal error occurred while saving your data. Please check if your account is active.")
+    except StageTimeout:
+        # The enqueue is still running and may yet commit a job that reads the
+        # spooled file: leave the file where it is
+        logger.warning("UPLOAD: queueing %s timed out; leaving %s to the enqueue", file.filename, spool_path)
+        raise HTTPException(status_code=503, detail="Queueing your file is taking longer than expected. Please check your dashboard before uploading it again.")
+    except Exception:
+        os.remove(spool_path)
+        logger.exception("UPLOAD ERROR: %s", file.filename)
+        raise HTTPException(status_code=500, detail="An internal error occurred while queueing your file. Please try again.")
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: int, id: int = DEMO_COMPANY_ID, db: Session = Depends(get_db)):
+    job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id, AnalysisJob.company_id == id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job_queue.describe(job)
+
+@router.get("/trends")
+async def get_trends(
+    id: int = DEMO_COMPANY_ID,
+    months: int = 36,
+    category: Optional[str] = None,
+    end: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Monthly revenue/expense series across every upload, served from the ledger
+    rollups: exactly `months` months up to `end` (YYYY-MM), or up to the latest
+    month with data. category narrows the series to one category.
+    """
+    # pandas-backed; imported on first use rather than with the app
+    from app.services.ledger import ledger, TREND_MAX_MONTHS
+    if not 1 <= months <= TREND_MAX_MONTHS:
+        raise HTTPException(status_code=400, detail=f"months must be between 1 and {TREND_MAX_MONTHS}.")
+    if end is not None:
+        try:
+            end = datetime.strptime(end, "%Y-%m").strftime("%Y-%m")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="end must be a month in YYYY-MM format.")
+
+    series = await execution_layer.run_io(
+        "trends", ledger.trends, db, id, months, category, end, timeout=settings.STAGE_TIMEOUT_DB_S
+    )
+    return {"company_id": id, "category": category, "months": months, "series": series}
+
+@router.post("/simulate")
+async def simulate_scenarios(grid: ScenarioGrid, id: int = DEMO_COMPANY_ID, db: Session = Depends(get_db)):
+    """
+    What-if health scores: every combination of the grid's expense cuts,
+    receivable collections, debt paydowns and revenue changes applied to an
+    upload's stored metrics (grid.upload_id, or the latest upload), scored by
+    the rule-based scorer with no AI call. Returns the score surface and the
+    best scenarios (see simulation.simulate).
+    """
+    query = db.query(FinancialUpload).filter(FinancialUpload.company_id == id)
+    if grid.upload_id is not None:
+        upload = query.filter(FinancialUpload.id == grid.upload_id).first()
+    else:
+        upload = query.order_by(FinancialUpload.upload_date.desc()).first()
+    if not upload:
+        raise HTTPException(status_code=404, detail="No uploaded data to simulate. Please upload a file first.")
+
+    axes = {name: getattr(grid, name) for name in SCENARIO_AXES}
+    points = math.prod(len(values) for values in axes.values())
+    if points > settings.SIMULATION_MAX_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The grid has {points} scenarios; at most {settings.SIMULATION_MAX_POINTS} are allowed."
+        )
+    result = await execution_layer.run_io(
+        "simulation", simulate, stored_financial_data(upload), axes, grid.top, timeout=settings.STAGE_TIMEOUT_PROCESS_S
+    )
+    return {"company_id": id, "upload_id": upload.id, "filename": upload.filename, **result}
 
 @router.get("/dashboard")
 async def get_dashboard(
@@ -140,61 +210,57 @@ async def get_dashboard(
     latest = db.query(FinancialUpload).filter(FinancialUpload.company_id == id).order_by(FinancialUpload.upload_date.desc()).first()
     if not latest: return {"has_data": False}
     
-    # Decrypt basic info
-    summary = encryption_service.decrypt(latest.encrypted_summary)
-    risks = json.loads(encryption_service.decrypt(latest.encrypted_risks)) if latest.encrypted_risks else []
-    recommendations = json.loads(encryption_service.decrypt(latest.encrypted_recommendations)) if latest.encrypted_recommendations else []
+    # Every sensitive field in one decryption; an unreadable envelope shows as empty
+    # fields rather than failing the dashboard (see upload_envelope.read_upload)
+    sealed = upload_envelope.read_upload(latest)
+    summary = sealed['summary']
+    risks = sealed['risks']
+    recommendations = sealed['recommendations']
     forecast_narrative = latest.forecast_narrative
     status = latest.status
-    
-    # Decrypt new items
-    cost_optimization = json.loads(encryption_service.decrypt(latest.encrypted_cost_optimization)) if latest.encrypted_cost_optimization else []
-    financial_products = json.loads(encryption_service.decrypt(latest.encrypted_financial_products)) if latest.encrypted_financial_products else []
-    bookkeeping_tax = json.loads(encryption_service.decrypt(latest.encrypted_bookkeeping_tax)) if latest.encrypted_bookkeeping_tax else {}
-    credit_rationale = encryption_service.decrypt(latest.encrypted_credit_rationale) if latest.encrypted_credit_rationale else ""
-    working_capital = json.loads(encryption_service.decrypt(latest.encrypted_working_capital_analysis)) if latest.encrypted_working_capital_analysis else {}
-
-    # Re-translate/Re-analyze AI content if language parameter is provided
+    cost_optimization = sealed['cost_optimization']
+    financial_products = sealed['financial_products']
+    bookkeeping_tax = sealed['bookkeeping_tax_compliance']
+    credit_rationale = sealed['credit_rationale']
+    working_capital = sealed['working_capital_analysis']
+
+    # Translate the stored analysis if another language is requested; strings
+    # already translated once (or from the rule-based catalog) cost no model call
     if lang and lang != 'original':
-        company = db.query(Company).filter(Company.id == id).first()
-        industry = company.industry if company else "General"
-        
-        financial_data = {
-            "total_revenue": latest.total_revenue,
-            "total_expenses": latest.total_expenses,
-            "net_profit": latest.net_profit,
-            "profit_margin": latest.profit_margin,
-            "expense_ratio": latest.expense_ratio,
-            "accounts_receivable": latest.accounts_receivable,
-            "accounts_payable": latest.accounts_payable,
-            "inventory_value": latest.inventory_value,
-            "total_debt": latest.total_debt,
-            "categories": json.loads(encryption_service.decrypt(latest.encrypted_categories)) if latest.encrypted_categories else {}
+        analysis = {
+            "summary": summary,
+            "status": status,
+            "forecast": forecast_narrative,
+            "risks": risks,
+            "recommendations": recommendations,
+            "cost_optimization": cost_optimization,
+            "financial_products": financial_products,
+            "bookkeeping_tax_compliance": bookkeeping_tax,
+            "working_capital_analysis": working_capital,
+            "creditworthiness": {"rationale": credit_rationale}
         }
-        
-        # Fresh analysis in the requested language
-        ai_analysis = ai_engine.analyze_financials(financial_data, industry, lang)
-        
-        summary = ai_analysis.get('summary', summary)
-        risks = ai_analysis.get('risks', risks)
-        recommendations = ai_analysis.get('recommendations', recommendations)
-        forecast_narrative = ai_analysis.get('forecast', forecast_narrative)
-        status = ai_analysis.get('status', status)
-        cost_optimization = ai_analysis.get('cost_optimization', cost_optimization)
-        financial_products = ai_analysis.get('financial_products', financial_products)
-        bookkeeping_tax = ai_analysis.get('bookkeeping_tax_compliance', bookkeeping_tax)
-        credit_rationale = ai_analysis.get('creditworthiness', {}).get('rationale', credit_rationale)
-        working_capital = ai_analysis.get('working_capital_analysis', working_capital)
+        # Strings the model cannot translate within AI_DEADLINE_S are shown as stored
+        analysis = await ai_engine.translate_analysis_async(analysis, lang)
+
+        summary = analysis['summary']
+        status = analysis['status']
+        forecast_narrative = analysis['forecast']
+        risks = analysis['risks']
+        recommendations = analysis['recommendations']
+        cost_optimization = analysis['cost_optimization']
+        financial_products = analysis['financial_products']
+        bookkeeping_tax = analysis['bookkeeping_tax_compliance']
+        working_capital = analysis['working_capital_analysis']
+        credit_rationale = analysis['creditworthiness']['rationale']
     
     # Get latest report id for export
     latest_report = db.query(Report).filter(Report.company_id == id, Report.upload_id == latest.id).first()
-    report_id = latest_report.id if latest_report else None
 
-    # Re-extract generic metadata if not present or specifically requested
-    # For simplicity, we just return what's in the latest report or re-process
-    latest_report = db.query(Report).filter(Report.company_id == id, Report.upload_id == latest.id).first()
-    report_content = json.loads(encryption_service.decrypt(latest_report.encrypted_content)) if latest_report else {}
-    generic_metadata = report_content.get('financial_data', {}).get('generic_metadata', {})
+    generic_metadata = sealed.get('generic_metadata')
+    if generic_metadata is None:
+        # Not sealed yet (scripts/seal_uploads.py); only the report has it
+        report_content = json.loads(encryption_service.decrypt(latest_report.encrypted_content)) if latest_report else {}
+        generic_metadata = report_content.get('financial_data', {}).get('generic_metadata', {})
 
     return {
         "has_data": True,
@@ -209,9 +275,9 @@ async def get_dashboard(
             "accounts_payable": latest.accounts_payable,
             "inventory_value": latest.inventory_value,
             "total_debt": latest.total_debt,
-            "categories": json.loads(encryption_service.decrypt(latest.encrypted_categories)) if latest.encrypted_categories else {},
-            "top_expenses": json.loads(encryption_service.decrypt(latest.encrypted_top_expenses)) if latest.encrypted_top_expenses else [],
-            "monthly_breakdown": json.loads(encryption_service.decrypt(latest.encrypted_monthly_breakdown)) if latest.encrypted_monthly_breakdown else [],
+            "categories": sealed['categories'],
+            "top_expenses": sealed['top_expenses'],
+            "monthly_breakdown": sealed['monthly_breakdown'],
             "generic_metadata": generic_metadata
         },
         "ai_analysis": {
@@ -230,6 +296,53 @@ async def get_dashboard(
         }
     }
 
+@router.post("/analysis/stream")
+async def stream_analysis(
+    id: int = DEMO_COMPANY_ID,
+    lang: Optional[str] = None,
+    industry: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Server-sent events: re-run the AI analysis of the company's latest upload,
+    sending the rule-based analysis first ("placeholder"), each field of the
+    model's answer as it completes ("field") and the final analysis ("done", see
+    AIEngine.stream_analysis). A final analysis from the model or the cache
+    replaces the stored one, so the dashboard keeps showing it: hence POST,
+    since a GET (a prefetch, a crawler) must not rewrite a company's analysis.
+    lang and industry default to those of the upload's analysis job.
+    """
+    latest = db.query(FinancialUpload).filter(FinancialUpload.company_id == id).order_by(FinancialUpload.upload_date.desc()).first()
+    if not latest:
+        raise HTTPException(status_code=404, detail="No uploaded data to analyze. Please upload a file first.")
+    job = db.query(AnalysisJob).filter(AnalysisJob.upload_id == latest.id).first()
+    params = (job.params if job else None) or {}
+    industry = industry or params.get("industry") or "General"
+    lang = lang or params.get("lang") or "en"
+    financial_data = stored_financial_data(latest)
+    upload_id = latest.id
+
+    async def events():
+        async for event, data in ai_engine.stream_analysis(financial_data, industry, lang):
+            if event == "done" and data["source"] != "rule-based":
+                try:
+                    await execution_layer.run_io(
+                        "save analysis", update_analysis, upload_id, data["analysis"], timeout=settings.STAGE_TIMEOUT_DB_S
+                    )
+                except StageTimeout as e:
+                    logger.warning("Streamed analysis not saved (%s)", e)
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/analysis-cache")
+async def get_analysis_cache_stats():
+    """Hit/miss counters of this process's AI analysis cache."""
+    return analysis_cache.stats()
+
 @router.get("/reports")
 async def get_reports(id: int = DEMO_COMPANY_ID, db: Session = Depends(get_db)):
     reports = db.query(Report).filter(Report.company_id == id, Report.is_deleted == 0).order_by(Report.generated_at.desc()).all()
@@ -293,7 +406,9 @@ async def clear_dashboard_data(id: int = DEMO_COMPANY_ID, db: Session = Depends(
     Clear active dashboard data for the specific company.
     PRESESRVES history in the Reports tab.
     """
-    print(f"Clearing dashboard for company_id: {id}")
+    from app.services.ledger import ledger
+    from app.services.transaction_store import transaction_store
+    logger.info("Clearing dashboard for company_id: %s", id)
     
     # Check if company exists first
     company = db.query(Company).filter(Company.id == id).first()
@@ -302,10 +417,22 @@ async def clear_dashboard_data(id: int = DEMO_COMPANY_ID, db: Session = Depends(
 
     # Only delete FinancialUploads — Dashboard is a view of the latest upload.
     # Reports are kept as historical archive.
+    # Stored transactions and job links belong to the uploads, so they go first.
+    upload_ids = db.query(FinancialUpload.id).filter(FinancialUpload.company_id == id)
+    files = db.query(TransactionFile).filter(TransactionFile.upload_id.in_(upload_ids)).all()
+    for tx_file in files:
+        db.delete(tx_file)
+    db.query(AnalysisJob).filter(AnalysisJob.upload_id.in_(upload_ids)).update({AnalysisJob.upload_id: None}, synchronize_session=False)
+    db.query(PortfolioScore).filter(PortfolioScore.upload_id.in_(upload_ids)).delete(synchronize_session=False)
+    db.query(UploadEnvelope).filter(UploadEnvelope.upload_id.in_(upload_ids)).delete(synchronize_session=False)
     db.query(FinancialUpload).filter(FinancialUpload.company_id == id).delete()
+    # The ledger is built from those uploads, so it starts over too
+    segment_paths = ledger.clear(db, id)
     db.commit()
+    for path in [tx_file.path for tx_file in files] + segment_paths:
+        transaction_store.delete(path)
     
-    print(f"Dashboard cleared successfully for company {id}. History preserved.")
+    logger.info("Dashboard cleared successfully for company %s. History preserved.", id)
     return {"status": "success", "message": "Dashboard data cleared (History preserved)"}
 
 
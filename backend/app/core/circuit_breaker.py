@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpen(Exception):
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit '{name}' is open; retrying upstream in {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Stops calling an upstream that keeps failing, so callers take their
+    fallback immediately instead of each waiting for a timeout.
+
+    closed: calls go through; failure_threshold consecutive failures open it
+    (0 never opens).
+    open: calls raise CircuitOpen until the cooldown has passed.
+    half_open: a single probe call goes through (others still short-circuit);
+    success closes the circuit, failure reopens it with the cooldown doubled
+    (up to max_cooldown_s). Thread-safe, so blocking and async callers share it.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = None, cooldown_s: float = None,
+                 max_cooldown_s: float = None, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = settings.AI_BREAKER_FAILURE_THRESHOLD if failure_threshold is None else failure_threshold
+        self.cooldown_s = settings.AI_BREAKER_COOLDOWN_S if cooldown_s is None else cooldown_s
+        self.max_cooldown_s = settings.AI_BREAKER_MAX_COOLDOWN_S if max_cooldown_s is None else max_cooldown_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._cooldown = self.cooldown_s
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._counters = {"successes": 0, "failures": 0, "short_circuited": 0, "trips": 0}
+        self._last_error: Optional[str] = None
+
+    @contextmanager
+    def guard(self, is_failure: Callable[[Exception], bool] = lambda e: True):
+        """
+        Wrap one upstream call. Raises CircuitOpen without running the block
+        while the circuit is open. Exceptions for which is_failure() is false
+        (e.g. a 400, which proves the upstream is answering) count as successes;
+        cancellation counts as neither.
+        """
+        probe = self._acquire()
+        outcome, error = None, None
+        try:
+            yield
+            outcome = True
+        except Exception as e:
+            outcome = not is_failure(e)
+            error = e
+            raise
+        finally:
+            self._release(probe, outcome, error)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = None
+            if self._state == self.OPEN:
+                retry_in = round(max(0.0, self._opened_at + self._cooldown - self._clock()), 2)
+            return {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "cooldown_s": self._cooldown,
+                "retry_in_s": retry_in,
+                "last_error": self._last_error,
+                **self._counters
+            }
+
+    def reset(self):
+        with self._lock:
+            self._state, self._failures, self._probing = self.CLOSED, 0, False
+            self._cooldown, self._opened_at = self.cooldown_s, None
+
+    def _acquire(self) -> bool:
+        """Admit a call or raise CircuitOpen; returns whether the call is the half-open probe."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return False
+            now = self._clock()
+            if self._state == self.OPEN and now >= self._opened_at + self._cooldown:
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self._counters["short_circuited"] += 1
+            retry_in = max(0.0, self._opened_at + self._cooldown - now)
+        raise CircuitOpen(self.name, retry_in)
+
+    def _release(self, probe: bool, outcome: Optional[bool], error: Optional[Exception]):
+        with self._lock:
+            if probe:
+                self._probing = False
+            if outcome is None:
+                return
+            if outcome:
+                self._counters["successes"] += 1
+                self._failures = 0
+                if self._state != self.CLOSED:
+                    logger.info("CIRCUIT %s: closed", self.name)
+                self._state, self._cooldown = self.CLOSED, self.cooldown_s
+                return
+            self._counters["failures"] += 1
+            self._failures += 1
+            self._last_error = f"{type(error).__name__}: {error}"
+            if probe:
+                # The upstream is still down: wait longer before the next probe
+                self._cooldown = min(self.max_cooldown_s, self._cooldown * 2)
+            elif self._state != self.CLOSED or self.failure_threshold <= 0 or self._failures < self.failure_threshold:
+                return
+            self._state, self._opened_at = self.OPEN, self._clock()
+            self._counters["trips"] += 1
+            logger.warning("CIRCUIT %s: open for %gs after %d failures (%s)", self.name, self._cooldown, self._failures,
+                           self._last_error)
@@ -4,6 +4,12 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import field_validator
 from typing import List, Union, Any
 
+
+def app_data_dir(*parts: str) -> str:
+    """Absolute per-user data directory ($XDG_DATA_HOME/finsight, default ~/.local/share/finsight), never the checkout."""
+    base = os.getenv("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "finsight", *parts)
+
 class Settings(BaseSettings):
     PROJECT_NAME: str = "FinSight AI"
     API_V1_STR: str = "/api/v1"
@@ -19,6 +25,91 @@ class Settings(BaseSettings):
 
     OPENAI_API_KEY: str = ""
     ENVIRONMENT: str = "development"
+    # Level of the app.* module loggers (DEBUG adds prompt sizes and memory reports)
+    LOG_LEVEL: str = "INFO"
+
+    # Uploads are spooled to disk; requests above the limit are rejected with 413
+    MAX_UPLOAD_SIZE_MB: int = 2048
+    UPLOAD_SPOOL_DIR: str = ""
+
+    # Data ingestion: CSVs above the threshold are streamed in row chunks.
+    # INGEST_MEMORY_REPORT logs per-stage memory use at DEBUG (see LOG_LEVEL)
+    INGEST_CHUNK_ROWS: int = 100000
+    INGEST_STREAMING_THRESHOLD_MB: int = 50
+    INGEST_LEAN_MODE: bool = True
+    INGEST_MEMORY_REPORT: bool = False
+    COLUMN_MAPPING_CACHE_SIZE: int = 512
+    DATE_FORMAT_CACHE_SIZE: int = 1024
+
+    # CSV parser: "c" (pandas), "pyarrow" (multithreaded Arrow reader) or "auto" (pyarrow when installed)
+    CSV_ENGINE: str = "auto"
+
+    # Execution layer: parsing runs in a process pool (0 = use the thread pool),
+    # database calls in a thread pool; each stage has a timeout in seconds
+    # (OpenAI calls are async, bounded by AI_DEADLINE_S below)
+    CPU_POOL_WORKERS: int = 2
+    CPU_POOL_MAX_TASKS_PER_CHILD: int = 50
+    IO_POOL_WORKERS: int = 16
+    STAGE_TIMEOUT_PROCESS_S: float = 300
+    STAGE_TIMEOUT_DB_S: float = 30
+
+    # Background analysis jobs: workers per API process, per-company running cap,
+    # retries with exponential backoff, and the lease after which a stuck job is reclaimed
+    JOB_WORKERS: int = 2
+    JOB_MAX_RUNNING_PER_COMPANY: int = 1
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_S: float = 10
+    JOB_LEASE_S: int = 900
+    JOB_POLL_INTERVAL_S: float = 2
+
+    # Normalized transactions kept per upload as encrypted, compressed Parquet;
+    # point it at a persistent disk in production
+    TRANSACTION_STORE_DIR: str = app_data_dir("transactions")
+    TRANSACTION_STORE_COMPRESSION: str = "zstd"
+
+    # Generic profiling caps (correlations use a row sample over a column subset)
+    PROFILE_MAX_CORR_COLUMNS: int = 25
+    PROFILE_SAMPLE_ROWS: int = 50000
+    PROFILE_PREVIEW_ROWS: int = 100
+    PROFILE_CONCURRENT: bool = True
+
+    # .xlsx reader engine: "auto" prefers calamine when installed, else openpyxl read-only.
+    # calamine loads a whole sheet into memory before the first batch, so "auto"
+    # streams workbooks above EXCEL_CALAMINE_MAX_MB (file size) with openpyxl instead
+    EXCEL_ENGINE: str = "auto"
+    EXCEL_CALAMINE_MAX_MB: int = 20
+
+    # AI analysis cache: results keyed on the prompt inputs, kept in an in-process
+    # LRU (entries, TTL in seconds) in front of a database tier; 0 disables a tier
+    AI_CACHE_SIZE: int = 512
+    AI_CACHE_TTL_S: float = 3600
+    AI_CACHE_DB_TTL_S: float = 7 * 24 * 3600
+    # Translated analysis strings, by content hash and language (database-backed)
+    TRANSLATION_CACHE_SIZE: int = 4096
+
+    # OpenAI calls: in-flight cap per API process, per-attempt timeout, overall
+    # deadline per call (after which the rule-based analysis is used) and retries
+    # of rate limits / timeouts / 5xx with jittered exponential backoff.
+    # OPENAI_BASE_URL points the client at another endpoint (a proxy or a local fake)
+    OPENAI_BASE_URL: str = ""
+    AI_MAX_CONCURRENCY: int = 4
+    AI_CALL_TIMEOUT_S: float = 30
+    AI_DEADLINE_S: float = 60
+    AI_MAX_RETRIES: int = 3
+    AI_RETRY_BACKOFF_S: float = 1
+    AI_RETRY_BACKOFF_MAX_S: float = 20
+    # Analysis prompt size: token budget (system + user message; 0 = unlimited)
+    # and the most expense/income categories listed before the rest become "Other"
+    AI_PROMPT_TOKEN_BUDGET: int = 3000
+    AI_PROMPT_MAX_CATEGORIES: int = 40
+    # Circuit breaker around OpenAI: consecutive failed calls before it opens, and
+    # the cooldown before a probe call (doubled after each failed probe, up to the max);
+    # a threshold of 0 disables it
+    AI_BREAKER_FAILURE_THRESHOLD: int = 5
+    AI_BREAKER_COOLDOWN_S: float = 30
+    AI_BREAKER_MAX_COOLDOWN_S: float = 300
+    # What-if simulation: most scenario combinations scored per request
+    SIMULATION_MAX_POINTS: int = 200000
 
     # Email Service
     SMTP_HOST: str = ""
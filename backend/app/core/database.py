@@ -1,8 +1,13 @@
 
+import logging
+
 from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, Session
 from app.core.config import settings
-from app.models.database import Base
+from app.models.database import Base, PENDING_JOB_CONTENT_INDEX
+
+logger = logging.getLogger(__name__)
 
 # Create engine
 engine = create_engine(
@@ -25,3 +30,9 @@ def get_db():
 # Create all tables
 def init_db():
     Base.metadata.create_all(bind=engine)
+    # Also for a database created before the index existed
+    try:
+        with engine.begin() as conn:
+            conn.execute(PENDING_JOB_CONTENT_INDEX)
+    except IntegrityError as e:
+        logger.warning("could not create uq_analysis_job_pending_content; existing jobs violate it (%s)", e.orig)
@@ -0,0 +1,91 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimeout(Exception):
+    def __init__(self, stage: str, timeout: float):
+        super().__init__(f"Stage '{stage}' did not finish within {timeout}s")
+        self.stage = stage
+        self.timeout = timeout
+
+
+class ExecutionLayer:
+    """
+    Runs blocking work off the event loop so one large upload does not stall
+    other requests on the same worker.
+
+    CPU-bound work (DataProcessor) goes to a bounded process pool, which keeps
+    pandas from holding the API process's GIL; blocking IO (OpenAI, SQLAlchemy,
+    encryption) goes to a thread pool. Each call is awaited with a per-stage
+    timeout. A task that times out cannot be interrupted; it finishes in its
+    worker, but the request stops waiting for it.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+
+    def _processes(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._process_pool is None:
+                # spawn: forking a process that already runs threads can deadlock the child
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=settings.CPU_POOL_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    max_tasks_per_child=settings.CPU_POOL_MAX_TASKS_PER_CHILD or None
+                )
+            return self._process_pool
+
+    def _threads(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=settings.IO_POOL_WORKERS, thread_name_prefix="io")
+            return self._thread_pool
+
+    async def run_cpu(self, stage: str, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run fn in the process pool. fn and its arguments must be picklable."""
+        if settings.CPU_POOL_WORKERS <= 0:
+            return await self.run_io(stage, fn, *args, timeout=timeout, **kwargs)
+        try:
+            return await self._run(self._processes(), stage, functools.partial(fn, *args, **kwargs), timeout)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool so later uploads still run
+            logger.warning("EXECUTOR: process pool broke during '%s'; restarting it", stage)
+            with self._lock:
+                pool, self._process_pool = self._process_pool, None
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    async def run_io(self, stage: str, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run a blocking call in the thread pool."""
+        return await self._run(self._threads(), stage, functools.partial(fn, *args, **kwargs), timeout)
+
+    @staticmethod
+    async def _run(pool, stage: str, call: Callable, timeout: Optional[float]) -> Any:
+        future = asyncio.get_running_loop().run_in_executor(pool, call)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise StageTimeout(stage, timeout) from None
+
+    def shutdown(self):
+        with self._lock:
+            pools = [self._process_pool, self._thread_pool]
+            self._process_pool = self._thread_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+
+execution_layer = ExecutionLayer()
@@ -0,0 +1,76 @@
+import json
+from app.core.config import settings
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject request bodies larger than MAX_UPLOAD_SIZE_MB with 413. A declared
+    Content-Length over the limit is refused before any of the body is read;
+    otherwise (chunked uploads) the body is counted as it is received and the
+    request is aborted as soon as the count crosses the limit, before the rest
+    reaches the multipart parser. Register it before CORSMiddleware so the 413
+    carries the CORS headers.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            if exceeded:
+                raise _BodyTooLarge()
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # Once over the limit the app's own response (e.g. a 400 for the
+            # unreadable body) is dropped in favour of the 413
+            if exceeded and not response_started:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            pass
+        if exceeded and not response_started:
+            await self._reject(send)
+
+    @staticmethod
+    async def _reject(send):
+        body = json.dumps({
+            "detail": f"File too large. Maximum upload size is {settings.MAX_UPLOAD_SIZE_MB} MB."
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,12 +1,31 @@
 
 import os
 import base64
+import threading
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
 class EncryptionService:
+    """
+    Fernet encryption of stored fields. The key is derived from SECRET_KEY
+    (PBKDF2, 100,000 iterations) on first use rather than at import, so
+    starting the app does not pay for it.
+    """
     def __init__(self):
+        self._fernet = None
+        self._lock = threading.Lock()
+
+    @property
+    def fernet(self) -> Fernet:
+        if self._fernet is None:
+            with self._lock:
+                if self._fernet is None:
+                    self._fernet = Fernet(self._derive_key())
+        return self._fernet
+
+    @staticmethod
+    def _derive_key() -> bytes:
         secret_key = os.getenv("SECRET_KEY", "fallback-secret-for-dev-only")
         salt = b'finsight_salt_123' # In production, use a unique salt per install
         
@@ -16,8 +35,7 @@ class EncryptionService:
             salt=salt,
             iterations=100000,
         )
-        key = base64.urlsafe_b64encode(kdf.derive(secret_key.encode()))
-        self.fernet = Fernet(key)
+        return base64.urlsafe_b64encode(kdf.derive(secret_key.encode()))
 
     def encrypt(self, data: str) -> str:
         if not data:
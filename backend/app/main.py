@@ -1,13 +1,31 @@
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.core.database import init_db
+from app.core.middleware import UploadSizeLimitMiddleware
+from app.core.executor import execution_layer
+from app.services.ai_engine import ai_engine
+from app.services.analysis_cache import analysis_cache
+from app.services.job_queue import job_queue
+
+# Module loggers live under "app"; uvicorn only sets up its own loggers
+app_logger = logging.getLogger("app")
+if not app_logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    app_logger.addHandler(_handler)
+app_logger.setLevel(settings.LOG_LEVEL.upper())
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
 )
 
+# Added before CORSMiddleware so CORS wraps it and its 413s carry the CORS headers
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Set all CORS enabled origins
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -20,13 +38,33 @@ if settings.BACKEND_CORS_ORIGINS:
 
 # Initialize database
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
     init_db()
+    job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await job_queue.stop()
+    execution_layer.shutdown()
 
 @app.get("/")
 async def root():
     return {"message": "FinSight AI Backend is running", "status": "online"}
 
+@app.get("/health")
+async def health():
+    """Liveness plus the AI path: "degraded" while the OpenAI circuit breaker is not closed."""
+    circuit = ai_engine.breaker.snapshot()
+    return {
+        "status": "online" if circuit["state"] == "closed" else "degraded",
+        "ai": {
+            "engine": ai_engine._engine(),
+            "circuit": circuit,
+            "prompts": ai_engine.prompts.stats(),
+            "analysis_cache": analysis_cache.stats()
+        }
+    }
+
 from app.api.v1.api import api_router
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
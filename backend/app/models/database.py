@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, JSON, UniqueConstraint, Index, LargeBinary, DDL
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -64,6 +64,8 @@ class FinancialUpload(Base):
     encrypted_credit_rationale = Column(Text, nullable=True)
  
     company = relationship("Company", back_populates="financial_uploads")
+    transaction_file = relationship("TransactionFile", uselist=False, back_populates="upload")
+    envelope = relationship("UploadEnvelope", uselist=False, back_populates="upload")
 
 class Report(Base):
     __tablename__ = "reports"
@@ -83,3 +85,178 @@ class Report(Base):
     is_deleted = Column(Integer, default=0) # 0 = active, 1 = deleted (hidden from UI)
     
     company = relationship("Company", back_populates="reports")
+
+class TransactionFile(Base):
+    __tablename__ = "transaction_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    upload_id = Column(Integer, ForeignKey("financial_data_uploads.id"), unique=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
+
+    # Encrypted Parquet file of the normalized transactions (see TransactionStore)
+    path = Column(Text, nullable=False)
+    row_count = Column(Integer, default=0)
+    size_bytes = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    upload = relationship("FinancialUpload", back_populates="transaction_file")
+
+class PortfolioScore(Base):
+    """Rule-based scores of an upload (app.services.scoring), recomputed in bulk by scripts/rescore_uploads.py."""
+    __tablename__ = "portfolio_scores"
+
+    upload_id = Column(Integer, ForeignKey("financial_data_uploads.id"), primary_key=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
+
+    health_score = Column(Integer, nullable=False)
+    status = Column(String(16), nullable=False)  # healthy | at_risk
+    working_capital_status = Column(String(16), nullable=False)  # Good | Warning | Critical
+    product = Column(String(32), nullable=False)  # scoring.PRODUCTS
+    creditworthiness_score = Column(Integer, nullable=False)
+    savings_target = Column(Integer, nullable=False)  # % of operating costs
+    scoring_version = Column(Integer, nullable=False, index=True)
+    scored_at = Column(DateTime, default=datetime.utcnow)
+
+class UploadEnvelope(Base):
+    """
+    The sensitive fields of an upload sealed together (app.services.upload_envelope):
+    one Fernet token over a version byte and the zlib-compressed JSON, replacing the
+    per-field encrypted_* columns of FinancialUpload. Uploads stored before it are
+    sealed by scripts/seal_uploads.py.
+    """
+    __tablename__ = "upload_envelopes"
+
+    upload_id = Column(Integer, ForeignKey("financial_data_uploads.id"), primary_key=True)
+    sealed = Column(Text, nullable=False)
+    version = Column(Integer, nullable=False, index=True)
+    sealed_at = Column(DateTime, default=datetime.utcnow)
+
+    upload = relationship("FinancialUpload", back_populates="envelope")
+
+class ColumnMapping(Base):
+    __tablename__ = "column_mappings"
+    __table_args__ = (UniqueConstraint("company_id", "header_signature", name="uq_column_mapping_signature"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
+
+    # sha256 of the normalized header tuple -> resolved {target: source column}
+    header_signature = Column(String(64), nullable=False)
+    mapped_columns = Column(JSON, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow)
+    use_count = Column(Integer, default=1)
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
+    filename = Column(String, nullable=False)
+    # Spooled upload; removed once the job succeeds or fails for good
+    file_path = Column(Text, nullable=False)
+    params = Column(JSON, nullable=False)  # lang, industry, sheet, append
+    # sha256 of file bytes + industry + sheet (+ append) + PROCESSING_VERSION; repeat uploads reuse the job
+    content_hash = Column(String(64), nullable=True, index=True)
+
+    # queued -> running -> succeeded | failed; failed attempts go back to queued until max_attempts
+    status = Column(String(16), default="queued", index=True)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    error = Column(Text, nullable=True)
+    run_after = Column(DateTime, default=datetime.utcnow)
+    # A running job whose lease expired (worker died) is picked up again
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    upload_id = Column(Integer, ForeignKey("financial_data_uploads.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+# At most one queued/running job per company and content_hash, so identical
+# uploads racing each other get one job; finished jobs are left out (failed
+# content, cleared uploads and forced re-runs queue new ones). Plain SQL that
+# SQLite and PostgreSQL both accept: Index(..., postgresql_where=...) would
+# import the postgresql dialect with the models. Created by init_db.
+PENDING_JOB_CONTENT_INDEX = DDL(
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_analysis_job_pending_content "
+    "ON analysis_jobs (company_id, content_hash) WHERE status IN ('queued', 'running')"
+)
+
+class LedgerMonth(Base):
+    __tablename__ = "ledger_months"
+    __table_args__ = (UniqueConstraint("company_id", "month", name="uq_ledger_month"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
+    month = Column(String(7), nullable=False)  # YYYY-MM, '' for undated transactions
+
+    # Sorted uint64 keyed fingerprints of every transaction already in the ledger for this month
+    fingerprints = Column(LargeBinary, nullable=False)
+    # Also the version for optimistic updates: an append only applies if it is unchanged
+    row_count = Column(Integer, default=0)
+    first_date = Column(DateTime, nullable=True)
+    last_date = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class LedgerRollup(Base):
+    __tablename__ = "ledger_rollups"
+    __table_args__ = (
+        # Also serves (company_id, category, month) range scans for category trends
+        UniqueConstraint("company_id", "category_key", "month", name="uq_ledger_rollup"),
+        Index("ix_ledger_rollups_company_month", "company_id", "month"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    month = Column(String(7), nullable=False)  # YYYY-MM, '' for undated transactions
+    # HMAC of the category name so it can be indexed; '' for uncategorized rows
+    category_key = Column(String(32), nullable=False)
+    encrypted_category = Column(Text, nullable=True)
+
+    amount = Column(Float, default=0.0)
+    abs_amount = Column(Float, default=0.0)
+    income_amount = Column(Float, default=0.0)
+    income_count = Column(Integer, default=0)
+    expense_amount = Column(Float, default=0.0)
+    expense_abs_amount = Column(Float, default=0.0)
+    expense_count = Column(Integer, default=0)
+    tax = Column(Float, default=0.0)
+    txn_count = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class LedgerSegment(Base):
+    __tablename__ = "ledger_segments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
+    job_id = Column(Integer, ForeignKey("analysis_jobs.id"), nullable=True)
+
+    # Encrypted Parquet file of the transactions this upload added to the ledger
+    path = Column(Text, nullable=False)
+    row_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class AnalysisCacheEntry(Base):
+    __tablename__ = "analysis_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # sha256 of the prompt inputs + industry + language + engine/prompt version
+    cache_key = Column(String(64), unique=True, index=True, nullable=False)
+    encrypted_result = Column(Text, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    hit_count = Column(Integer, default=0)
+    last_hit_at = Column(DateTime, nullable=True)
+
+class TranslationCacheEntry(Base):
+    __tablename__ = "translation_cache"
+    __table_args__ = (UniqueConstraint("content_hash", "language", name="uq_translation_cache"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False)  # sha256 of the source string
+    language = Column(String(16), nullable=False)
+    encrypted_text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,5 +1,5 @@
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional, Dict, Any
 
 class FinancialDataUpload(BaseModel):
@@ -26,3 +26,26 @@ class AIAnalysisResult(BaseModel):
     forecast_narrative: str
     working_capital_analysis: Optional[Dict[str, str]] = None
     creditworthiness_score: Optional[int] = None
+
+class ScenarioGrid(BaseModel):
+    """What-if adjustments for /financial/simulate; every combination of the values is scored."""
+    upload_id: Optional[int] = None
+    expense_cut: List[float] = Field(default=[0, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3], min_length=1)     # share of expenses cut
+    ar_collected: List[float] = Field(default=[0, 0.25, 0.5, 0.75, 1], min_length=1)                 # share of receivables collected
+    debt_paydown: List[float] = Field(default=[0, 0.25, 0.5, 0.75, 1], min_length=1)                 # share of debt repaid
+    revenue_growth: List[float] = Field(default=[-0.1, -0.05, 0, 0.05, 0.1, 0.15, 0.2], min_length=1)  # revenue change
+    top: int = Field(default=10, ge=0, le=100)
+
+    @field_validator("expense_cut", "ar_collected", "debt_paydown")
+    @classmethod
+    def share(cls, values: List[float]) -> List[float]:
+        if any(not 0 <= v <= 1 for v in values):
+            raise ValueError("values must be shares between 0 and 1")
+        return sorted(set(values))
+
+    @field_validator("revenue_growth")
+    @classmethod
+    def growth(cls, values: List[float]) -> List[float]:
+        if any(not -1 <= v <= 10 for v in values):
+            raise ValueError("values must be between -1 and 10")
+        return sorted(set(values))
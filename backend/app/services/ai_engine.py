@@ -1,53 +1,333 @@
 
 import os
+import copy
 import json
-from typing import Dict, Any, List
-from openai import OpenAI
+import logging
+import random
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Dict, Any, List, Tuple, AsyncIterator, Awaitable, Callable
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.core.executor import execution_layer, StageTimeout
+from app.services.analysis_cache import analysis_cache
+from app.services.json_stream import JsonFieldStream
+from app.services import scoring
+from app.services.prompt_builder import PromptBuilder
+from app.services.translation_cache import translation_cache
+from app.services.translation_catalog import rule_text, translation_catalog
+
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+AI_MODEL = "gpt-4"
+# Part of the analysis cache key: bump when the prompt or the rule-based logic changes
+PROMPT_VERSION = 3
+LANGUAGE_NAMES = {"en": "English", "hi": "Hindi"}
+# Narrative fields translate_analysis translates: plain strings (None) or the
+# string keys of each entry of a list/dict field
+TRANSLATABLE_FIELDS = {
+    "summary": None,
+    "status": None,
+    "forecast": None,
+    "risks": ("type", "message"),
+    "recommendations": ("action", "impact"),
+    "cost_optimization": ("area", "suggestion"),
+    "financial_products": ("product", "rationale"),
+    "bookkeeping_tax_compliance": ("bookkeeping_status", "tax_insights"),
+    "working_capital_analysis": ("message",),
+    "creditworthiness": ("rationale",),
+}
+# Everything the prompt and the rule-based analysis read from financial_data
+PROMPT_FIELDS = (
+    'total_revenue', 'total_expenses', 'net_profit', 'profit_margin', 'expense_ratio',
+    'accounts_receivable', 'accounts_payable', 'inventory_value', 'total_debt', 'categories'
+)
+# Rule-based product and working capital status (see scoring) -> wording
+PRODUCT_PROVIDERS = {"invoice_financing": "NBFC", "expansion_loan": "Bank", "working_capital_loan": "Bank/NBFC"}
+WORKING_CAPITAL_MESSAGES = {"Good": "working_capital_balanced", "Warning": "working_capital_high_ar", "Critical": "working_capital_payables"}
+# HTTP statuses worth another attempt (besides connection errors and timeouts)
+RETRYABLE_STATUSES = (408, 409, 429)
 
 class AIEngine:
     def __init__(self):
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY", "")
-        self.client = OpenAI(api_key=api_key) if api_key else None
+        # OpenAI clients are built on first use, so openai is not imported with the app
+        self._client = None
+        self._lock = threading.Lock()
+        # (event loop, AsyncOpenAI client, in-flight semaphore); both are bound to one loop
+        self._async = None
+        # Shared by every model call, blocking or async: while OpenAI is down,
+        # analyses go straight to the rule-based engine and translations keep the text
+        self.breaker = CircuitBreaker("openai")
+        self.prompts = PromptBuilder(AI_MODEL)
         
     def analyze_financials(self, financial_data: Dict[str, Any], industry: str = "General", language: str = 'en') -> Dict[str, Any]:
         """
         Use AI to analyze financial data and provide insights.
         Falls back to rule-based analysis if OpenAI API is not configured.
+        Results are cached on the prompt inputs (see AnalysisCache); blocking.
         """
-        if self.client and os.getenv("OPENAI_API_KEY"):
-            return self._ai_analysis(financial_data, industry, language)
-        else:
-            return self._rule_based_analysis(financial_data, industry, language)
+        key = self._cache_key(financial_data, industry, language)
+        return analysis_cache.get_or_compute(key, lambda: self._analyze(financial_data, industry, language))
+
+    async def analyze_financials_async(self, financial_data: Dict[str, Any], industry: str = "General",
+                                       language: str = 'en') -> Dict[str, Any]:
+        """
+        analyze_financials for the event loop: the model call is awaited on the
+        async client (see _chat_async) and only the cache's database tier uses the
+        IO pool, so a slow OpenAI response holds no worker thread.
+        """
+        key = self._cache_key(financial_data, industry, language)
+        return await analysis_cache.get_or_compute_async(key, lambda: self._analyze_async(financial_data, industry, language))
+
+    async def stream_analysis(self, financial_data: Dict[str, Any], industry: str = "General",
+                              language: str = 'en') -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        The analysis as (event, data) pairs for the dashboard to render as they come:
+
+        - ("placeholder", analysis): the rule-based analysis, at once
+        - ("field", {"field": name, "value": value}): each top-level field of the
+          model's answer as soon as its JSON value is complete
+        - ("done", {"source": "model" | "cache" | "rule-based", "analysis": analysis})
+
+        A cached analysis is replayed as fields. When the model is not configured,
+        fails or its circuit is open, "done" carries the placeholder (not cached).
+        """
+        placeholder = self._rule_based_analysis(financial_data, industry, language)
+        yield "placeholder", placeholder
+        if self._engine() == "rule-based":
+            yield "done", {"source": "rule-based", "analysis": placeholder}
+            return
+
+        key = self._cache_key(financial_data, industry, language)
+        cached = await analysis_cache.peek_async(key)
+        if cached is not None:
+            for name, value in cached.items():
+                yield "field", {"field": name, "value": value}
+            yield "done", {"source": "cache", "analysis": cached}
+            return
+
+        parser = JsonFieldStream()
+        try:
+            async for text in self._chat_stream(
+                    "ai analysis stream", self._analysis_messages(financial_data, industry, language), temperature=0.7):
+                for name, value in parser.feed(text):
+                    yield "field", {"field": name, "value": value}
+            result = parser.result()
+        except Exception as e:
+            logger.warning("AI Analysis Error: %s", e)
+            yield "done", {"source": "rule-based", "analysis": placeholder}
+            return
+        await analysis_cache.put_async(key, result)
+        yield "done", {"source": "model", "analysis": result}
+
+    def _cache_key(self, financial_data: Dict[str, Any], industry: str, language: str) -> str:
+        return analysis_cache.key(
+            {field: financial_data.get(field) for field in PROMPT_FIELDS},
+            industry, language, f"{self._engine()}:v{PROMPT_VERSION}"
+        )
+
+    def _engine(self) -> str:
+        return AI_MODEL if os.getenv("OPENAI_API_KEY") else "rule-based"
+
+    @property
+    def client(self):
+        """The blocking OpenAI client; None without OPENAI_API_KEY."""
+        if self._client is None and os.getenv("OPENAI_API_KEY"):
+            with self._lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    self._client = OpenAI(
+                        api_key=os.getenv("OPENAI_API_KEY"), base_url=settings.OPENAI_BASE_URL or None,
+                        timeout=settings.AI_CALL_TIMEOUT_S
+                    )
+        return self._client
+
+    def _analyze(self, financial_data: Dict[str, Any], industry: str, language: str) -> Tuple[Dict[str, Any], bool]:
+        """The uncached analysis and whether it may be cached (API fallbacks may not)."""
+        if self._engine() == "rule-based":
+            return self._rule_based_analysis(financial_data, industry, language), True
+        try:
+            return self._ai_analysis(financial_data, industry, language), True
+        except Exception as e:
+            logger.warning("AI Analysis Error: %s", e)
+            return self._rule_based_analysis(financial_data, industry, language), False
+
+    async def _analyze_async(self, financial_data: Dict[str, Any], industry: str, language: str) -> Tuple[Dict[str, Any], bool]:
+        if self._engine() == "rule-based":
+            return self._rule_based_analysis(financial_data, industry, language), True
+        try:
+            content = await self._chat_async(
+                "ai analysis", self._analysis_messages(financial_data, industry, language), temperature=0.7
+            )
+            return json.loads(content), True
+        except Exception as e:
+            # Includes the deadline passing (StageTimeout)
+            logger.warning("AI Analysis Error: %s", e)
+            return self._rule_based_analysis(financial_data, industry, language), False
     
     def _ai_analysis(self, financial_data: Dict[str, Any], industry: str, language: str) -> Dict[str, Any]:
-        prompt = self._build_analysis_prompt(financial_data, industry, language)
-        
-        try:
-            # Avoid f-string here just in case
-            system_msg = "You are an expert financial consultant for " + industry + " SMEs. Your goal is to provide deep financial intelligence. "
-            if language == 'hi':
-                system_msg += "CRITICAL: You MUST provide all narrative descriptions, summaries, risk messages, and recommendation actions in HINDI. Do NOT use English for these fields."
-            else:
-                system_msg += "Provide all fields in English."
-            
+        with self.breaker.guard(self._upstream_failure):
             response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_msg},
-                    {"role": "user", "content": prompt}
-                ],
+                model=AI_MODEL,
+                messages=self._analysis_messages(financial_data, industry, language),
                 temperature=0.7,
                 response_format={"type": "json_object"}
             )
-            
-            result = json.loads(response.choices[0].message.content)
-            return result
-        except Exception as e:
-            print("AI Analysis Error: " + str(e))
-            return self._rule_based_analysis(financial_data, industry, language)
+        
+        result = json.loads(response.choices[0].message.content)
+        return result
+
+    def _analysis_messages(self, financial_data: Dict[str, Any], industry: str, language: str) -> List[Dict[str, str]]:
+        # Avoid f-string here just in case
+        system_msg = "You are an expert financial consultant for " + industry + " SMEs. Your goal is to provide deep financial intelligence. "
+        if language == 'hi':
+            system_msg += "CRITICAL: You MUST provide all narrative descriptions, summaries, risk messages, and recommendation actions in HINDI. Do NOT use English for these fields."
+        else:
+            system_msg += "Provide all fields in English."
+
+        # As many categories as fit AI_PROMPT_TOKEN_BUDGET (see PromptBuilder)
+        (system_msg, prompt), _ = self.prompts.fit(
+            "ai analysis",
+            lambda categories: (system_msg, self._build_analysis_prompt(financial_data, industry, language, categories)),
+            financial_data.get('categories')
+        )
+        return [
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _async_client(self) -> Tuple["AsyncOpenAI", asyncio.Semaphore]:
+        """The async client and in-flight semaphore of the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._async is None or self._async[0] is not loop:
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY", ""), base_url=settings.OPENAI_BASE_URL or None,
+                timeout=settings.AI_CALL_TIMEOUT_S, max_retries=0  # retries are _chat_async's
+            )
+            self._async = (loop, client, asyncio.Semaphore(max(1, settings.AI_MAX_CONCURRENCY)))
+        return self._async[1], self._async[2]
+
+    async def _chat_async(self, stage: str, messages: List[Dict[str, str]], temperature: float) -> str:
+        """
+        One JSON chat completion on the async client; returns the message content.
+        At most AI_MAX_CONCURRENCY calls are in flight per process. Connection
+        errors, timeouts, 408/409/429 and 5xx are retried with full-jitter
+        exponential backoff (honouring Retry-After); the whole call, waiting for a
+        slot included, must finish within AI_DEADLINE_S or StageTimeout is raised.
+        The call counts once towards the circuit breaker, which raises CircuitOpen
+        up front while open.
+        """
+        client, slots = self._async_client()
+        deadline = asyncio.get_running_loop().time() + settings.AI_DEADLINE_S
+        with self.breaker.guard(self._upstream_failure):
+            return await self._with_retries(
+                stage, deadline, lambda remaining: self._complete(client, slots, messages, temperature, remaining)
+            )
+
+    async def _chat_stream(self, stage: str, messages: List[Dict[str, str]], temperature: float) -> AsyncIterator[str]:
+        """
+        _chat_async for a streamed completion: yields the content as it arrives.
+        The in-flight slot, the breaker and AI_DEADLINE_S cover the whole stream;
+        only opening it is retried (a stream that breaks midway cannot resume).
+        """
+        client, slots = self._async_client()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.AI_DEADLINE_S
+        with self.breaker.guard(self._upstream_failure):
+            try:
+                await asyncio.wait_for(slots.acquire(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                raise StageTimeout(stage, settings.AI_DEADLINE_S) from None
+            try:
+                stream = await self._with_retries(stage, deadline, lambda remaining: client.chat.completions.create(
+                    model=AI_MODEL,
+                    messages=messages,
+                    temperature=temperature,
+                    response_format={"type": "json_object"},
+                    stream=True,
+                    timeout=min(settings.AI_CALL_TIMEOUT_S, remaining)
+                ))
+                try:
+                    chunks = stream.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), max(0.0, deadline - loop.time()))
+                        except StopAsyncIteration:
+                            return
+                        except asyncio.TimeoutError:
+                            raise StageTimeout(stage, settings.AI_DEADLINE_S) from None
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
+                finally:
+                    await stream.close()
+            finally:
+                slots.release()
+
+    async def _with_retries(self, stage: str, deadline: float, attempt_call: Callable[[float], Awaitable[Any]]) -> Any:
+        """Await attempt_call(seconds left) until it succeeds, retrying retryable errors until the deadline."""
+        from openai import APIConnectionError, APIStatusError
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                return await asyncio.wait_for(attempt_call(remaining), remaining)
+            except asyncio.TimeoutError:
+                raise StageTimeout(stage, settings.AI_DEADLINE_S) from None
+            except (APIConnectionError, APIStatusError) as e:
+                if not self._retryable(e) or attempt >= settings.AI_MAX_RETRIES:
+                    raise
+                attempt += 1
+                backoff = min(settings.AI_RETRY_BACKOFF_MAX_S, settings.AI_RETRY_BACKOFF_S * 2 ** (attempt - 1))
+                delay = max(random.uniform(0, backoff), self._retry_after(e))
+                if loop.time() + delay >= deadline:
+                    raise StageTimeout(stage, settings.AI_DEADLINE_S) from e
+                logger.info("AI: %s attempt %s failed (%s); retrying in %.2fs", stage, attempt, type(e).__name__, delay)
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    async def _complete(client: "AsyncOpenAI", slots: asyncio.Semaphore, messages: List[Dict[str, str]],
+                        temperature: float, remaining: float) -> str:
+        async with slots:
+            response = await client.chat.completions.create(
+                model=AI_MODEL,
+                messages=messages,
+                temperature=temperature,
+                response_format={"type": "json_object"},
+                timeout=min(settings.AI_CALL_TIMEOUT_S, remaining)
+            )
+        return response.choices[0].message.content
+
+    @staticmethod
+    def _retryable(error: Exception) -> bool:
+        from openai import APIConnectionError, APIStatusError
+        if isinstance(error, APIStatusError):
+            return error.status_code in RETRYABLE_STATUSES or error.status_code >= 500
+        return isinstance(error, APIConnectionError)  # includes APITimeoutError
+
+    @classmethod
+    def _upstream_failure(cls, error: Exception) -> bool:
+        """Errors that say OpenAI is unhealthy (as opposed to e.g. a bad request); these trip the breaker."""
+        return isinstance(error, StageTimeout) or cls._retryable(error)
+
+    @staticmethod
+    def _retry_after(error: Exception) -> float:
+        """Seconds the server asked us to wait, 0 when it did not say."""
+        response = getattr(error, "response", None)
+        try:
+            return max(0.0, float(response.headers.get("retry-after", 0))) if response is not None else 0.0
+        except ValueError:
+            return 0.0
     
-    def _build_analysis_prompt(self, financial_data: Dict[str, Any], industry: str, language: str) -> str:
+    def _build_analysis_prompt(self, financial_data: Dict[str, Any], industry: str, language: str, categories: str) -> str:
+        """The user prompt; categories is the (already budgeted) category breakdown as JSON."""
         lang_instruction = "IMPORTANT: Provide all narrative fields in HINDI" if language == 'hi' else "Provide all fields in English"
         
         template = """
@@ -125,105 +405,75 @@ Respond ONLY in JSON format:
             ap=financial_data.get('accounts_payable', 0),
             inventory=financial_data.get('inventory_value', 0),
             debt=financial_data.get('total_debt', 0),
-            categories=json.dumps(financial_data.get('categories', {}), indent=2),
+            categories=categories,
             lang=lang_instruction
         )
     
     def _rule_based_analysis(self, financial_data: Dict[str, Any], industry: str, language: str) -> Dict[str, Any]:
         revenue = financial_data.get('total_revenue', 0)
-        expenses = financial_data.get('total_expenses', 0)
         profit = financial_data.get('net_profit', 0)
-        ar = financial_data.get('accounts_receivable', 0)
-        ap = financial_data.get('accounts_payable', 0)
-        debt = financial_data.get('total_debt', 0)
         margin = financial_data.get('profit_margin', 0)
         expense_ratio = financial_data.get('expense_ratio', 0)
         
-        # Performance Indicators
-        is_high_ar = ar > (revenue * 0.2)
-        is_low_margin = margin < 15
-        is_high_debt = debt > (revenue * 0.4)
-        
-        # Enhanced Health Score calculation
-        score = 65
-        if profit > 0: score += 15
-        if margin > 20: score += 10
-        if ar < ap and ar > 0: score += 5
-        if is_high_debt: score -= 20
-        if is_low_margin: score -= 10
-        
-        final_score = min(92, max(0, score))
+        # Health score, working capital and product (thresholds in app.services.scoring)
+        scores = scoring.score(
+            revenue, profit, margin, financial_data.get('accounts_receivable', 0), financial_data.get('accounts_payable', 0),
+            financial_data.get('total_debt', 0), expense_ratio
+        )
+        final_score = scores["health_score"]
+        is_high_ar = scores["high_ar"]
+        target = scores["savings_target"]
         
         # Data-driven Cost Optimization logic
         cost_opt = []
-        if expense_ratio > 30:
-            target = 10 if expense_ratio < 50 else 15
+        if expense_ratio > scoring.HIGH_EXPENSE_RATIO_PCT:
             cost_opt.append({
-                "area": "परिचालन व्यय (Operating Expenses)" if language == 'hi' else "Operating Expenses",
-                "suggestion": f"व्यय अनुपात {expense_ratio:.1f}% है। विपणन और व्यवस्थापक लागत को {target}% तक कम करने की सिफारिश की जाती है।" if language == 'hi' else f"Operating expenses are {expense_ratio:.1f}% of revenue. Recommended: reduce marketing & admin costs by {target}-{target+5}%.",
+                "area": rule_text("cost_operating_area", language),
+                "suggestion": rule_text("cost_operating_suggestion", language, ratio=f"{expense_ratio:.1f}", target=target, target_high=target + 5),
                 "savings_potential": f"{target}%"
             })
         else:
             cost_opt.append({
-                "area": "फिक्स्ड कॉस्ट (Fixed Costs)" if language == 'hi' else "Fixed Costs",
-                "suggestion": "बेहतर मार्जिन के लिए उपयोगिताओं और किराए पर फिर से बातचीत करें।" if language == 'hi' else "Renegotiate utilities and rent for better margins.",
-                "savings_potential": "5%"
+                "area": rule_text("cost_fixed_area", language),
+                "suggestion": rule_text("cost_fixed_suggestion", language),
+                "savings_potential": f"{target}%"
             })
 
         # Data-driven Products
-        products = []
-        if is_high_ar:
-            products.append({
-                "product": "चालान वित्तपोषण (Invoice Financing)" if language == 'hi' else "Invoice Financing",
-                "provider_type": "NBFC",
-                "rationale": "आपके पास उच्च प्राप्य खाते (AR) हैं। नकदी प्रवाह के लिए इनका उपयोग करें।" if language == 'hi' else "High receivables detected. Use invoice financing to unlock cash flow."
-            })
-        elif profit > 0 and final_score > 70:
-            products.append({
-                "product": "व्यापार विस्तार ऋण (Business Expansion Loan)" if language == 'hi' else "Business Expansion Loan",
-                "provider_type": "Bank",
-                "rationale": "मजबूत स्वास्थ्य स्कोर और लाभप्रदता के आधार पर विकास के लिए पात्र।" if language == 'hi' else "Eligible for growth capital based on strong health score and profitability."
-            })
-        else:
-            products.append({
-                "product": "कार्यशील पूंजी ऋण (Working Capital Loan)" if language == 'hi' else "Working Capital Loan",
-                "provider_type": "Bank/NBFC",
-                "rationale": "दैनिक कार्यों को सुचारू रूप से चलाने के लिए।" if language == 'hi' else "To maintain smooth day-to-day operations."
-            })
+        products = [{
+            "product": rule_text(f"product_{scores['product']}", language),
+            "provider_type": PRODUCT_PROVIDERS[scores['product']],
+            "rationale": rule_text(f"product_{scores['product']}_rationale", language)
+        }]
 
         # Working Capital Analysis
-        wc_status = "Good"
-        wc_msg = "कार्यशील पूंजी चक्र संतुलित है।" if language == 'hi' else "Working capital cycle is balanced."
-        if is_high_ar:
-            wc_status = "Warning"
-            wc_msg = "उच्च प्राप्य राशि (AR) संग्रह में देरी का संकेत देती है - नकदी प्रवाह जोखिम।" if language == 'hi' else "High receivables indicate delays in collection - cash flow risk."
-        elif ap > ar and ar > 0:
-            wc_status = "Critical"
-            wc_msg = "देय राशि प्राप्य से अधिक है। आपूर्तिकर्ता विश्वास जोखिम बढ़ सकता है।" if language == 'hi' else "Payables exceed receivables. Supplier trust risk may increase."
+        wc_status = scores["working_capital_status"]
+        wc_msg = rule_text(WORKING_CAPITAL_MESSAGES[wc_status], language)
 
+        healthy = scores["healthy"]
         return {
             "health_score": final_score,
-            "status": ("स्वस्थ" if final_score > 70 else "जोखिम में") if language == 'hi' else ("Healthy" if final_score > 70 else "At Risk"),
-            "summary": f"Business is {('Healthy' if final_score > 70 else 'At Risk')} with a score of {final_score}. Revenue is ${revenue:,.2f}." if language != 'hi' else f"व्यवसाय {final_score} के स्कोर के साथ {'स्वस्थ' if final_score > 70 else 'जोखिम में'} है। राजस्व ${revenue:,.2f} है।",
+            "status": rule_text("status_healthy" if healthy else "status_at_risk", language),
+            "summary": rule_text("summary_healthy" if healthy else "summary_at_risk", language, score=final_score, revenue=f"{revenue:,.2f}"),
             "risks": [
                 {
-                    "type": "तरलता (Liquidity)" if language == 'hi' else "Liquidity", 
+                    "type": rule_text("risk_liquidity", language),
                     "severity": "High" if is_high_ar else "Medium", 
-                    "message": "नकदी प्रवाह बनाए रखने के लिए संग्रह चक्र की बारीकी से निगरानी करें।" if language == 'hi' else "Closely monitor collection cycle to maintain cash flow."
+                    "message": rule_text("risk_liquidity_message", language)
                 }
             ],
             "recommendations": [
                 {
-                    "action": "कर अनुपालन (Tax Compliance)" if language == 'hi' else "Tax Compliance", 
-                    "impact": "कानूनी जोखिम कम करें" if language == 'hi' else "Reduce legal risk", 
+                    "action": rule_text("recommendation_tax_compliance", language),
+                    "impact": rule_text("recommendation_tax_compliance_impact", language),
                     "category": "Tax"
                 }
             ],
             "cost_optimization": cost_opt,
             "financial_products": products,
             "bookkeeping_tax_compliance": {
-                "bookkeeping_status": ("अच्छी" if profit > 0 else "सुधार की आवश्यकता है") if language == 'hi' else ("Good" if profit > 0 else "Needs Improvement"),
-                "tax_insights": "जीएसटी रिटर्न की जांच करें और टीडीएस मिलान सुनिश्चित करें।" if language == 'hi' else "Check GST returns and ensure TDS reconciliation.",
+                "bookkeeping_status": rule_text("bookkeeping_good" if profit > 0 else "bookkeeping_needs_improvement", language),
+                "tax_insights": rule_text("tax_insights", language),
                 "compliance_watch": ["GST", "TDS", "Income Tax"]
             },
             "working_capital_analysis": {
@@ -231,128 +481,159 @@ Respond ONLY in JSON format:
                 "message": wc_msg
             },
             "creditworthiness": {
-                "score": int(final_score * 0.9),
-                "rationale": "स्थिर आय और ऋण प्रबंधन इतिहास।" if language == 'hi' else "Consistent income and debt management history."
+                "score": scores["creditworthiness_score"],
+                "rationale": rule_text("credit_rationale", language)
             },
             "industry_benchmarks": {
                 "profit_margin_avg": 18.5 if industry != "General" else 15.0,
                 "revenue_growth_avg": 12.0,
                 "expense_ratio_avg": 72.0,
-                "user_comparison": "औसत से ऊपर" if margin > 18 else "औसत" if language == 'hi' else ("Above Average" if margin > 18 else "Average")
+                "user_comparison": rule_text("benchmark_above_average" if margin > 18 else "benchmark_average", language)
             },
-            "forecast": "12 महीनों में 10-15% विकास की उम्मीद है।" if language == 'hi' else "Expected 10-15% growth over 12 months."
+            "forecast": rule_text("forecast_growth", language)
         }
     
-    def translate_analysis(self, summary: str, risks: List[Dict], recommendations: List[Dict], 
-                          forecast: str, status: str, language: str, financial_data: Dict[str, Any], 
-                          industry: str) -> Dict[str, Any]:
+    def translate_analysis(self, analysis: Dict[str, Any], language: str) -> Dict[str, Any]:
         """
-        Translate existing AI analysis to a different language.
-        This is used when switching languages without re-analyzing the data.
+        Translate an existing analysis's narrative strings to another language
+        without re-analyzing the data. Each distinct string is resolved cheapest
+        first: already in the target language, the rule-based string catalog, the
+        translation cache, and only then one batched model call for the rest.
+        Strings that cannot be translated are kept as they are. Blocking.
         """
-        if self.client and os.getenv("OPENAI_API_KEY"):
-            return self._ai_translate(summary, risks, recommendations, forecast, status, language, financial_data, industry)
-        else:
-            return self._rule_based_translate(summary, risks, recommendations, forecast, status, language)
-    
-    def _ai_translate(self, summary: str, risks: List[Dict], recommendations: List[Dict], 
-                     forecast: str, status: str, language: str, financial_data: Dict[str, Any], 
-                     industry: str) -> Dict[str, Any]:
-        """Use AI to translate the analysis to the requested language."""
-        lang_name = "Hindi" if language == 'hi' else "English"
-        
-        prompt = f"""
-Translate the following financial analysis to {lang_name}. Maintain the same structure and meaning.
+        translated, slots, resolved, pending = self._translation_plan(analysis, language)
+        if pending:
+            cached = translation_cache.get_many(pending, language)
+            resolved.update(cached)
+            missing = [text for text in pending if text not in cached]
+            if missing and self._engine() != "rule-based":
+                try:
+                    fresh = self._ai_translate(missing, language)
+                    translation_cache.put_many(fresh, language)
+                    resolved.update(fresh)
+                except Exception as e:
+                    logger.warning("Translation Error: %s", e)
 
-Original Summary: {summary}
-Original Forecast: {forecast}
-Original Status: {status}
-Original Risks: {json.dumps(risks, indent=2)}
-Original Recommendations: {json.dumps(recommendations, indent=2)}
+        for container, key, text in slots:
+            container[key] = resolved.get(text, text)
+        return translated
 
-Financial Context:
-- Revenue: ${financial_data.get('total_revenue', 0):,.2f}
-- Profit: ${financial_data.get('net_profit', 0):,.2f}
-- Industry: {industry}
+    async def translate_analysis_async(self, analysis: Dict[str, Any], language: str) -> Dict[str, Any]:
+        """translate_analysis for the event loop: the model call goes through _chat_async, the cache through the IO pool."""
+        translated, slots, resolved, pending = self._translation_plan(analysis, language)
+        if pending:
+            try:
+                cached = await execution_layer.run_io(
+                    "translation cache", translation_cache.get_many, list(pending), language,
+                    timeout=settings.STAGE_TIMEOUT_DB_S
+                )
+            except StageTimeout as e:
+                logger.warning("Translation cache lookup timed out (%s)", e)
+                cached = {}
+            resolved.update(cached)
+            missing = [text for text in pending if text not in cached]
+            if missing and self._engine() != "rule-based":
+                try:
+                    content = await self._chat_async("translation", self._translation_messages(missing, language), temperature=0.3)
+                    fresh = self._parse_translations(missing, content)
+                    resolved.update(fresh)
+                    await execution_layer.run_io(
+                        "translation cache", translation_cache.put_many, fresh, language,
+                        timeout=settings.STAGE_TIMEOUT_DB_S
+                    )
+                except Exception as e:
+                    logger.warning("Translation Error: %s", e)
 
-Respond ONLY in JSON format:
-{{
-    "summary": "translated summary in {lang_name}",
-    "forecast": "translated forecast in {lang_name}",
-    "status": "translated status in {lang_name} (Healthy/At Risk/Critical or स्वस्थ/जोखिम में/गंभीर)",
-    "risks": [
-        {{"type": "translated type", "severity": "Low/Medium/High", "message": "translated message in {lang_name}"}}
-    ],
-    "recommendations": [
-        {{"action": "translated action in {lang_name}", "impact": "translated impact in {lang_name}", "category": "category"}}
-    ]
-}}
+        for container, key, text in slots:
+            container[key] = resolved.get(text, text)
+        return translated
 
-CRITICAL: All narrative text MUST be in {lang_name}.
-For status field:
-- If {lang_name} is Hindi: use "स्वस्थ" for Healthy, "जोखिम में" for At Risk, "गंभीर" for Critical
-- If {lang_name} is English: use "Healthy", "At Risk", "Critical"
-"""
-        
-        try:
+    def _translation_plan(self, analysis: Dict[str, Any], language: str):
+        """
+        A copy of the analysis, its (container, key, text) slots, the texts resolved
+        without a lookup (text -> translation) and the distinct texts still pending.
+        """
+        translated = copy.deepcopy(analysis)
+        slots = list(self._translation_slots(translated))
+        resolved, pending = {}, {}
+        for _, _, text in slots:
+            if text in resolved or text in pending:
+                continue
+            if self._is_language(text, language):
+                resolved[text] = text
+                continue
+            hit = translation_catalog.translate(text, language)
+            if hit is not None:
+                resolved[text] = hit
+            else:
+                pending[text] = None
+        return translated, slots, resolved, pending
+
+    @staticmethod
+    def _translation_slots(analysis: Dict[str, Any]):
+        """(container, key, text) for every narrative string of an analysis."""
+        for field, keys in TRANSLATABLE_FIELDS.items():
+            value = analysis.get(field)
+            if keys is None:
+                if isinstance(value, str) and value:
+                    yield analysis, field, value
+                continue
+            for entry in value if isinstance(value, list) else [value]:
+                if not isinstance(entry, dict):
+                    continue
+                for key in keys:
+                    if isinstance(entry.get(key), str) and entry[key]:
+                        yield entry, key, entry[key]
+
+    @staticmethod
+    def _is_language(text: str, language: str) -> bool:
+        """Script check: Hindi text has Devanagari, English text has none; text without letters never needs translating."""
+        if not any(ch.isalpha() for ch in text):
+            return True
+        has_devanagari = any('\u0900' <= ch <= '\u097f' for ch in text)
+        if language == 'hi':
+            return has_devanagari
+        if language == 'en':
+            return not has_devanagari
+        return False
+
+    def _ai_translate(self, texts: List[str], language: str) -> Dict[str, str]:
+        """Translate a batch of strings in one call; returns source -> translation."""
+        with self.breaker.guard(self._upstream_failure):
             response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": f"You are a professional translator specializing in financial content. Translate to {lang_name}."},
-                    {"role": "user", "content": prompt}
-                ],
+                model=AI_MODEL,
+                messages=self._translation_messages(texts, language),
                 temperature=0.3,
                 response_format={"type": "json_object"}
             )
-            
-            result = json.loads(response.choices[0].message.content)
-            return result
-        except Exception as e:
-            print(f"Translation Error: {str(e)}")
-            return self._rule_based_translate(summary, risks, recommendations, forecast, status, language)
-    
-    def _rule_based_translate(self, summary: str, risks: List[Dict], recommendations: List[Dict], 
-                             forecast: str, status: str, language: str) -> Dict[str, Any]:
-        """Fallback: Return simple translated versions."""
-        # Translate status
-        status_map = {
-            'hi': {
-                'Healthy': 'स्वस्थ',
-                'At Risk': 'जोखिम में',
-                'Critical': 'गंभीर',
-                'स्वस्थ': 'स्वस्थ',
-                'जोखिम में': 'जोखिम में',
-                'गंभीर': 'गंभीर'
-            },
-            'en': {
-                'Healthy': 'Healthy',
-                'At Risk': 'At Risk',
-                'Critical': 'Critical',
-                'स्वस्थ': 'Healthy',
-                'जोखिम में': 'At Risk',
-                'गंभीर': 'Critical'
-            }
-        }
-        
-        translated_status = status_map.get(language, {}).get(status, status)
-        
-        if language == 'hi':
-            return {
-                "summary": "वित्तीय विश्लेषण उपलब्ध है।" if "analysis available" in summary.lower() else summary,
-                "forecast": forecast or "स्थिर विकास की उम्मीद है।",
-                "status": translated_status,
-                "risks": risks or [{"type": "वित्तीय", "severity": "Medium", "message": "जोखिम विश्लेषण उपलब्ध है।"}],
-                "recommendations": recommendations or [{"action": "वित्तीय अनुकूलन", "impact": "सुधार", "category": "General"}]
-            }
-        else:
-            return {
-                "summary": summary if summary else "Financial analysis available.",
-                "forecast": forecast or "Steady growth expected.",
-                "status": translated_status,
-                "risks": risks or [{"type": "Financial", "severity": "Medium", "message": "Risk analysis available."}],
-                "recommendations": recommendations or [{"action": "Financial optimization", "impact": "Improvement", "category": "General"}]
-            }
+        return self._parse_translations(texts, response.choices[0].message.content)
+
+    @staticmethod
+    def _translation_messages(texts: List[str], language: str) -> List[Dict[str, str]]:
+        lang_name = LANGUAGE_NAMES.get(language, language)
+        prompt = f"""
+Translate each string in the following JSON array of financial analysis text to {lang_name}.
+Keep numbers, currency amounts, percentages and abbreviations (GST, TDS, AR, AP) unchanged.
+
+{json.dumps(texts, ensure_ascii=False, indent=2)}
+
+Respond ONLY in JSON format, with exactly one translated string per input string, in the same order:
+{{
+    "translations": ["translated string in {lang_name}"]
+}}
+"""
+        return [
+            {"role": "system", "content": f"You are a professional translator specializing in financial content. Translate to {lang_name}."},
+            {"role": "user", "content": prompt}
+        ]
 
+    @staticmethod
+    def _parse_translations(texts: List[str], content: str) -> Dict[str, str]:
+        translations = json.loads(content).get("translations")
+        if not isinstance(translations, list) or len(translations) != len(texts) \
+                or not all(isinstance(text, str) for text in translations):
+            raise ValueError("translation response does not match the request")
+        return dict(zip(texts, translations))
 
 
 ai_engine = AIEngine()
@@ -0,0 +1,264 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.executor import execution_layer, StageTimeout
+from app.core.security import encryption_service
+from app.models.database import AnalysisCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """
+    Cache of AIEngine.analyze_financials results keyed on the data the prompt is
+    built from, so an unchanged dashboard never pays for another model call.
+
+    Lookups go to an in-process LRU with a TTL, then to the analysis_cache table
+    (results encrypted, longer TTL, shared by all API processes). Concurrent
+    requests for the same key wait for the first one instead of each calling
+    the model. Results the engine marks as not cacheable (e.g. the rule-based
+    fallback after an API error) are returned but never stored.
+    """
+    COUNTERS = ("memory_hits", "db_hits", "misses", "coalesced", "not_cached", "db_errors")
+
+    def __init__(self, max_entries: int = None, ttl_s: float = None, db_ttl_s: float = None):
+        self.max_entries = settings.AI_CACHE_SIZE if max_entries is None else max_entries
+        self.ttl_s = settings.AI_CACHE_TTL_S if ttl_s is None else ttl_s
+        self.db_ttl_s = settings.AI_CACHE_DB_TTL_S if db_ttl_s is None else db_ttl_s
+        self._lru = OrderedDict()  # key -> (monotonic expiry, result)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(self.COUNTERS, 0)
+
+    @staticmethod
+    def key(inputs: Dict[str, Any], industry: str, language: str, engine: str) -> str:
+        """Canonical hash: numbers as floats, keys sorted, so equal data always maps to one key."""
+        def canonical(value):
+            if isinstance(value, dict):
+                return {str(k): canonical(v) for k, v in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [canonical(v) for v in value]
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return float(value)
+            return value
+        payload = json.dumps(
+            {"inputs": canonical(inputs), "industry": industry, "language": language, "engine": engine},
+            sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Tuple[Dict[str, Any], bool]]) -> Dict[str, Any]:
+        """
+        Return the cached result for key, or run compute() -> (result, cacheable)
+        once for all concurrent callers. Blocking; call it from the IO pool.
+        """
+        result = self._memory_get(key)
+        if result is not None:
+            self._count("memory_hits")
+            return copy.deepcopy(result)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            self._count("coalesced")
+            return copy.deepcopy(future.result())
+
+        try:
+            result = self._db_get(key)
+            if result is not None:
+                self._count("db_hits")
+                self._memory_put(key, result)
+            else:
+                self._count("misses")
+                result, cacheable = compute()
+                if cacheable:
+                    self._memory_put(key, result)
+                    self._db_put(key, result)
+                else:
+                    self._count("not_cached")
+            future.set_result(result)
+            return copy.deepcopy(result)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def get_or_compute_async(self, key: str,
+                                   compute: Callable[[], Awaitable[Tuple[Dict[str, Any], bool]]]) -> Dict[str, Any]:
+        """
+        get_or_compute for the event loop: compute is a coroutine function and the
+        database tier runs in the IO pool. Shares in-flight computations with
+        blocking callers.
+        """
+        result = self._memory_get(key)
+        if result is not None:
+            self._count("memory_hits")
+            return copy.deepcopy(result)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            self._count("coalesced")
+            # shield: a cancelled follower must not cancel the leader's future
+            return copy.deepcopy(await asyncio.shield(asyncio.wrap_future(future)))
+
+        try:
+            result = await self._run_db(self._db_get, key)
+            if result is not None:
+                self._count("db_hits")
+                self._memory_put(key, result)
+            else:
+                self._count("misses")
+                result, cacheable = await compute()
+                if cacheable:
+                    self._memory_put(key, result)
+                    await self._run_db(self._db_put, key, result)
+                else:
+                    self._count("not_cached")
+            future.set_result(result)
+            return copy.deepcopy(result)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def peek_async(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached result for key (memory, then database) without computing it; None on a miss."""
+        result = self._memory_get(key)
+        if result is not None:
+            self._count("memory_hits")
+            return copy.deepcopy(result)
+        result = await self._run_db(self._db_get, key)
+        if result is None:
+            self._count("misses")
+            return None
+        self._count("db_hits")
+        self._memory_put(key, result)
+        return copy.deepcopy(result)
+
+    async def put_async(self, key: str, result: Dict[str, Any]):
+        self._memory_put(key, result)
+        await self._run_db(self._db_put, key, result)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._lru)
+        lookups = counters["memory_hits"] + counters["db_hits"] + counters["misses"] + counters["coalesced"]
+        hits = lookups - counters["misses"]
+        return {
+            **counters,
+            "memory_entries": size,
+            "max_entries": self.max_entries,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None
+        }
+
+    def clear(self):
+        """Drop the in-process tier (the database tier expires on its own)."""
+        with self._lock:
+            self._lru.clear()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                return None
+            expires, result = entry
+            if expires <= time.monotonic():
+                del self._lru[key]
+                return None
+            self._lru.move_to_end(key)
+            return result
+
+    def _memory_put(self, key: str, result: Dict[str, Any]):
+        if self.max_entries <= 0 or self.ttl_s <= 0:
+            return
+        with self._lock:
+            self._lru[key] = (time.monotonic() + self.ttl_s, result)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    async def _run_db(self, fn: Callable, *args) -> Any:
+        try:
+            return await execution_layer.run_io("ai cache", fn, *args, timeout=settings.STAGE_TIMEOUT_DB_S)
+        except StageTimeout as e:
+            self._count("db_errors")
+            logger.warning("AI CACHE: %s", e)
+            return None
+
+    def _db_get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.db_ttl_s <= 0:
+            return None
+        now = datetime.utcnow()
+        try:
+            with SessionLocal() as db:
+                entry = db.query(AnalysisCacheEntry).filter(
+                    AnalysisCacheEntry.cache_key == key,
+                    AnalysisCacheEntry.expires_at > now
+                ).first()
+                if entry is None:
+                    return None
+                result = json.loads(encryption_service.decrypt(entry.encrypted_result))
+                entry.hit_count = (entry.hit_count or 0) + 1
+                entry.last_hit_at = now
+                db.commit()
+                return result
+        except Exception as e:
+            # The cache must never fail an analysis; fall through to the model
+            self._count("db_errors")
+            logger.warning("AI CACHE: lookup failed (%s)", e)
+            return None
+
+    def _db_put(self, key: str, result: Dict[str, Any]):
+        if self.db_ttl_s <= 0:
+            return
+        now = datetime.utcnow()
+        try:
+            with SessionLocal() as db:
+                db.query(AnalysisCacheEntry).filter(AnalysisCacheEntry.expires_at <= now).delete(synchronize_session=False)
+                entry = db.query(AnalysisCacheEntry).filter(AnalysisCacheEntry.cache_key == key).first()
+                if entry is None:
+                    entry = AnalysisCacheEntry(cache_key=key)
+                    db.add(entry)
+                entry.encrypted_result = encryption_service.encrypt(json.dumps(result))
+                entry.created_at = now
+                entry.expires_at = now + timedelta(seconds=self.db_ttl_s)
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # Another process stored the same key first
+                    db.rollback()
+        except Exception as e:
+            self._count("db_errors")
+            logger.warning("AI CACHE: store failed (%s)", e)
+
+
+analysis_cache = AnalysisCache()
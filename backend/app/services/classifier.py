@@ -0,0 +1,47 @@
+import re
+import numpy as np
+import pandas as pd
+
+from typing import Dict, List, Tuple
+
+
+class KeywordClassifier:
+    """
+    Substring keyword matching over a text column. Each bucket's keywords are
+    compiled into a single regex and only the column's unique values are
+    matched; the results are broadcast back to rows through factorized codes.
+    """
+    def __init__(self, buckets: Dict[str, List[str]]):
+        self.buckets = buckets
+        self.patterns = {
+            name: re.compile('|'.join(re.escape(k) for k in keywords))
+            for name, keywords in buckets.items()
+        }
+
+    def classify(self, values: pd.Series) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Return the per-row codes into the column's unique values, plus one boolean
+        array per bucket saying which unique values contain any of its keywords.
+        Values are compared as lower-cased str(), so missing values read as 'nan'.
+        """
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        return codes, self.match(uniques)
+
+    def match(self, uniques) -> Dict[str, np.ndarray]:
+        """Boolean hit array per bucket over already-unique values."""
+        lowered = [str(u).lower() for u in uniques]
+        return {
+            name: np.fromiter((pattern.search(u) is not None for u in lowered), dtype=bool, count=len(lowered))
+            for name, pattern in self.patterns.items()
+        }
+
+    def masks(self, values: pd.Series) -> Dict[str, np.ndarray]:
+        """Row-level boolean mask for every bucket."""
+        codes, hits = self.classify(values)
+        return {name: hit[codes] for name, hit in hits.items()}
+
+    def bucket_sums(self, values: pd.Series, weights: pd.Series) -> Dict[str, float]:
+        """Sum weights per bucket in one pass over the rows."""
+        codes, hits = self.classify(values)
+        per_unique = np.bincount(codes, weights=weights.to_numpy(dtype='float64'))
+        return {name: float(per_unique[hit].sum()) for name, hit in hits.items()}
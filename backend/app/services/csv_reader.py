@@ -0,0 +1,136 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from typing import Iterator, Optional, Union, BinaryIO
+
+from app.core.config import settings
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+    pacsv = None
+
+# pandas' default NA markers, so both engines agree on what is missing
+NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+             '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+TRUE_VALUES = ['True', 'TRUE', 'true']
+FALSE_VALUES = ['False', 'FALSE', 'false']
+
+logger = logging.getLogger(__name__)
+
+try:
+    ARROW_STRING = pd.StringDtype("pyarrow", na_value=np.nan)
+except TypeError:  # pandas < 2.3
+    ARROW_STRING = pd.StringDtype("pyarrow_numpy")
+
+
+class ArrowCSVUnsupported(ValueError):
+    """The file has a quirk the Arrow engine handles differently from pandas."""
+
+
+class CSVReader:
+    """
+    Read a CSV with the configured engine (CSV_ENGINE): "c" is pandas' parser,
+    "pyarrow" is Arrow's multithreaded reader, "auto" prefers pyarrow when installed.
+
+    The Arrow engine yields Arrow-backed string columns and NumPy numeric columns
+    (zero-copy when null-free), matching what the C engine produces. Date-like
+    columns are kept as text so DateParser resolves them the same way for both
+    engines. Anything Arrow rejects or would read differently (ragged rows, type
+    changes after the first block, duplicate or blank headers) falls back to the
+    C engine for the whole file.
+    """
+    def __init__(self, source: Union[str, BinaryIO], engine: Optional[str] = None):
+        self.source = source
+        self.engine = self._resolve_engine(engine or settings.CSV_ENGINE)
+
+    @staticmethod
+    def _resolve_engine(engine: str) -> str:
+        if engine == "auto":
+            return "pyarrow" if pacsv is not None else "c"
+        if engine == "pyarrow" and pacsv is None:
+            logger.warning("CSV_ENGINE=pyarrow but pyarrow is not installed; using the C parser")
+            return "c"
+        if engine not in ("c", "pyarrow"):
+            raise ValueError(f"Unknown CSV_ENGINE '{engine}'")
+        return engine
+
+    def read(self) -> pd.DataFrame:
+        if self.engine == "pyarrow":
+            try:
+                table = pacsv.read_csv(self.source, convert_options=self._convert_options())
+                # Release Arrow buffers column by column as they are converted
+                return self._to_pandas(table, split_blocks=True, self_destruct=True)
+            except (pa.ArrowException, ArrowCSVUnsupported) as e:
+                self.fallback(e)
+        return pd.read_csv(self.source)
+
+    def chunks(self, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Yield frames of chunk_size rows. Arrow's streaming reader fixes column
+        types on the first block, so a later block that does not convert raises
+        ArrowCSVUnsupported; the caller should call fallback() and start over.
+        """
+        if self.engine == "pyarrow":
+            try:
+                reader = pacsv.open_csv(self.source, convert_options=self._convert_options())
+            except (pa.ArrowException, ArrowCSVUnsupported) as e:
+                self.fallback(e)
+            else:
+                return self._arrow_chunks(reader, chunk_size)
+        return iter(pd.read_csv(self.source, chunksize=chunk_size))
+
+    def _arrow_chunks(self, reader, chunk_size: int) -> Iterator[pd.DataFrame]:
+        pending, rows = [], 0
+        try:
+            for batch in reader:
+                pending.append(batch)
+                rows += batch.num_rows
+                while rows >= chunk_size:
+                    table = pa.Table.from_batches(pending, reader.schema)
+                    yield self._to_pandas(table.slice(0, chunk_size))
+                    rest = table.slice(chunk_size)
+                    pending, rows = rest.to_batches(), rest.num_rows
+        except pa.ArrowException as e:
+            raise ArrowCSVUnsupported(str(e)) from e
+        if rows:
+            yield self._to_pandas(pa.Table.from_batches(pending, reader.schema))
+
+    def _convert_options(self):
+        """Probe the first block's schema and pin temporal columns to text."""
+        probe = pacsv.open_csv(self.source, convert_options=self._base_options())
+        schema = probe.schema
+        probe.close()
+        self._rewind()
+
+        names = schema.names
+        if len(set(names)) != len(names) or "" in names:
+            raise ArrowCSVUnsupported("duplicate or blank column names")
+        temporal = {field.name: pa.string() for field in schema if pa.types.is_temporal(field.type)}
+        return self._base_options(temporal)
+
+    @staticmethod
+    def _base_options(column_types: Optional[dict] = None):
+        return pacsv.ConvertOptions(column_types=column_types, null_values=NA_VALUES, strings_can_be_null=True,
+                                    true_values=TRUE_VALUES, false_values=FALSE_VALUES)
+
+    @staticmethod
+    def _to_pandas(table, **options) -> pd.DataFrame:
+        def types_mapper(arrow_type):
+            if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+                return ARROW_STRING
+            return None
+        return table.to_pandas(types_mapper=types_mapper, **options)
+
+    def fallback(self, error: Exception):
+        logger.info("CSV: pyarrow engine rejected the file (%s); falling back to the C parser", error)
+        self.engine = "c"
+        self._rewind()
+
+    def _rewind(self):
+        if hasattr(self.source, "seek"):
+            self.source.seek(0)
@@ -1,30 +1,536 @@
-
 import pandas as pd
+import numpy as np
 import io
+import os
+import hashlib
+import functools
+import logging
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Union, BinaryIO
 from datetime import datetime
 
+from app.core.config import settings
+from app.services.classifier import KeywordClassifier
+from app.services.date_parser import date_parser
+from app.services.csv_reader import CSVReader, ArrowCSVUnsupported
+from app.services.excel_reader import ExcelBatchReader, ALL_SHEETS
+from app.services.transaction_store import transaction_store, TransactionWriter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+NAT_ORDINAL = np.iinfo('int64').min
+# Generic profiling runs on this pool while the caller maps and aggregates the same frame
+_profile_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="profile")
+MB = 1024 * 1024
+# Bump when a change alters process_file output; it is part of the upload dedup key
+PROCESSING_VERSION = 1
+LEAN_CATEGORY_RATIO = 0.5
+
+# Copy-on-write is always on from pandas 3. On 2.x it is turned on once for the
+# process (here and in each CPU pool worker, which imports this module): an
+# option_context per upload would flip the global option under concurrent jobs.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """JSON-friendly rows; categoricals are widened first so fillna('') can't fail."""
+    categorical = [col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+    if categorical:
+        df = df.astype({col: object for col in categorical})
+    return df.fillna('').to_dict(orient='records')
+
+
+class _MemoryReport:
+    """
+    Per-stage memory footprint of one upload, logged at DEBUG once processing
+    finishes. Only collected with INGEST_MEMORY_REPORT and DEBUG enabled for
+    this module (measuring deep frame sizes is not free).
+    """
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.stages = []
+
+    def record(self, stage: str, df: Optional[pd.DataFrame] = None):
+        if not settings.INGEST_MEMORY_REPORT or not logger.isEnabledFor(logging.DEBUG):
+            return
+        frame_mb = df.memory_usage(deep=True).sum() / MB if df is not None else None
+        # ru_maxrss is KB on Linux; it is the process peak, not just this upload
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None
+        self.stages.append((stage, frame_mb, peak_mb))
+
+    def emit(self):
+        if not self.stages:
+            return
+        parts = []
+        for stage, frame_mb, peak_mb in self.stages:
+            part = stage
+            if frame_mb is not None:
+                part += f" frame={frame_mb:.1f}MB"
+            if peak_mb is not None:
+                part += f" peak_rss={peak_mb:.1f}MB"
+            parts.append(part)
+        logger.debug("MEMORY REPORT %s: %s", self.filename, " | ".join(parts))
+
+
+class _SummaryAccumulator:
+    """
+    Running state for the financial summary. Mapped transactions are fed in one
+    chunk at a time, so the full ledger never has to be in memory at once.
+    """
+    BUCKET_KEYWORDS = {
+        'accounts_receivable': ['receivable', 'debtor', 'due from'],
+        'accounts_payable': ['payable', 'creditor', 'due to'],
+        'inventory_value': ['inventory', 'stock', 'raw material'],
+        'total_debt': ['loan', 'liability', 'mortgage', 'debt'],
+    }
+    BUCKET_CLASSIFIER = KeywordClassifier(BUCKET_KEYWORDS)
+
+    def __init__(self, date_cache_key=None):
+        self.row_count = 0
+        self.columns = None
+        self.revenue = 0.0
+        self.expenses = 0.0
+        self.tax = 0.0
+        self.categories = {}
+        self.expense_categories = {}
+        self.income_categories = {}
+        self.buckets = {name: 0.0 for name in self.BUCKET_KEYWORDS}
+        self.months = {}
+        self.date_min = None
+        self.date_max = None
+        self.has_income = False
+        self.has_expense = False
+        self.sample = []
+        self.date_cache_key = date_cache_key
+        self.date_format = None
+        self.date_format_resolved = False
+
+    @staticmethod
+    def _merge(target: Dict, series: pd.Series):
+        for key, value in series.items():
+            target[key] = target.get(key, 0.0) + float(value)
+
+    def update(self, df: pd.DataFrame):
+        if self.columns is None:
+            self.columns = df.columns.tolist()
+        if df.empty:
+            return
+        self.row_count += len(df)
+
+        df['is_income'] = df['type'].str.lower() == 'income'
+        df['is_expense'] = df['type'].str.lower() == 'expense'
+        self.has_income = self.has_income or bool(df['is_income'].any())
+        self.has_expense = self.has_expense or bool(df['is_expense'].any())
+
+        month_ordinals = np.full(len(df), NAT_ORDINAL, dtype='int64')
+        try:
+            # Lock the date format on the first chunk so later chunks parse the same way
+            dates = df['date']
+            is_text = not (pd.api.types.is_datetime64_any_dtype(dates) or pd.api.types.is_numeric_dtype(dates))
+            if not self.date_format_resolved and is_text and dates.notna().any():
+                self.date_format = date_parser.resolve_format(dates, self.date_cache_key)
+                self.date_format_resolved = True
+            df['date'] = date_parser.parse(dates, self.date_format)
+            valid_dates = df['date'].dropna()
+            if not valid_dates.empty:
+                lo, hi = valid_dates.min(), valid_dates.max()
+                self.date_min = lo if self.date_min is None else min(self.date_min, lo)
+                self.date_max = hi if self.date_max is None else max(self.date_max, hi)
+                df['month'] = df['date'].dt.to_period('M')
+                month_ordinals = df['month'].array.asi8
+        except:
+            pass
+
+        # Single aggregation pass: every output below is derived from this compact frame
+        category_codes, category_values = pd.factorize(df['category'], use_na_sentinel=False)
+        amount = df['amount'].to_numpy()
+        grouped = pd.DataFrame({
+            'kind': np.where(df['is_income'], 1, np.where(df['is_expense'], -1, 0)),
+            'category': category_codes,
+            'month': month_ordinals,
+            'amount': amount,
+            'abs_amt': np.abs(amount),
+            'tax': df['tax'].to_numpy()
+        }).groupby(['kind', 'category', 'month'], sort=False).agg(
+            amount=('amount', 'sum'),
+            abs_amt=('abs_amt', 'sum'),
+            count=('amount', 'size'),
+            tax=('tax', 'sum')
+        ).reset_index()
+
+        income = grouped[grouped['kind'] == 1]
+        expense = grouped[grouped['kind'] == -1]
+        self.revenue += float(income['amount'].sum())
+        self.expenses += float(expense['amount'].sum())
+        self.tax += float(grouped['tax'].sum())
+
+        missing = pd.isna(category_values)
+        def by_category(frame: pd.DataFrame, column: str) -> pd.Series:
+            sums = frame.groupby('category')[column].sum()
+            keep = ~missing[sums.index.to_numpy()]
+            return pd.Series(sums.to_numpy()[keep], index=category_values[sums.index.to_numpy()[keep]])
+
+        self._merge(self.categories, by_category(grouped, 'abs_amt'))
+        self._merge(self.expense_categories, by_category(expense, 'abs_amt'))
+        self._merge(self.income_categories, by_category(income, 'amount'))
+
+        per_category = np.bincount(grouped['category'], weights=grouped['amount'].to_numpy(dtype='float64'), minlength=len(category_values))
+        for name, hit in self.BUCKET_CLASSIFIER.match(category_values).items():
+            self.buckets[name] += float(per_category[hit].sum())
+
+        dated = grouped[grouped['month'] != NAT_ORDINAL]
+        if not dated.empty:
+            monthly = dated.groupby('month')[['amount', 'count']].sum()
+            for ordinal, total, count in zip(monthly.index, monthly['amount'].tolist(), monthly['count'].tolist()):
+                month = pd.Period(ordinal=ordinal, freq='M')
+                prev_total, prev_count = self.months.get(month, (0, 0))
+                self.months[month] = (prev_total + total, prev_count + count)
+
+        if len(self.sample) < 10:
+            sample_df = df.head(10 - len(self.sample)).copy()
+            for col in sample_df.columns:
+                if pd.api.types.is_datetime64_any_dtype(sample_df[col]):
+                    sample_df[col] = sample_df[col].dt.strftime('%Y-%m-%d %H:%M:%S')
+                elif isinstance(sample_df[col].dtype, pd.PeriodDtype):
+                    sample_df[col] = sample_df[col].astype(str)
+            self.sample.extend(_records(sample_df))
+
+    def add_rollups(self, rollups: pd.DataFrame, date_min=None, date_max=None):
+        """
+        Fold in pre-aggregated (month, category) rollups instead of transactions,
+        e.g. the company ledger's. month is 'YYYY-MM' or '' for undated rows;
+        category is None for uncategorized rows.
+        """
+        if rollups.empty:
+            return
+        self.row_count += int(rollups['txn_count'].sum())
+        self.revenue += float(rollups['income_amount'].sum())
+        self.expenses += float(rollups['expense_amount'].sum())
+        self.tax += float(rollups['tax'].sum())
+        self.has_income = self.has_income or bool(rollups['income_count'].gt(0).any())
+        self.has_expense = self.has_expense or bool(rollups['expense_count'].gt(0).any())
+
+        per_category = rollups.groupby('category', sort=False)[
+            ['amount', 'abs_amount', 'income_amount', 'income_count', 'expense_abs_amount', 'expense_count']
+        ].sum()
+        self._merge(self.categories, per_category['abs_amount'])
+        self._merge(self.expense_categories, per_category.loc[per_category['expense_count'] > 0, 'expense_abs_amount'])
+        self._merge(self.income_categories, per_category.loc[per_category['income_count'] > 0, 'income_amount'])
+        for name, hit in self.BUCKET_CLASSIFIER.match(per_category.index).items():
+            self.buckets[name] += float(per_category['amount'].to_numpy()[hit].sum())
+
+        dated = rollups[rollups['month'] != '']
+        for month, (total, count) in dated.groupby('month')[['amount', 'txn_count']].sum().iterrows():
+            key = pd.Period(month, freq='M')
+            prev_total, prev_count = self.months.get(key, (0, 0))
+            self.months[key] = (prev_total + float(total), prev_count + int(count))
+        if date_min is not None:
+            self.date_min = date_min if self.date_min is None else min(self.date_min, date_min)
+            self.date_max = date_max if self.date_max is None else max(self.date_max, date_max)
+
+    def validation_error(self) -> Optional[str]:
+        if self.row_count == 0:
+            return "Error: No valid financial data found."
+        if not self.has_income or not self.has_expense:
+            return "Error: File must contain both Income and Expense transactions."
+        return None
+
+    @staticmethod
+    def _ordered(values: Dict) -> pd.Series:
+        series = pd.Series(values, dtype='float64')
+        try:
+            return series.sort_index()
+        except TypeError:
+            return series
+
+    def summary(self) -> Dict[str, Any]:
+        summary = {
+            "total_revenue": self.revenue,
+            "total_expenses": abs(self.expenses),
+            "net_profit": 0.0,
+            "row_count": self.row_count,
+            "columns": self.columns or [],
+            "date_range": None,
+            "categories": {str(k): float(v) for k, v in self._ordered(self.categories).items()},
+            "monthly_breakdown": [],
+            "top_expenses": [
+                {"category": str(cat), "amount": float(amt)}
+                for cat, amt in self._ordered(self.expense_categories).nlargest(5).items()
+            ],
+            "top_revenue_sources": [
+                {"category": str(cat), "amount": float(amt)}
+                for cat, amt in self._ordered(self.income_categories).nlargest(5).items()
+            ]
+        }
+        summary['net_profit'] = summary['total_revenue'] - summary['total_expenses']
+
+        for name, total in self.buckets.items():
+            summary[name] = float(total)
+        summary['tax_metadata'] = {"estimated_tax_payable": float(self.tax)}
+
+        if self.date_min is not None:
+            summary['date_range'] = {
+                "start": self.date_min.strftime('%Y-%m-%d'),
+                "end": self.date_max.strftime('%Y-%m-%d')
+            }
+            summary['monthly_breakdown'] = [
+                {"month": str(month), "sum": total, "count": count}
+                for month, (total, count) in sorted(self.months.items())
+            ]
+
+        summary['sample_transactions'] = self.sample
+
+        if summary['total_revenue'] > 0:
+            summary['profit_margin'] = (summary['net_profit'] / summary['total_revenue']) * 100
+            summary['expense_ratio'] = (summary['total_expenses'] / summary['total_revenue']) * 100
+        else:
+            summary['profit_margin'] = 0
+            summary['expense_ratio'] = 0
+
+        return summary
+
+
+class _GenericProfileAccumulator:
+    """
+    Streaming counterpart of DataProcessor._analyze_generic_dataset.
+    Column types are decided on the first chunk. Stats are running min/max/sum/count
+    and correlations come from a bounded bottom-k reservoir sample of the rows.
+    """
+    def __init__(self):
+        self.column_info = None
+        self.numeric_cols = []
+        self.corr_cols = []
+        self.sample_data = []
+        self.lo = self.hi = self.total = self.count = None
+        self.reservoir = None
+        self.reservoir_keys = None
+        self.rows_seen = 0
+        self.rng = np.random.default_rng(0)
+
+    def update(self, df: pd.DataFrame):
+        if self.column_info is None:
+            self.column_info = DataProcessor._column_info(df)
+            self.numeric_cols = self.column_info['numeric_columns']
+            self.corr_cols = DataProcessor._correlation_columns(df, self.numeric_cols)
+            k = len(self.numeric_cols)
+            self.lo, self.hi = np.full(k, np.nan), np.full(k, np.nan)
+            self.total, self.count = np.zeros(k), np.zeros(k, dtype='int64')
+
+        preview_rows = settings.PROFILE_PREVIEW_ROWS
+        if len(self.sample_data) < preview_rows:
+            self.sample_data.extend(_records(df.head(preview_rows - len(self.sample_data))))
+
+        self.rows_seen += len(df)
+        if not self.numeric_cols or df.empty:
+            return
+
+        values = df[self.numeric_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64')
+        with np.errstate(all='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self.lo = np.fmin(self.lo, np.nanmin(values, axis=0))
+            self.hi = np.fmax(self.hi, np.nanmax(values, axis=0))
+        self.total += np.nansum(values, axis=0)
+        self.count += (~np.isnan(values)).sum(axis=0)
+
+        if len(self.corr_cols) > 1:
+            positions = [self.numeric_cols.index(col) for col in self.corr_cols]
+            rows = values[:, positions]
+            keys = self.rng.random(len(rows))
+            if self.reservoir is not None:
+                rows = np.vstack([self.reservoir, rows])
+                keys = np.concatenate([self.reservoir_keys, keys])
+            cap = settings.PROFILE_SAMPLE_ROWS
+            if len(keys) > cap:
+                keep = np.argpartition(keys, cap)[:cap]
+                rows, keys = rows[keep], keys[keep]
+            self.reservoir, self.reservoir_keys = rows, keys
+
+    def result(self) -> Dict[str, Any]:
+        stats = {}
+        for i, col in enumerate(self.numeric_cols):
+            stats[col] = {
+                "min": float(self.lo[i]),
+                "max": float(self.hi[i]),
+                "mean": float(self.total[i] / self.count[i]) if self.count[i] else float('nan')
+            }
+
+        correlation = []
+        sampled = 0
+        if len(self.corr_cols) > 1:
+            reservoir = self.reservoir if self.reservoir is not None else np.empty((0, len(self.corr_cols)))
+            sampled = len(reservoir)
+            correlation = DataProcessor._correlation_records(pd.DataFrame(reservoir, columns=self.corr_cols))
+
+        return {
+            "column_info": self.column_info,
+            "stats": stats,
+            "sample_data": self.sample_data,
+            "correlation": correlation,
+            "profiling": {
+                "rows_profiled": self.rows_seen,
+                "correlation_sample_rows": sampled,
+                "correlation_columns": self.corr_cols
+            }
+        }
+
+
+def _match_columns(columns: tuple) -> Dict[str, str]:
+    mapped_columns = {}
+    for target, keywords in DataProcessor.MAPPING_RULES.items():
+        found = None
+        for kw in keywords:
+            if kw in columns:
+                found = kw
+                break
+        if not found:
+            for col in columns:
+                if any(kw in col for kw in keywords):
+                    found = col
+                    break
+        if found:
+            mapped_columns[target] = found
+    return mapped_columns
+
+
+_column_mapping_cache = None
+_column_mapping_lock = threading.Lock()
+
+
+def detect_column_mapping(columns: tuple) -> Dict[str, str]:
+    """
+    Target -> source columns detected for a normalized header (callers copy the
+    result). Memoized per header in an LRU of COLUMN_MAPPING_CACHE_SIZE entries,
+    sized from settings on first use.
+    """
+    global _column_mapping_cache
+    if _column_mapping_cache is None:
+        with _column_mapping_lock:
+            if _column_mapping_cache is None:
+                _column_mapping_cache = functools.lru_cache(maxsize=settings.COLUMN_MAPPING_CACHE_SIZE)(_match_columns)
+    return _column_mapping_cache(columns)
+
+
 class DataProcessor:
     @staticmethod
-    def process_file(file_content: bytes, filename: str) -> Dict[str, Any]:
+    def process_file(file_content: Union[bytes, str, BinaryIO], filename: str, chunk_size: Optional[int] = None,
+                     known_mappings: Optional[Dict[str, Dict[str, str]]] = None,
+                     sheet_name: Optional[str] = None, transactions_path: Optional[str] = None) -> Dict[str, Any]:
         """
         Process the uploaded financial file (CSV/XLSX/PDF) and extract key metrics.
+        file_content may be raw bytes, a path on disk or a binary file object.
+
+        CSV files larger than INGEST_STREAMING_THRESHOLD_MB (or any CSV when
+        chunk_size is given) are read in chunks of chunk_size rows and
+        aggregated incrementally, which keeps peak memory bounded.
+        With INGEST_LEAN_MODE the in-memory path uses categorical text columns
+        and downcast integers (copy-on-write is on for the whole process).
+        known_mappings maps header signatures to previously confirmed column
+        mappings; a matching layout skips column detection.
+        .xlsx workbooks are always streamed in read-only mode; sheet_name picks a
+        sheet (default: the first) or ALL_SHEETS to consolidate matching sheets.
+        With transactions_path the normalized transactions are also written there
+        (see TransactionStore) and the result links them under 'transactions'.
         """
+        transactions = transaction_store.writer(transactions_path) if transactions_path else None
+        result = DataProcessor._process_file(file_content, filename, chunk_size, known_mappings, sheet_name, transactions)
+        if transactions is not None:
+            if "error" in result:
+                transactions.abort()
+            else:
+                try:
+                    result['transactions'] = transactions.close()
+                except Exception as e:
+                    logger.exception("Transaction store error: %s", e)
+                    transactions.abort()
+        return result
+
+    @staticmethod
+    def summarize_rollups(rollups: pd.DataFrame, date_min=None, date_max=None) -> Dict[str, Any]:
+        """
+        The financial summary (totals, categories, monthly breakdown, margins) of
+        pre-aggregated (month, category) rollups, e.g. a company's whole ledger,
+        computed exactly as process_file would over the underlying transactions.
+        """
+        accumulator = _SummaryAccumulator()
+        accumulator.add_rollups(rollups, date_min, date_max)
+        return accumulator.summary()
+
+    @staticmethod
+    def _process_file(file_content: Union[bytes, str, BinaryIO], filename: str, chunk_size: Optional[int],
+                      known_mappings: Optional[Dict[str, Dict[str, str]]], sheet_name: Optional[str],
+                      transactions: Optional[TransactionWriter]) -> Dict[str, Any]:
+        report = _MemoryReport(filename)
         try:
+            if isinstance(file_content, bytes):
+                source = io.BytesIO(file_content)
+                size = len(file_content)
+            elif isinstance(file_content, str):
+                source = file_content
+                size = os.path.getsize(file_content)
+            else:
+                source = file_content
+                size = None
+
             if filename.endswith('.csv'):
-                df = pd.read_csv(io.BytesIO(file_content))
-            elif filename.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(io.BytesIO(file_content))
+                if chunk_size is None and size is not None and size > settings.INGEST_STREAMING_THRESHOLD_MB * 1024 * 1024:
+                    chunk_size = settings.INGEST_CHUNK_ROWS
+                reader = CSVReader(source)
+                if chunk_size:
+                    try:
+                        result = DataProcessor._process_stream(reader.chunks(chunk_size), known_mappings, transactions)
+                    except ArrowCSVUnsupported as e:
+                        reader.fallback(e)
+                        if transactions is not None:
+                            transactions.abort()
+                        result = DataProcessor._process_stream(reader.chunks(chunk_size), known_mappings, transactions)
+                    report.record(f"streamed chunk_size={chunk_size} engine={reader.engine}")
+                    return result
+                df = reader.read()
+            elif filename.endswith('.xlsx'):
+                reader = ExcelBatchReader(source, sheet_name, chunk_size or settings.INGEST_CHUNK_ROWS)
+                result = DataProcessor._process_stream(iter(reader), known_mappings, transactions)
+                if "error" not in result:
+                    result['excel_sheets'] = {"read": reader.sheets_read, "skipped": reader.sheets_skipped}
+                report.record(f"streamed xlsx batch_rows={reader.batch_rows}")
+                return result
+            elif filename.endswith('.xls'):
+                # Legacy .xls has no streaming reader; load it whole
+                sheets = pd.read_excel(source, sheet_name=None if sheet_name == ALL_SHEETS else (sheet_name or 0))
+                if isinstance(sheets, dict):
+                    frames = list(sheets.values())
+                    frames = [frame for frame in frames if frame.columns.equals(frames[0].columns)]
+                    df = pd.concat(frames, ignore_index=True)
+                else:
+                    df = sheets
             else:
                 raise ValueError("Unsupported file format. Please upload CSV or XLSX")
 
+            report.record("read", df)
+
             # Detect if it's financial or generic
             # For now, let's provide BOTH financial analysis AND generic metadata
             # if the file looks like it has finance columns
-            
-            financial_summary = DataProcessor._analyze_dataframe(df.copy(), filename)
-            generic_metadata = DataProcessor._analyze_generic_dataset(df)
+            if settings.INGEST_LEAN_MODE:
+                df = DataProcessor._make_lean(df)
+                report.record("lean", df)
+
+            if settings.PROFILE_CONCURRENT:
+                profiling = _profile_executor.submit(DataProcessor._analyze_generic_dataset, df)
+                financial_summary = DataProcessor._analyze_dataframe(df, filename, report, known_mappings, transactions)
+                generic_metadata = profiling.result()
+            else:
+                financial_summary = DataProcessor._analyze_dataframe(df, filename, report, known_mappings, transactions)
+                generic_metadata = DataProcessor._analyze_generic_dataset(df)
+            report.record("profiled")
             
             # Merge or return both
             financial_summary['generic_metadata'] = generic_metadata
@@ -32,170 +538,193 @@ class DataProcessor:
 
         except Exception as e:
             return {"error": str(e)}
-    
+        finally:
+            report.emit()
+
+    @staticmethod
+    def _make_lean(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Shrink the raw frame: low-cardinality text columns become categoricals and
+        integer columns are downcast. Floats are left alone since they get summed.
+        """
+        lean = {}
+        for col in df.columns:
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                continue
+            if pd.api.types.is_integer_dtype(series):
+                lean[col] = pd.to_numeric(series, downcast='integer')
+            elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+                if series.nunique(dropna=False) <= len(series) * LEAN_CATEGORY_RATIO:
+                    lean[col] = series.astype('category')
+        for col, values in lean.items():
+            df[col] = values
+        return df
+
+    @staticmethod
+    def _process_stream(chunks, known_mappings: Optional[Dict[str, Dict[str, str]]] = None,
+                        transactions: Optional[TransactionWriter] = None) -> Dict[str, Any]:
+        """
+        Streaming counterpart of the in-memory path. The column mapping is resolved
+        on the first chunk and reused for the rest of the file.
+        """
+        accumulator = _SummaryAccumulator()
+        profile = _GenericProfileAccumulator()
+        normalized_cols = None
+        mapping = None
+
+        for chunk in chunks:
+            profile.update(chunk)
+            if mapping is None:
+                normalized_cols = DataProcessor._normalize_columns(chunk.columns)
+                mapping = DataProcessor._resolve_column_mapping(normalized_cols, known_mappings)
+                mapped_columns = mapping['mapped_columns']
+                if 'amount' not in mapped_columns:
+                    return {"error": "Error: 'Amount' column not detected. Please ensure your file has an amount field."}
+                accumulator.date_cache_key = DataProcessor._date_cache_key(mapping)
+            chunk.columns = normalized_cols
+            try:
+                mapped = DataProcessor._apply_column_mapping(chunk, mapped_columns)
+            except Exception as e:
+                return {"error": f"Mapping Error: {str(e)}"}
+            accumulator.update(mapped)
+            if transactions is not None:
+                transactions.write(mapped)
 
+        error = accumulator.validation_error()
+        if error:
+            return {"error": error}
+
+        summary = accumulator.summary()
+        summary['column_mapping'] = mapping
+        summary['generic_metadata'] = profile.result()
+        return summary
     
     @staticmethod
-    def _analyze_dataframe(df: pd.DataFrame, filename: str) -> Dict[str, Any]:
+    def _analyze_dataframe(df: pd.DataFrame, filename: str, report: Optional[_MemoryReport] = None,
+                           known_mappings: Optional[Dict[str, Dict[str, str]]] = None,
+                           transactions: Optional[TransactionWriter] = None) -> Dict[str, Any]:
         """
         Intelligently analyze dataframe using the Smart Column Mapper pipeline.
         """
         # Step 1-5: Smart Mapping & Cleaning
-        df, mapping_error = DataProcessor._smart_map_dataframe(df)
+        df, mapping_error = DataProcessor._smart_map_dataframe(df, known_mappings)
         if mapping_error:
             return {"error": mapping_error}
-
-        summary = {
-            "total_revenue": 0.0,
-            "total_expenses": 0.0,
-            "net_profit": 0.0,
-            "row_count": len(df),
-            "columns": df.columns.tolist(),
-            "date_range": None,
-            "categories": {},
-            "monthly_breakdown": [],
-            "top_expenses": [],
-            "top_revenue_sources": []
-        }
+        if report:
+            report.record("mapped", df)
 
         # Step 6: Perform Calculations on Standardized Data
-        df['is_income'] = df['type'].str.lower() == 'income'
-        df['is_expense'] = df['type'].str.lower() == 'expense'
-
-        summary['total_revenue'] = float(df[df['is_income']]['amount'].sum())
-        summary['total_expenses'] = abs(float(df[df['is_expense']]['amount'].sum()))
-        summary['net_profit'] = summary['total_revenue'] - summary['total_expenses']
+        accumulator = _SummaryAccumulator(DataProcessor._date_cache_key(df.attrs.get('column_mapping')))
+        accumulator.update(df)
+        if transactions is not None:
+            transactions.write(df)
+        summary = accumulator.summary()
+        summary['column_mapping'] = df.attrs.get('column_mapping')
+        return summary
 
-        # Calculate sum of absolute amounts per category
-        category_summary = df.assign(abs_amt=df['amount'].abs()).groupby('category')['abs_amt'].sum().to_dict()
-        summary['categories'] = {str(k): float(v) for k, v in category_summary.items()}
+    @staticmethod
+    def _date_cache_key(mapping: Optional[Dict[str, Any]]):
+        if not mapping or 'date' not in mapping['mapped_columns']:
+            return None
+        return (mapping['header_signature'], mapping['mapped_columns']['date'])
 
-        expense_df = df[df['is_expense']].copy()
-        if not expense_df.empty:
-            top_exp = expense_df.assign(abs_amt=expense_df['amount'].abs()).groupby('category')['abs_amt'].sum().nlargest(5)
-            summary['top_expenses'] = [
-                {"category": str(cat), "amount": float(amt)} 
-                for cat, amt in top_exp.items()
-            ]
+    MAPPING_RULES = {
+        'amount': ["amount","total","value","price","amt","sum","debit","credit"],
+        'date': ["date","txn_date","invoice_date","posting_date","transaction_date","datetime"],
+        'type': ["type","dr_cr","credit_debit","income_expense","transaction_type"],
+        'category': ["category","head","purpose","expense_type","expense_category"],
+        'customer': ["customer","client","buyer","party","vendor","particulars","description"],
+        'tax': ["gst","tax","vat","igst","cgst","sgst"]
+    }
+    TYPE_CLASSIFIER = KeywordClassifier({
+        'income': ['income', 'revenue', 'credit', 'receipt', 'sale', 'sales']
+    })
 
-        income_df = df[df['is_income']].copy()
-        if not income_df.empty:
-            top_rev = income_df.groupby('category')['amount'].sum().nlargest(5)
-            summary['top_revenue_sources'] = [
-                {"category": str(cat), "amount": float(amt)} 
-                for cat, amt in top_rev.items()
-            ]
+    @staticmethod
+    def _normalize_columns(columns) -> List[str]:
+        normalized_cols = []
+        for col in columns:
+            c = str(col).lower().strip()
+            c = c.replace(' ', '_').replace('$', '').replace('₹', '').replace('%', '').replace('(', '').replace(')', '')
+            normalized_cols.append(c)
+        return normalized_cols
 
-        def get_sum_by_keywords(keywords):
-            mask = df['category'].astype(str).str.lower().apply(
-                lambda x: any(k in x for k in keywords)
-            )
-            return df[mask]['amount'].sum()
+    @staticmethod
+    def header_signature(normalized_cols: List[str]) -> str:
+        """Stable hash of a normalized header, used to recognise repeat layouts."""
+        return hashlib.sha256('\x1f'.join(normalized_cols).encode()).hexdigest()
 
-        summary['accounts_receivable'] = float(get_sum_by_keywords(['receivable', 'debtor', 'due from']))
-        summary['accounts_payable'] = float(get_sum_by_keywords(['payable', 'creditor', 'due to']))
-        summary['inventory_value'] = float(get_sum_by_keywords(['inventory', 'stock', 'raw material']))
-        summary['total_debt'] = float(get_sum_by_keywords(['loan', 'liability', 'mortgage', 'debt']))
-        summary['tax_metadata'] = {"estimated_tax_payable": float(df['tax'].sum())}
+    @staticmethod
+    def _resolve_column_mapping(columns: List[str], known_mappings: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, Any]:
+        """
+        Resolve target -> source columns for a normalized header. A mapping already
+        confirmed for this header signature wins over fresh detection.
+        """
+        signature = DataProcessor.header_signature(columns)
+        confirmed = (known_mappings or {}).get(signature)
+        if confirmed and all(col in columns for col in confirmed.values()):
+            return {"header_signature": signature, "mapped_columns": dict(confirmed), "cached": True}
+        return {
+            "header_signature": signature,
+            "mapped_columns": dict(detect_column_mapping(tuple(columns))),
+            "cached": False
+        }
 
-        try:
-            df['date'] = pd.to_datetime(df['date'], errors='coerce')
-            valid_dates = df['date'].dropna()
-            if not valid_dates.empty:
-                summary['date_range'] = {
-                    "start": valid_dates.min().strftime('%Y-%m-%d'),
-                    "end": valid_dates.max().strftime('%Y-%m-%d')
-                }
-                df['month'] = df['date'].dt.to_period('M')
-                monthly = df.groupby('month')['amount'].agg(['sum', 'count']).reset_index()
-                monthly['month'] = monthly['month'].astype(str)
-                summary['monthly_breakdown'] = monthly.to_dict('records')
-        except:
-            pass
+    @staticmethod
+    def _apply_column_mapping(df: pd.DataFrame, mapped_columns: Dict[str, str]) -> pd.DataFrame:
+        """
+        Clean the amount column, standardise the transaction type and select the
+        canonical columns. Expects df to already carry normalized column names.
+        """
+        amt_col = mapped_columns['amount']
+        amount = df[amt_col]
+        if not pd.api.types.is_numeric_dtype(amount) or pd.api.types.is_bool_dtype(amount):
+            amount = pd.to_numeric(amount.astype(str).str.replace(r'[$,₹]', '', regex=True), errors='coerce')
 
-        sample_df = df.head(10).copy()
-        for col in sample_df.columns:
-            if pd.api.types.is_datetime64_any_dtype(sample_df[col]):
-                sample_df[col] = sample_df[col].dt.strftime('%Y-%m-%d %H:%M:%S')
-            elif isinstance(sample_df[col].dtype, pd.PeriodDtype):
-                sample_df[col] = sample_df[col].astype(str)
-        summary['sample_transactions'] = sample_df.fillna('').to_dict(orient='records')
-        
-        if summary['total_revenue'] > 0:
-            summary['profit_margin'] = (summary['net_profit'] / summary['total_revenue']) * 100
-            summary['expense_ratio'] = (summary['total_expenses'] / summary['total_revenue']) * 100
+        if 'type' in mapped_columns:
+            is_income = DataProcessor.TYPE_CLASSIFIER.masks(df[mapped_columns['type']])['income']
         else:
-            summary['profit_margin'] = 0
-            summary['expense_ratio'] = 0
-        
-        return summary
+            is_income = (amount > 0).to_numpy()
+        if settings.INGEST_LEAN_MODE:
+            standard_type = pd.Categorical.from_codes(is_income.astype('int8'), categories=['expense', 'income'])
+        else:
+            standard_type = np.where(is_income, 'income', 'expense')
+
+        # Built in one go from column references; only the final row filter copies
+        final_df = pd.DataFrame({
+            'amount': amount,
+            'type': standard_type,
+            'date': df[mapped_columns['date']] if 'date' in mapped_columns else datetime.now().strftime('%Y-%m-%d'),
+            'category': df[mapped_columns['category']] if 'category' in mapped_columns else 'General',
+            'customer': df[mapped_columns['customer']] if 'customer' in mapped_columns else 'Unknown',
+            'tax': pd.to_numeric(df[mapped_columns['tax']], errors='coerce').fillna(0) if 'tax' in mapped_columns else 0.0
+        }, index=df.index)
+        valid = amount.notna()
+        if not valid.all():
+            final_df = final_df[valid]
+        return final_df
 
     @staticmethod
-    def _smart_map_dataframe(df: pd.DataFrame) -> (pd.DataFrame, str):
+    def _smart_map_dataframe(df: pd.DataFrame, known_mappings: Optional[Dict[str, Dict[str, str]]] = None) -> (pd.DataFrame, str):
         """
         Implementation of the Smart Column Mapper Pipeline.
         """
         try:
-            # STEP 1: NORMALIZATION
-            original_columns = df.columns.tolist()
-            normalized_cols = []
-            for col in original_columns:
-                c = str(col).lower().strip()
-                c = c.replace(' ', '_').replace('$', '').replace('₹', '').replace('%', '').replace('(', '').replace(')', '')
-                normalized_cols.append(c)
-            df.columns = normalized_cols
+            # STEP 1: NORMALIZATION (set_axis leaves the caller's frame untouched)
+            df = df.set_axis(DataProcessor._normalize_columns(df.columns), axis=1)
 
             # STEP 2: COLUMN MAPPING LOGIC
-            mapping_rules = {
-                'amount': ["amount","total","value","price","amt","sum","debit","credit"],
-                'date': ["date","txn_date","invoice_date","posting_date","transaction_date","datetime"],
-                'type': ["type","dr_cr","credit_debit","income_expense","transaction_type"],
-                'category': ["category","head","purpose","expense_type","expense_category"],
-                'customer': ["customer","client","buyer","party","vendor","particulars","description"],
-                'tax': ["gst","tax","vat","igst","cgst","sgst"]
-            }
-
-            mapped_columns = {}
-            for target, keywords in mapping_rules.items():
-                found = None
-                for kw in keywords:
-                    if kw in df.columns:
-                        found = kw
-                        break
-                if not found:
-                    for col in df.columns:
-                        if any(kw in col for kw in keywords):
-                            found = col
-                            break
-                if found:
-                    mapped_columns[target] = found
+            mapping = DataProcessor._resolve_column_mapping(df.columns.tolist(), known_mappings)
+            mapped_columns = mapping['mapped_columns']
 
             # STEP 3: CLEANING
             if 'amount' not in mapped_columns:
                 return None, "Error: 'Amount' column not detected. Please ensure your file has an amount field."
 
-            amt_col = mapped_columns['amount']
-            df[amt_col] = df[amt_col].astype(str).str.replace(r'[$,₹]', '', regex=True)
-            df[amt_col] = pd.to_numeric(df[amt_col], errors='coerce')
-            df = df.dropna(subset=[amt_col])
-            
-            if 'type' in mapped_columns:
-                type_col = mapped_columns['type']
-                income_keywords = ['income', 'revenue', 'credit', 'receipt', 'sale', 'sales']
-                df['standard_type'] = df[type_col].astype(str).str.lower().apply(
-                    lambda x: 'income' if any(k in x for k in income_keywords) else 'expense'
-                )
-            else:
-                df['standard_type'] = df[amt_col].apply(lambda x: 'income' if x > 0 else 'expense')
-
             # STEP 4: SELECTION
-            final_df = pd.DataFrame()
-            final_df['amount'] = df[amt_col]
-            final_df['type'] = df['standard_type']
-            final_df['date'] = df[mapped_columns['date']] if 'date' in mapped_columns else datetime.now().strftime('%Y-%m-%d')
-            final_df['category'] = df[mapped_columns['category']] if 'category' in mapped_columns else 'General'
-            final_df['customer'] = df[mapped_columns['customer']] if 'customer' in mapped_columns else 'Unknown'
-            final_df['tax'] = pd.to_numeric(df[mapped_columns['tax']], errors='coerce').fillna(0) if 'tax' in mapped_columns else 0.0
+            final_df = DataProcessor._apply_column_mapping(df, mapped_columns)
+            final_df.attrs['column_mapping'] = mapping
 
             # STEP 5: VALIDATION
             if final_df.empty:
@@ -208,13 +737,11 @@ class DataProcessor:
             return None, f"Mapping Error: {str(e)}"
 
     @staticmethod
-    def _analyze_generic_dataset(df: pd.DataFrame) -> Dict[str, Any]:
-        """
-        Extract generic metadata from any dataframe for Visualytics dashboard.
-        """
+    def _column_info(df: pd.DataFrame) -> Dict[str, Any]:
+        """Classify columns as numeric, text or date."""
         cols = df.columns.tolist()
         numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-        text_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
+        text_cols = df.select_dtypes(include=['object', 'string', 'category']).columns.tolist()
         date_cols = df.select_dtypes(include=['datetime', 'datetimetz']).columns.tolist()
         
         # Also check if text columns could be dates
@@ -223,7 +750,7 @@ class DataProcessor:
             try:
                 # Sample 10 rows to check if it's a date
                 sample = df[col].dropna().head(10)
-                if not sample.empty and pd.to_datetime(sample, errors='coerce').notnull().all():
+                if not sample.empty and date_parser.looks_like_dates(sample):
                     potential_dates.append(col)
             except:
                 pass
@@ -234,7 +761,7 @@ class DataProcessor:
                 text_cols.remove(col)
                 date_cols.append(col)
 
-        column_info = {
+        return {
             "total_columns": len(cols),
             "numeric_count": len(numeric_cols),
             "text_count": len(text_cols),
@@ -245,37 +772,81 @@ class DataProcessor:
             "date_columns": date_cols
         }
 
-        # Summary statistics for numeric columns
+    @staticmethod
+    def _analyze_generic_dataset(df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Extract generic metadata from any dataframe for Visualytics dashboard.
+        """
+        column_info = DataProcessor._column_info(df)
+        numeric_cols = column_info['numeric_columns']
+
+        # Summary statistics for numeric columns, in one vectorized pass
         stats = {}
-        for col in numeric_cols:
-            stats[col] = {
-                "min": float(df[col].min()) if not df[col].empty else 0,
-                "max": float(df[col].max()) if not df[col].empty else 0,
-                "mean": float(df[col].mean()) if not df[col].empty else 0
-            }
+        if numeric_cols:
+            if df.empty:
+                stats = {col: {"min": 0, "max": 0, "mean": 0} for col in numeric_cols}
+            else:
+                described = df[numeric_cols].agg(['min', 'max', 'mean'])
+                for col in numeric_cols:
+                    stats[col] = {
+                        "min": float(described.at['min', col]),
+                        "max": float(described.at['max', col]),
+                        "mean": float(described.at['mean', col])
+                    }
 
-        # Sample data (first 100 rows for the table view)
-        sample_data = df.head(100).fillna('').to_dict(orient='records')
+        # Sample data (first rows for the table view)
+        sample_data = _records(df.head(settings.PROFILE_PREVIEW_ROWS))
 
-        # Correlation matrix for numeric columns
+        # Correlation matrix over a capped set of columns and a bounded row sample
         correlation = []
-        if len(numeric_cols) > 1:
-            corr_matrix = df[numeric_cols].corr().fillna(0)
-            for i, row_col in enumerate(numeric_cols):
-                for j, col_col in enumerate(numeric_cols):
-                    correlation.append({
-                        "x": row_col,
-                        "y": col_col,
-                        "value": float(corr_matrix.iloc[i, j])
-                    })
+        corr_cols = DataProcessor._correlation_columns(df, numeric_cols)
+        sampled = 0
+        if len(corr_cols) > 1:
+            corr_frame = df[corr_cols]
+            if len(corr_frame) > settings.PROFILE_SAMPLE_ROWS:
+                corr_frame = corr_frame.sample(n=settings.PROFILE_SAMPLE_ROWS, random_state=0)
+            sampled = len(corr_frame)
+            correlation = DataProcessor._correlation_records(corr_frame)
 
         return {
             "column_info": column_info,
             "stats": stats,
             "sample_data": sample_data,
-            "correlation": correlation
+            "correlation": correlation,
+            "profiling": {
+                "rows_profiled": len(df),
+                "correlation_sample_rows": sampled,
+                "correlation_columns": corr_cols
+            }
         }
 
+    @staticmethod
+    def _correlation_columns(df: pd.DataFrame, numeric_cols: List[str]) -> List[str]:
+        """
+        Cap the correlation matrix at PROFILE_MAX_CORR_COLUMNS, keeping the most
+        populated columns in their original order.
+        """
+        cap = settings.PROFILE_MAX_CORR_COLUMNS
+        if len(numeric_cols) <= cap:
+            return list(numeric_cols)
+        populated = df[numeric_cols].count().sort_values(ascending=False, kind='stable')
+        keep = set(populated.index[:cap])
+        return [col for col in numeric_cols if col in keep]
+
+    @staticmethod
+    def _correlation_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+        cols = frame.columns.tolist()
+        corr_matrix = frame.corr().fillna(0)
+        correlation = []
+        for i, row_col in enumerate(cols):
+            for j, col_col in enumerate(cols):
+                correlation.append({
+                    "x": row_col,
+                    "y": col_col,
+                    "value": float(corr_matrix.iloc[i, j])
+                })
+        return correlation
+
     @staticmethod
     def _find_column(df: pd.DataFrame, possible_names: List[str]) -> str:
         """Helper kept for compatibility."""
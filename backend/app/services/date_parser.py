@@ -0,0 +1,137 @@
+import threading
+import pandas as pd
+
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.core.config import settings
+
+# Candidate formats, tried in order. Day-first layouts come before month-first
+# ones (Indian ledgers), and 2-digit years before 4-digit so '01/02/24' is not
+# read as year 24.
+DATE_FORMATS = [
+    'ISO8601',
+    '%d-%m-%y', '%d-%m-%Y',
+    '%d/%m/%y', '%d/%m/%Y',
+    '%d.%m.%y', '%d.%m.%Y',
+    '%d-%m-%Y %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%d-%m-%Y %H:%M', '%d/%m/%Y %H:%M',
+    '%d-%b-%y', '%d-%b-%Y', '%d %b %Y', '%d %B %Y', '%d-%B-%Y',
+    '%b %d, %Y', '%B %d, %Y',
+    '%m/%d/%y', '%m/%d/%Y', '%m-%d-%Y',
+    '%Y/%m/%d', '%Y.%m.%d', '%Y%m%d',
+]
+
+
+class DateParser:
+    """
+    Vectorized date parsing. The format is inferred once from a sample of the
+    column's unique strings, then only the unique strings are parsed with that
+    explicit format and mapped back to rows. Strings it does not match (mixed
+    layouts in one column) go through the next best candidate formats, then
+    pandas' per-value parsing, so only unparseable values become NaT.
+    Inferred formats are cached per header signature + column.
+    """
+    SAMPLE_SIZE = 200
+
+    def __init__(self, cache_size: int = None):
+        self.cache_size = cache_size or settings.DATE_FORMAT_CACHE_SIZE
+        self._formats = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unique_strings(values: pd.Series) -> Tuple[pd.Index, list]:
+        codes, uniques = pd.factorize(values)
+        return codes, [str(u).strip() for u in uniques]
+
+    def infer_format(self, strings: list, exclude=()) -> Optional[str]:
+        """Pick the candidate format (other than exclude) that parses the most of a sample of unique strings."""
+        sample = strings[:self.SAMPLE_SIZE]
+        if not sample:
+            return None
+        best, best_hits = None, 0
+        for fmt in DATE_FORMATS:
+            if fmt in exclude:
+                continue
+            hits = int(pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum())
+            if hits > best_hits:
+                best, best_hits = fmt, hits
+                if hits == len(sample):
+                    break
+        return best
+
+    def _cached(self, key) -> Optional[str]:
+        with self._lock:
+            if key in self._formats:
+                self._formats.move_to_end(key)
+                return self._formats[key]
+        return None
+
+    def _remember(self, key, fmt: str):
+        with self._lock:
+            self._formats[key] = fmt
+            self._formats.move_to_end(key)
+            while len(self._formats) > self.cache_size:
+                self._formats.popitem(last=False)
+
+    def resolve_format(self, values: pd.Series, cache_key=None) -> Optional[str]:
+        """
+        Format for a text date column. A cached format is reused while it still
+        parses most of the sample; otherwise the format is inferred again.
+        """
+        _, strings = self._unique_strings(values)
+        sample = strings[:self.SAMPLE_SIZE]
+        fmt = self._cached(cache_key) if cache_key is not None else None
+        if fmt and sample:
+            hits = pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum()
+            if hits * 2 >= len(sample):
+                return fmt
+        fmt = self.infer_format(strings)
+        if fmt and cache_key is not None:
+            self._remember(cache_key, fmt)
+        return fmt
+
+    def parse(self, values: pd.Series, fmt: Optional[str] = None) -> pd.Series:
+        """
+        Parse a column to datetimes. Text is parsed once per unique string with
+        the given format (or pandas' own inference when there is none).
+        """
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values
+        if not (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)
+                or isinstance(values.dtype, pd.CategoricalDtype)):
+            return pd.to_datetime(values, errors='coerce')
+
+        codes, strings = self._unique_strings(values)
+        parsed = pd.to_datetime(strings, format=fmt, errors='coerce') if strings else pd.DatetimeIndex([])
+        if parsed.hasnans:
+            parsed = self._parse_unmatched(strings, parsed, fmt)
+        return pd.Series(parsed.take(codes, allow_fill=True, fill_value=pd.NaT), index=values.index)
+
+    def _parse_unmatched(self, strings: list, parsed: pd.DatetimeIndex, fmt: Optional[str]) -> pd.DatetimeIndex:
+        """
+        Fill the NaT entries of parsed (one per unique string): each round parses
+        the strings still unmatched with the candidate format that fits most of
+        them; whatever no candidate matches is parsed value by value (day first).
+        """
+        result = pd.Series(parsed)
+        unmatched = result.isna().to_numpy()
+        tried = {fmt}
+        while unmatched.any():
+            remaining = [string for string, missing in zip(strings, unmatched) if missing]
+            fallback = self.infer_format(remaining, exclude=tried)
+            if fallback is None:
+                result[unmatched] = pd.to_datetime(remaining, format='mixed', dayfirst=True, errors='coerce')
+                break
+            tried.add(fallback)
+            result[unmatched] = pd.to_datetime(remaining, format=fallback, errors='coerce')
+            unmatched = result.isna().to_numpy()
+        return pd.DatetimeIndex(result)
+
+    def looks_like_dates(self, values: pd.Series) -> bool:
+        """True when every value parses under one inferred format."""
+        _, strings = self._unique_strings(values)
+        fmt = self.infer_format(strings)
+        return fmt is not None and bool(pd.to_datetime(strings, format=fmt, errors='coerce').notna().all())
+
+
+date_parser = DateParser()
@@ -0,0 +1,149 @@
+import logging
+import os
+import pandas as pd
+
+from typing import Iterator, List, Optional, Tuple, Union, BinaryIO
+from openpyxl import load_workbook
+
+from app.core.config import settings
+
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+logger = logging.getLogger(__name__)
+
+ALL_SHEETS = "*"
+MB = 1024 * 1024
+
+
+class ExcelBatchReader:
+    """
+    Stream an .xlsx workbook as DataFrame batches without building the workbook
+    object model in memory.
+
+    The calamine engine (python-calamine) parses cells natively and is the fast
+    path, but it loads each sheet whole before the first batch. openpyxl's
+    read-only mode keeps memory bounded by the batch size, so "auto" uses it for
+    workbooks above EXCEL_CALAMINE_MAX_MB (and when calamine is not installed);
+    EXCEL_ENGINE="calamine" forces calamine whatever the size.
+
+    Cells to the right of the header are dropped (with a warning per sheet).
+
+    sheet_name=None reads the first sheet, a name reads that sheet, and ALL_SHEETS
+    consolidates every sheet whose header matches the first sheet's header.
+    Sheets with a different layout are skipped and listed in sheets_skipped.
+    """
+    def __init__(self, source: Union[str, BinaryIO], sheet_name: Optional[str] = None, batch_rows: int = None,
+                 engine: Optional[str] = None):
+        self.source = source
+        self.sheet_name = sheet_name
+        self.batch_rows = batch_rows or settings.INGEST_CHUNK_ROWS
+        self.engine = self._resolve_engine(engine or settings.EXCEL_ENGINE, self._size(source))
+        self.sheets_read = []
+        self.sheets_skipped = []
+
+    @staticmethod
+    def _size(source: Union[str, BinaryIO]) -> Optional[int]:
+        if isinstance(source, str):
+            return os.path.getsize(source)
+        try:
+            position = source.tell()
+            size = source.seek(0, os.SEEK_END)
+            source.seek(position)
+            return size
+        except (AttributeError, OSError):
+            return None
+
+    @staticmethod
+    def _resolve_engine(engine: str, size: Optional[int] = None) -> str:
+        if engine == "auto":
+            if python_calamine is None or (size is not None and size > settings.EXCEL_CALAMINE_MAX_MB * MB):
+                return "openpyxl"
+            return "calamine"
+        if engine == "calamine" and python_calamine is None:
+            logger.warning("EXCEL_ENGINE=calamine but python-calamine is not installed; using openpyxl")
+            return "openpyxl"
+        if engine not in ("calamine", "openpyxl"):
+            raise ValueError(f"Unknown EXCEL_ENGINE '{engine}'")
+        return engine
+
+    @staticmethod
+    def _header(row: tuple) -> List:
+        """Name blank header cells and de-duplicate repeats the way pandas does."""
+        header, seen = [], {}
+        for i, value in enumerate(row):
+            name = f"Unnamed: {i}" if value is None else value
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            header.append(name)
+        return header
+
+    def _select(self, names: List[str]) -> List[str]:
+        if not names:
+            return []
+        if self.sheet_name is None:
+            return names[:1]
+        if self.sheet_name == ALL_SHEETS:
+            return list(names)
+        if self.sheet_name not in names:
+            raise ValueError(f"Sheet '{self.sheet_name}' not found. Available sheets: {', '.join(names)}")
+        return [self.sheet_name]
+
+    def _openpyxl_sheets(self, workbook) -> Iterator[Tuple[str, Iterator[tuple]]]:
+        for name in self._select(workbook.sheetnames):
+            yield name, workbook[name].iter_rows(values_only=True)
+
+    def _calamine_sheets(self, workbook) -> Iterator[Tuple[str, Iterator[tuple]]]:
+        for name in self._select(workbook.sheet_names):
+            rows = workbook.get_sheet_by_name(name).iter_rows()
+            # calamine reports empty cells as '' where openpyxl reports None
+            yield name, (tuple(None if value == "" else value for value in row) for row in rows)
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        if self.engine == "calamine":
+            workbook = python_calamine.load_workbook(self.source)
+            sheets = self._calamine_sheets(workbook)
+        else:
+            workbook = load_workbook(self.source, read_only=True, data_only=True)
+            sheets = self._openpyxl_sheets(workbook)
+        try:
+            header = None
+            for title, rows in sheets:
+                first = next(rows, None)
+                if first is None:
+                    self.sheets_skipped.append(title)
+                    continue
+                sheet_header = self._header(first)
+                if header is None:
+                    header = sheet_header
+                elif sheet_header != header:
+                    self.sheets_skipped.append(title)
+                    continue
+                self.sheets_read.append(title)
+
+                batch = []
+                dropped = 0
+                for row in rows:
+                    if all(value is None for value in row):
+                        continue
+                    if len(row) > len(header):
+                        dropped += sum(value is not None for value in row[len(header):])
+                    batch.append(row[:len(header)])
+                    if len(batch) >= self.batch_rows:
+                        yield pd.DataFrame.from_records(batch, columns=header)
+                        batch = []
+                if batch:
+                    yield pd.DataFrame.from_records(batch, columns=header)
+                if dropped:
+                    logger.warning("EXCEL: sheet '%s': dropped %d cells to the right of the %d-column header",
+                                   title, dropped, len(header))
+
+            if header is None:
+                raise ValueError("The workbook has no data rows.")
+        finally:
+            workbook.close()
@@ -0,0 +1,526 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.executor import execution_layer, StageTimeout
+from app.core.security import encryption_service
+from app.models.database import AnalysisJob, Company, FinancialUpload, Report, TransactionFile
+from app.services.ai_engine import ai_engine
+from app.services import upload_envelope
+from app.services.mapping_cache import column_mapping_cache
+
+logger = logging.getLogger(__name__)
+
+# data_processor, ledger and transaction_store (pandas, pyarrow) are imported
+# where a job needs them, so importing the app does not load pandas
+
+# How many ready jobs a worker looks at when skipping companies at their running cap
+CLAIM_BATCH = 20
+
+
+class JobFailed(Exception):
+    """A permanent failure: retrying the job would fail the same way."""
+
+
+class JobAbandoned(Exception):
+    """The outcome is unknown (a save still running); the job's lease decides when it runs again."""
+
+
+def analysis_columns(ai_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """FinancialUpload column values for an AI analysis; the narrative fields are in analysis_fields."""
+    credit_data = ai_analysis.get('creditworthiness', {})
+    credit_score = int(credit_data.get('score', 0)) if isinstance(credit_data, dict) else 0
+
+    return dict(
+        health_score=int(ai_analysis.get('health_score', 0)),
+        status=ai_analysis.get('status', 'N/A'),
+        forecast_narrative=ai_analysis.get('forecast', ''),
+        creditworthiness_score=credit_score
+    )
+
+
+def analysis_fields(ai_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """The sealed (upload_envelope) fields of an AI analysis, with robust defaults."""
+    credit_data = ai_analysis.get('creditworthiness', {})
+    credit_rat = str(credit_data.get('rationale', '')) if isinstance(credit_data, dict) else ''
+
+    return {
+        'summary': ai_analysis.get('summary', 'No summary available.'),
+        'risks': ai_analysis.get('risks', []),
+        'recommendations': ai_analysis.get('recommendations', []),
+        'working_capital_analysis': ai_analysis.get('working_capital_analysis', {}),
+        'cost_optimization': ai_analysis.get('cost_optimization', []),
+        'financial_products': ai_analysis.get('financial_products', []),
+        'bookkeeping_tax_compliance': ai_analysis.get('bookkeeping_tax_compliance', {}),
+        'credit_rationale': credit_rat
+    }
+
+
+def stored_financial_data(upload: FinancialUpload) -> Dict[str, Any]:
+    """The analysis inputs (AIEngine PROMPT_FIELDS) as stored on an upload."""
+    return {
+        'total_revenue': upload.total_revenue or 0.0,
+        'total_expenses': upload.total_expenses or 0.0,
+        'net_profit': upload.net_profit or 0.0,
+        'profit_margin': upload.profit_margin or 0.0,
+        'expense_ratio': upload.expense_ratio or 0.0,
+        'accounts_receivable': upload.accounts_receivable or 0.0,
+        'accounts_payable': upload.accounts_payable or 0.0,
+        'inventory_value': upload.inventory_value or 0.0,
+        'total_debt': upload.total_debt or 0.0,
+        'categories': upload_envelope.open_upload(upload)['categories']
+    }
+
+
+def update_analysis(upload_id: int, ai_analysis: Dict[str, Any]):
+    """Replace the stored analysis of an upload and its report. Blocking; runs on the IO pool."""
+    with SessionLocal() as db:
+        upload = db.get(FinancialUpload, upload_id)
+        if upload is None:
+            return  # cleared meanwhile
+        for column, value in analysis_columns(ai_analysis).items():
+            setattr(upload, column, value)
+        payload = upload_envelope.open_upload(upload)
+        payload.update(analysis_fields(ai_analysis))
+        report = db.query(Report).filter(Report.upload_id == upload_id).first()
+        if report is not None:
+            content = json.loads(encryption_service.decrypt(report.encrypted_content))
+            content["ai_analysis"] = ai_analysis
+            report.encrypted_content = encryption_service.encrypt(json.dumps(content))
+            # An upload stored before envelopes gets sealed here
+            payload.setdefault('generic_metadata', content.get('financial_data', {}).get('generic_metadata', {}))
+        upload_envelope.store(upload, payload)
+        db.commit()
+
+
+def save_analysis(job_id: int, financial_data: Dict[str, Any], ai_analysis: Dict[str, Any],
+                  transactions: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Encrypt and persist the upload, its report and the link to its stored
+    transactions, and mark the job succeeded, in one transaction; then drop the
+    spooled file. Blocking; runs on the IO pool with its own session, so a save
+    that outlives its stage timeout never shares a session with the job worker.
+    """
+    with SessionLocal() as db:
+        job = db.get(AnalysisJob, job_id)
+        # Verify company exists
+        company = db.query(Company).filter(Company.id == job.company_id).first()
+        if not company:
+            raise JobFailed(f"Company with ID {job.company_id} not found. Please log in again.")
+
+        upload = FinancialUpload(
+            company_id=job.company_id,
+            filename=job.filename,
+            total_revenue=float(financial_data.get('total_revenue') or 0),
+            total_expenses=float(financial_data.get('total_expenses') or 0),
+            net_profit=float(financial_data.get('net_profit') or 0),
+            profit_margin=float(financial_data.get('profit_margin') or 0),
+            expense_ratio=float(financial_data.get('expense_ratio') or 0),
+
+            accounts_receivable=float(financial_data.get('accounts_receivable') or 0.0),
+            accounts_payable=float(financial_data.get('accounts_payable') or 0.0),
+            inventory_value=float(financial_data.get('inventory_value') or 0.0),
+            total_debt=float(financial_data.get('total_debt') or 0.0),
+
+            **analysis_columns(ai_analysis)
+        )
+        # The sensitive fields go in one encrypted envelope (see upload_envelope)
+        upload_envelope.store(upload, {
+            'categories': financial_data.get('categories', {}),
+            'top_expenses': financial_data.get('top_expenses', []),
+            'monthly_breakdown': financial_data.get('monthly_breakdown', []),
+            'generic_metadata': financial_data.get('generic_metadata', {}),
+            **analysis_fields(ai_analysis)
+        })
+
+        db.add(upload)
+        db.flush()
+
+        report = Report(
+            company_id=job.company_id,
+            upload_id=upload.id,
+            title=f"Analysis: {job.filename} ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})",
+            report_type="Ad-hoc",
+            encrypted_content=encryption_service.encrypt(json.dumps({
+                "financial_data": financial_data,
+                "ai_analysis": ai_analysis
+            }))
+        )
+        db.add(report)
+
+        if transactions:
+            db.add(TransactionFile(
+                upload_id=upload.id,
+                company_id=job.company_id,
+                path=transactions['path'],
+                row_count=transactions['rows'],
+                size_bytes=transactions['size_bytes']
+            ))
+
+        job.status = "succeeded"
+        job.upload_id = upload.id
+        job.error = None
+        job.finished_at = datetime.utcnow()
+        job.lease_expires_at = None
+        db.commit()
+        logger.debug("COMMITTED to database: %s", upload.id)
+
+        # Remember this layout's mapping so the next upload of it skips detection
+        mapping = financial_data.get('column_mapping')
+        if mapping:
+            try:
+                column_mapping_cache.record(db, job.company_id, mapping['header_signature'], mapping['mapped_columns'])
+            except Exception as e:
+                # The analysis is committed: a lost mapping only costs the next upload
+                # of this layout a detection pass (e.g. a concurrent upload stored it first)
+                db.rollback()
+                logger.warning("JOB %s: column mapping not recorded (%s)", job_id, e)
+        upload_id, file_path = upload.id, job.file_path
+    JobQueue._discard(file_path)
+    return upload_id
+
+
+class JobQueue:
+    """
+    Durable queue of upload analyses backed by the analysis_jobs table, so it
+    works the same on SQLite and Postgres and survives restarts.
+
+    Each API process runs JOB_WORKERS asyncio workers that claim jobs with a
+    conditional UPDATE (only one worker wins a row) and run the pipeline through
+    the execution layer. At most JOB_MAX_RUNNING_PER_COMPANY jobs of one company
+    run at a time. Transient failures are retried with exponential backoff up to
+    max_attempts; a running job whose lease expires (its worker died) is claimed
+    again. The spooled file is deleted once the job succeeds or fails for good.
+    """
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers = []
+
+    @staticmethod
+    def content_hash(file_digest: str, params: Dict[str, Any]) -> str:
+        """Dedup key: the file bytes plus everything that changes the stored analysis except language."""
+        from app.services.data_processor import PROCESSING_VERSION
+        parts = [file_digest, str(params.get("industry")), str(params.get("sheet")), str(PROCESSING_VERSION)]
+        if params.get("append"):
+            parts.append("append")
+        key = "\x1f".join(parts)
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def find_duplicate(self, db: Session, company_id: int, content_hash: str) -> Optional[AnalysisJob]:
+        """
+        Return the company's job for the same content that is still pending or has
+        a live upload (see touch for making that upload current again); failed
+        jobs and uploads removed by a dashboard clear never match. Read only.
+        """
+        job = db.query(AnalysisJob).filter(
+            AnalysisJob.company_id == company_id,
+            AnalysisJob.content_hash == content_hash,
+            AnalysisJob.status.in_(["queued", "running", "succeeded"])
+        ).order_by(AnalysisJob.id.desc()).first()
+        if job is None or job.status != "succeeded":
+            return job
+        if job.upload_id is None or db.get(FinancialUpload, job.upload_id) is None:
+            return None
+        return job
+
+    @staticmethod
+    def touch(db: Session, job: AnalysisJob):
+        """Make a succeeded job's upload the current dashboard upload again (a repeat upload reuses it)."""
+        if job.status != "succeeded" or job.upload_id is None:
+            return
+        upload = db.get(FinancialUpload, job.upload_id)
+        if upload is not None:
+            upload.upload_date = datetime.utcnow()
+            db.commit()
+
+    def enqueue(self, db: Session, company_id: int, filename: str, file_path: str, params: Dict[str, Any],
+                content_hash: Optional[str] = None) -> AnalysisJob:
+        """
+        Queue a job. When the same content is already queued or running for the
+        company (an identical upload that raced this one past find_duplicate),
+        that job is returned instead; its file_path is not file_path.
+        """
+        job = AnalysisJob(
+            company_id=company_id,
+            filename=filename,
+            file_path=file_path,
+            params=params,
+            content_hash=content_hash,
+            max_attempts=settings.JOB_MAX_ATTEMPTS,
+            run_after=datetime.utcnow()
+        )
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            existing = db.query(AnalysisJob).filter(
+                AnalysisJob.company_id == company_id,
+                AnalysisJob.content_hash == content_hash,
+                AnalysisJob.status.in_(["queued", "running"])
+            ).first()
+            if existing is None:
+                raise
+            return existing
+        db.refresh(job)
+        self.notify()
+        return job
+
+    def notify(self):
+        """Wake idle workers; safe to call from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    @staticmethod
+    def describe(job: AnalysisJob) -> Dict[str, Any]:
+        def iso(value):
+            return value.isoformat() if value else None
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "filename": job.filename,
+            "attempts": job.attempts,
+            "max_attempts": job.max_attempts,
+            "error": job.error,
+            "upload_id": job.upload_id,
+            "created_at": iso(job.created_at),
+            "started_at": iso(job.started_at),
+            "finished_at": iso(job.finished_at)
+        }
+
+    def start(self):
+        """Start the workers on the running event loop (app startup)."""
+        if settings.JOB_WORKERS <= 0 or self._workers:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._workers = [self._loop.create_task(self._worker()) for _ in range(settings.JOB_WORKERS)]
+
+    async def stop(self):
+        """Cancel the workers. Jobs they were running are reclaimed once their lease expires."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._loop = None
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                job_id = await execution_layer.run_io("job claim", self._claim, timeout=settings.STAGE_TIMEOUT_DB_S)
+            except Exception as e:
+                logger.warning("JOB QUEUE: claim failed (%s)", e)
+                job_id = None
+
+            if job_id is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.JOB_POLL_INTERVAL_S)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job_id)
+
+    @staticmethod
+    def _claim() -> Optional[int]:
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            ready = or_(
+                and_(AnalysisJob.status == "queued", AnalysisJob.run_after <= now),
+                and_(AnalysisJob.status == "running", AnalysisJob.lease_expires_at < now)
+            )
+            candidates = db.query(AnalysisJob.id, AnalysisJob.company_id, AnalysisJob.status, AnalysisJob.attempts) \
+                .filter(ready).order_by(AnalysisJob.id).limit(CLAIM_BATCH).all()
+            if not candidates:
+                return None
+
+            running = dict(
+                db.query(AnalysisJob.company_id, func.count(AnalysisJob.id))
+                .filter(AnalysisJob.status == "running", AnalysisJob.lease_expires_at >= now)
+                .group_by(AnalysisJob.company_id).all()
+            )
+            for job_id, company_id, status, attempts in candidates:
+                if running.get(company_id, 0) >= settings.JOB_MAX_RUNNING_PER_COMPANY:
+                    continue
+                claimed = db.execute(
+                    update(AnalysisJob)
+                    .where(AnalysisJob.id == job_id, AnalysisJob.status == status, AnalysisJob.attempts == attempts)
+                    .values(status="running", attempts=attempts + 1, started_at=now,
+                            lease_expires_at=now + timedelta(seconds=settings.JOB_LEASE_S))
+                ).rowcount
+                db.commit()
+                if claimed:
+                    return job_id
+        return None
+
+    async def _run(self, job_id: int):
+        db = SessionLocal()
+        try:
+            job = await execution_layer.run_io("job load", db.get, AnalysisJob, job_id, timeout=settings.STAGE_TIMEOUT_DB_S)
+            logger.info("JOB %s: attempt %s/%s for %s", job.id, job.attempts, job.max_attempts, job.filename)
+            try:
+                if job.attempts > job.max_attempts:
+                    raise JobFailed("The analysis was interrupted too many times. Please upload the file again.")
+                upload_id = await self._analyze(db, job)
+                logger.info("JOB %s: succeeded (upload %s)", job.id, upload_id)
+            except JobAbandoned as e:
+                logger.warning("JOB %s: %s", job.id, e)
+            except JobFailed as e:
+                await execution_layer.run_io("job update", self._fail, db, job, str(e), timeout=settings.STAGE_TIMEOUT_DB_S)
+            except Exception as e:
+                await execution_layer.run_io("job update", self._retry, db, job, e, timeout=settings.STAGE_TIMEOUT_DB_S)
+        except Exception as e:
+            logger.error("JOB %s: could not record the outcome (%s)", job_id, e)
+        finally:
+            db.close()
+
+    @staticmethod
+    async def _analyze(db: Session, job: AnalysisJob) -> int:
+        from app.services.data_processor import DataProcessor
+        from app.services.ledger import ledger
+        from app.services.transaction_store import transaction_store
+        params = job.params or {}
+        if not os.path.exists(job.file_path):
+            raise JobFailed("The uploaded file is no longer available. Please upload it again.")
+
+        known_mappings = await execution_layer.run_io(
+            "mapping lookup", column_mapping_cache.for_company, db, job.company_id, timeout=settings.STAGE_TIMEOUT_DB_S
+        )
+        transactions_path = transaction_store.new_path(job.company_id)
+        try:
+            financial_data = await execution_layer.run_cpu(
+                "processing", DataProcessor.process_file, job.file_path, job.filename,
+                known_mappings=known_mappings, sheet_name=params.get("sheet"),
+                transactions_path=transactions_path, timeout=settings.STAGE_TIMEOUT_PROCESS_S
+            )
+        except StageTimeout:
+            # The result never reaches us; drop what the worker has written so far
+            transaction_store.delete(transactions_path)
+            raise
+        if "error" in financial_data:
+            raise JobFailed(financial_data["error"])
+        logger.debug("JOB %s: file processed: %s", job.id, job.filename)
+
+        transactions = financial_data.pop('transactions', None)
+        try:
+            if transactions:
+                financial_data['ledger'] = await JobQueue._update_ledger(db, job, financial_data, transactions)
+                if params.get("append"):
+                    # The dashboard shows the whole ledger, not just this file
+                    ledger_summary = await execution_layer.run_io(
+                        "ledger summary", ledger.summary, db, job.company_id, timeout=settings.STAGE_TIMEOUT_DB_S
+                    )
+                    ledger_summary.pop('columns')
+                    ledger_summary.pop('sample_transactions')
+                    financial_data.update(ledger_summary)
+
+            industry = params.get("industry", "General")
+            lang = params.get("lang", "en")
+            # Falls back to the rule-based analysis on its own once AI_DEADLINE_S passes
+            ai_analysis = await ai_engine.analyze_financials_async(financial_data, industry=industry, language=lang)
+            logger.debug("JOB %s: AI analysis complete", job.id)
+        except BaseException:
+            # Not linked to any upload; a retry writes a fresh file
+            transaction_store.delete(transactions and transactions['path'])
+            raise
+
+        try:
+            return await execution_layer.run_io(
+                "save", save_analysis, job.id, financial_data, ai_analysis, transactions,
+                timeout=settings.STAGE_TIMEOUT_DB_S
+            )
+        except StageTimeout:
+            # The save may still commit and link the transaction file: look at the
+            # job before deciding anything, and delete nothing while it is undecided
+            await execution_layer.run_io("job load", db.refresh, job, timeout=settings.STAGE_TIMEOUT_DB_S)
+            if job.status == "succeeded":
+                return job.upload_id
+            raise JobAbandoned("the save did not finish in time; the job runs again once its lease expires")
+        except BaseException:
+            transaction_store.delete(transactions and transactions['path'])
+            raise
+
+    @staticmethod
+    async def _update_ledger(db: Session, job: AnalysisJob, financial_data: Dict[str, Any],
+                             transactions: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Add the upload's transactions that are new to the company ledger and fold
+        them into its rollups. Idempotent: a retry finds its rows already there.
+        """
+        from app.services.ledger import ledger
+        from app.services.transaction_store import transaction_store
+        state = await execution_layer.run_io(
+            "ledger load", ledger.load, db, job.company_id, ledger.months_of(financial_data),
+            timeout=settings.STAGE_TIMEOUT_DB_S
+        )
+        segment_path = transaction_store.new_path(job.company_id)
+        try:
+            delta = await execution_layer.run_cpu(
+                "ledger diff", ledger.diff, transactions['path'], state, segment_path,
+                timeout=settings.STAGE_TIMEOUT_PROCESS_S
+            )
+        except StageTimeout:
+            transaction_store.delete(segment_path)
+            raise
+        try:
+            await execution_layer.run_io(
+                "ledger apply", ledger.apply, db, job.company_id, job.id, delta, timeout=settings.STAGE_TIMEOUT_DB_S
+            )
+        except StageTimeout:
+            # The commit may still land; the segment must not vanish under it
+            raise
+        except BaseException:
+            transaction_store.delete(delta['segment'] and delta['segment']['path'])
+            raise
+        logger.info("JOB %s: ledger +%s rows (%s already present)", job.id, delta['appended_rows'], delta['duplicate_rows'])
+        return {
+            "mode": "append" if (job.params or {}).get("append") else "snapshot",
+            "appended_rows": delta['appended_rows'],
+            "duplicate_rows": delta['duplicate_rows']
+        }
+
+    @staticmethod
+    def _fail(db: Session, job: AnalysisJob, error: str):
+        db.rollback()
+        job.status = "failed"
+        job.error = error
+        job.finished_at = datetime.utcnow()
+        job.lease_expires_at = None
+        db.commit()
+        logger.warning("JOB %s: failed (%s)", job.id, error)
+        JobQueue._discard(job.file_path)
+
+    @staticmethod
+    def _retry(db: Session, job: AnalysisJob, error: Exception):
+        db.rollback()
+        if job.attempts >= job.max_attempts:
+            JobQueue._fail(db, job, f"Analysis failed after {job.attempts} attempts: {error}")
+            return
+        delay = settings.JOB_RETRY_BACKOFF_S * 2 ** (job.attempts - 1)
+        job.status = "queued"
+        job.error = str(error)
+        job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+        job.lease_expires_at = None
+        db.commit()
+        logger.warning("JOB %s: attempt %s failed (%s); retrying in %.0fs", job.id, job.attempts, error, delay)
+
+    @staticmethod
+    def _discard(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+job_queue = JobQueue()
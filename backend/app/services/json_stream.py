@@ -0,0 +1,77 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+
+class JsonFieldStream:
+    """
+    Incremental parser for a JSON object arriving in chunks (a streamed model
+    completion): feed() returns each top-level field as soon as its value is
+    complete, so callers can show it before the rest of the object exists.
+    Scanning is resumable, so the whole stream is read once.
+    """
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0          # next character to scan
+        self._depth = 0        # nesting depth; top-level fields live at depth 1
+        self._in_string = False
+        self._escaped = False
+        self._token_start = None  # start of the current top-level key or value
+        self._key = None
+        self._closed = False
+        self.fields: Dict[str, Any] = {}
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Add text; returns the (name, value) fields completed by it, in order."""
+        self._buffer += chunk
+        completed = []
+        buffer, i = self._buffer, self._pos
+        while i < len(buffer) and not self._closed:
+            ch = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key is None:
+                        self._key = json.loads(buffer[self._token_start:i + 1])
+                        self._token_start = None
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._token_start is None:
+                    self._token_start = i
+            elif ch in "{[":
+                if self._depth == 1 and self._token_start is None:
+                    self._token_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.extend(self._end_value(i))
+                    self._closed = True
+            elif self._depth == 1:
+                if ch == ",":
+                    completed.extend(self._end_value(i))
+                elif ch == ":":
+                    self._token_start = None
+                elif not ch.isspace() and self._token_start is None and self._key is not None:
+                    self._token_start = i  # number, true, false or null
+            i += 1
+        self._pos = i
+        return completed
+
+    def result(self) -> Dict[str, Any]:
+        """The complete object; raises ValueError when the stream did not form one."""
+        result = json.loads(self._buffer)
+        if not isinstance(result, dict):
+            raise ValueError("streamed response is not a JSON object")
+        return result
+
+    def _end_value(self, end: int) -> List[Tuple[str, Any]]:
+        if self._key is None or self._token_start is None:
+            return []
+        name, value = self._key, json.loads(self._buffer[self._token_start:end])
+        self._key = self._token_start = None
+        self.fields[name] = value
+        return [(name, value)]
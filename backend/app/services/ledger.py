@@ -0,0 +1,329 @@
+import hashlib
+import hmac
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import encryption_service
+from app.models.database import LedgerMonth, LedgerRollup, LedgerSegment
+from app.services.data_processor import DataProcessor
+from app.services.transaction_store import transaction_store, TRANSACTION_COLUMNS
+
+# Ledger month of transactions without a parseable date
+UNDATED = ""
+NAT = np.iinfo('int64').min
+ROLLUP_SUMS = [
+    "amount", "abs_amount", "income_amount", "income_count",
+    "expense_amount", "expense_abs_amount", "expense_count", "tax", "txn_count"
+]
+TREND_MAX_MONTHS = 120
+
+
+class LedgerConflict(Exception):
+    """Another upload changed the same ledger months first; the job is retried against the new state."""
+
+
+class Ledger:
+    """
+    Append-only per-company transaction ledger with (month, category) rollups.
+
+    Every upload's normalized transactions are fingerprinted with a keyed hash of
+    the whole row plus its occurrence number among identical rows, so re-sending
+    overlapping history only adds rows the ledger has not seen. Fingerprints are
+    kept per month (ledger_months), and an upload only loads the months it
+    touches. New rows are stored as an encrypted Parquet segment and folded into
+    ledger_rollups, so totals and trends are computed from the rollups without
+    rescanning earlier data.
+
+    Rollup amounts are stored in the clear like FinancialUpload's totals; the
+    category name is Fernet-encrypted per row and indexed through an HMAC.
+    """
+    def __init__(self):
+        secret = settings.SECRET_KEY.encode()
+        # hash_pandas_object takes a 16-character key
+        self._fingerprint_key = hashlib.sha256(b"ledger-fingerprint:" + secret).hexdigest()[:16]
+        self._category_secret = hashlib.sha256(b"ledger-category:" + secret).digest()
+
+    def category_key(self, category) -> str:
+        if category is None or pd.isna(category):
+            return ""
+        return hmac.new(self._category_secret, str(category).encode(), hashlib.sha256).hexdigest()[:32]
+
+    @staticmethod
+    def months_of(financial_data: Dict[str, Any]) -> List[str]:
+        """The ledger months a processed upload touches, from its process_file result."""
+        breakdown = financial_data.get('monthly_breakdown') or []
+        months = [entry['month'] for entry in breakdown]
+        if sum(entry['count'] for entry in breakdown) < financial_data.get('row_count', 0):
+            months.append(UNDATED)
+        return months
+
+    @staticmethod
+    def load(db: Session, company_id: int, months: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fingerprints and version of the given ledger months. Blocking; runs on the IO pool."""
+        rows = db.query(LedgerMonth).filter(LedgerMonth.company_id == company_id, LedgerMonth.month.in_(months)).all()
+        return {
+            row.month: {
+                "row_count": row.row_count,
+                "fingerprints": row.fingerprints,
+                "first_date": row.first_date,
+                "last_date": row.last_date
+            }
+            for row in rows
+        }
+
+    def fingerprints(self, df: pd.DataFrame) -> np.ndarray:
+        """Keyed uint64 per row; the n-th copy of an identical row always gets the same value."""
+        rows = pd.util.hash_pandas_object(df[TRANSACTION_COLUMNS], index=False, hash_key=self._fingerprint_key).to_numpy()
+        # Number identical rows 0, 1, 2... by sorting the hashes and measuring each run
+        order = np.argsort(rows, kind='stable')
+        ranked = rows[order]
+        positions = np.arange(len(rows))
+        run_starts = np.maximum.accumulate(np.where(np.r_[True, ranked[1:] != ranked[:-1]], positions, 0))
+        occurrence = np.empty(len(rows), dtype='int64')
+        occurrence[order] = positions - run_starts
+        return pd.util.hash_pandas_object(
+            pd.DataFrame({"row": rows, "occurrence": occurrence}), index=False, hash_key=self._fingerprint_key
+        ).to_numpy()
+
+    def diff(self, transactions_path: str, state: Dict[str, Dict[str, Any]], segment_path: str) -> Dict[str, Any]:
+        """
+        Find the upload's transactions that are not in the ledger yet, write them to
+        segment_path and aggregate them into rollup deltas. state is load()'s result
+        for the touched months. CPU-bound; runs on the process pool.
+        """
+        df = transaction_store.read(transactions_path)
+        fingerprints = self.fingerprints(df)
+
+        is_new = np.ones(len(df), dtype=bool)
+        if state:
+            known = np.sort(np.concatenate([np.frombuffer(entry['fingerprints'], dtype='<u8') for entry in state.values()]))
+            if len(known):
+                # Searching with sorted needles keeps the binary searches cache-friendly
+                order = np.argsort(fingerprints)
+                needles = fingerprints[order]
+                found = np.minimum(np.searchsorted(known, needles), len(known) - 1)
+                is_new[order] = known[found] != needles
+        delta = {
+            "appended_rows": int(is_new.sum()),
+            "duplicate_rows": int(len(df) - is_new.sum()),
+            "months": {},
+            "rollups": [],
+            "segment": None
+        }
+        if not is_new.any():
+            return delta
+
+        new = df[is_new] if not is_new.all() else df
+        new_fingerprints = fingerprints[is_new]
+        writer = transaction_store.writer(segment_path)
+        try:
+            writer.write(new)
+            delta["segment"] = writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+
+        # Month of each row as an integer code; NaT becomes the undated month
+        dates = new['date'].to_numpy(dtype='datetime64[ns]')
+        month_codes, month_values = pd.factorize(dates.astype('datetime64[M]').astype('int64'))
+        month_names = [
+            UNDATED if value == NAT else str(np.datetime64(int(value), 'M'))
+            for value in month_values
+        ]
+
+        # One sort by month groups each month's fingerprints and dates together
+        order = np.argsort(month_codes, kind='stable')
+        sorted_codes = month_codes[order]
+        bounds = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        sorted_fingerprints = new_fingerprints[order]
+        sorted_dates = dates.astype('int64')[order]
+        for start, stop in zip(bounds, np.r_[bounds[1:], len(order)]):
+            month = month_names[sorted_codes[start]]
+            previous = state.get(month)
+            merged = np.sort(sorted_fingerprints[start:stop])
+            first_date = last_date = None
+            if month != UNDATED:
+                first_date = pd.Timestamp(sorted_dates[start:stop].min()).to_pydatetime()
+                last_date = pd.Timestamp(sorted_dates[start:stop].max()).to_pydatetime()
+            if previous is not None:
+                merged = np.union1d(np.frombuffer(previous['fingerprints'], dtype='<u8'), merged)
+                first_date = min(filter(None, [first_date, previous['first_date']]), default=None)
+                last_date = max(filter(None, [last_date, previous['last_date']]), default=None)
+            delta["months"][month] = {
+                "expected_row_count": previous['row_count'] if previous is not None else None,
+                "row_count": len(merged),
+                "fingerprints": merged.astype('<u8').tobytes(),
+                "first_date": first_date,
+                "last_date": last_date
+            }
+
+        # Rollups: every sum is a bincount over the (month, category) group of each row
+        type_codes, type_values = pd.factorize(new['type'])
+        kinds = [str(value).lower() for value in type_values] + ['']
+        is_income = np.array([kind == 'income' for kind in kinds])[type_codes]
+        is_expense = np.array([kind == 'expense' for kind in kinds])[type_codes]
+        category_codes, category_values = pd.factorize(new['category'])
+        groups, group_index = np.unique(month_codes * (len(category_values) + 1) + category_codes + 1, return_inverse=True)
+        amount = np.nan_to_num(new['amount'].to_numpy(dtype='float64'))
+        columns = {
+            "amount": amount,
+            "abs_amount": np.abs(amount),
+            "income_amount": np.where(is_income, amount, 0.0),
+            "income_count": is_income,
+            "expense_amount": np.where(is_expense, amount, 0.0),
+            "expense_abs_amount": np.where(is_expense, np.abs(amount), 0.0),
+            "expense_count": is_expense,
+            "tax": np.nan_to_num(new['tax'].to_numpy(dtype='float64')),
+            "txn_count": None
+        }
+        sums = {name: np.bincount(group_index, weights=values, minlength=len(groups)) for name, values in columns.items()}
+        counts = {"income_count", "expense_count", "txn_count"}
+        for i, group in enumerate(groups.tolist()):
+            month_code, category_code = divmod(group, len(category_values) + 1)
+            category = str(category_values[category_code - 1]) if category_code else None
+            row = {name: (int(sums[name][i]) if name in counts else float(sums[name][i])) for name in ROLLUP_SUMS}
+            row.update(month=month_names[month_code], category=category, category_key=self.category_key(category))
+            delta["rollups"].append(row)
+        return delta
+
+    @staticmethod
+    def apply(db: Session, company_id: int, job_id: Optional[int], delta: Dict[str, Any]):
+        """
+        Commit diff()'s result: month fingerprints, rollup increments and the segment
+        link, in one transaction. Raises LedgerConflict if any touched month changed
+        since load(). Blocking; runs on the IO pool.
+        """
+        if not delta["months"]:
+            return
+        try:
+            # Month rows first: they serialize concurrent appends to the same months
+            for month, entry in delta["months"].items():
+                values = {
+                    "fingerprints": entry['fingerprints'],
+                    "row_count": entry['row_count'],
+                    "first_date": entry['first_date'],
+                    "last_date": entry['last_date']
+                }
+                if entry['expected_row_count'] is None:
+                    db.add(LedgerMonth(company_id=company_id, month=month, **values))
+                    db.flush()
+                    continue
+                updated = db.query(LedgerMonth).filter(
+                    LedgerMonth.company_id == company_id,
+                    LedgerMonth.month == month,
+                    LedgerMonth.row_count == entry['expected_row_count']
+                ).update(values, synchronize_session=False)
+                if not updated:
+                    raise LedgerConflict(f"Ledger month {month or 'undated'} changed during the upload")
+
+            existing = {
+                (rollup.month, rollup.category_key): rollup
+                for rollup in db.query(LedgerRollup).filter(
+                    LedgerRollup.company_id == company_id,
+                    LedgerRollup.month.in_(list(delta["months"]))
+                )
+            }
+            for row in delta["rollups"]:
+                rollup = existing.get((row['month'], row['category_key']))
+                if rollup is None:
+                    rollup = LedgerRollup(
+                        company_id=company_id,
+                        month=row['month'],
+                        category_key=row['category_key'],
+                        encrypted_category=encryption_service.encrypt(row['category']) if row['category'] else None,
+                        **{column: 0 for column in ROLLUP_SUMS}
+                    )
+                    db.add(rollup)
+                for column in ROLLUP_SUMS:
+                    setattr(rollup, column, getattr(rollup, column) + row[column])
+
+            segment = delta["segment"]
+            db.add(LedgerSegment(company_id=company_id, job_id=job_id, path=segment['path'], row_count=segment['rows']))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise LedgerConflict("Ledger months were created by another upload") from None
+        except BaseException:
+            db.rollback()
+            raise
+
+    @staticmethod
+    def summary(db: Session, company_id: int) -> Dict[str, Any]:
+        """The company's financial summary over the whole ledger, from its rollups only."""
+        rows = db.query(
+            LedgerRollup.month, LedgerRollup.category_key, LedgerRollup.encrypted_category,
+            *[getattr(LedgerRollup, column) for column in ROLLUP_SUMS]
+        ).filter(LedgerRollup.company_id == company_id).all()
+        rollups = pd.DataFrame(rows, columns=["month", "category_key", "encrypted_category"] + ROLLUP_SUMS)
+
+        # Decrypt each category once, not once per month
+        names = {}
+        for key, sealed in zip(rollups['category_key'], rollups['encrypted_category']):
+            if key not in names:
+                names[key] = encryption_service.decrypt(sealed) if sealed else None
+        rollups['category'] = rollups['category_key'].map(names)
+
+        date_min, date_max = db.query(func.min(LedgerMonth.first_date), func.max(LedgerMonth.last_date)) \
+            .filter(LedgerMonth.company_id == company_id).one()
+        return DataProcessor.summarize_rollups(
+            rollups,
+            pd.Timestamp(date_min) if date_min else None,
+            pd.Timestamp(date_max) if date_max else None
+        )
+
+    def trends(self, db: Session, company_id: int, months: int, category: Optional[str] = None,
+               end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Monthly series from the rollups with an indexed range query: exactly
+        `months` months up to `end` (YYYY-MM), or up to the latest month with data.
+        Months without transactions inside the range are filled with zeros.
+        """
+        query = db.query(
+            LedgerRollup.month,
+            func.sum(LedgerRollup.income_amount),
+            func.sum(LedgerRollup.expense_amount),
+            func.sum(LedgerRollup.amount),
+            func.sum(LedgerRollup.txn_count)
+        ).filter(LedgerRollup.company_id == company_id, LedgerRollup.month != UNDATED)
+        if category is not None:
+            query = query.filter(LedgerRollup.category_key == self.category_key(category))
+        if not end:
+            end = query.with_entities(func.max(LedgerRollup.month)).scalar()
+            if end is None:
+                return []
+        span = pd.period_range(end=end, periods=months, freq='M')
+        rows = query.filter(LedgerRollup.month >= str(span[0]), LedgerRollup.month <= end) \
+            .group_by(LedgerRollup.month).all()
+
+        by_month = {month: (income, expense, amount, count) for month, income, expense, amount, count in rows}
+        series = []
+        for period in span:
+            income, expense, amount, count = by_month.get(str(period), (0.0, 0.0, 0.0, 0))
+            revenue, expenses = float(income or 0), abs(float(expense or 0))
+            series.append({
+                "month": str(period),
+                "revenue": revenue,
+                "expenses": expenses,
+                "net_profit": revenue - expenses,
+                "sum": float(amount or 0),
+                "count": int(count or 0)
+            })
+        return series
+
+    @staticmethod
+    def clear(db: Session, company_id: int) -> List[str]:
+        """Drop the company's ledger rows (caller commits) and return the segment files to delete."""
+        paths = [path for (path,) in db.query(LedgerSegment.path).filter(LedgerSegment.company_id == company_id)]
+        db.query(LedgerSegment).filter(LedgerSegment.company_id == company_id).delete(synchronize_session=False)
+        db.query(LedgerRollup).filter(LedgerRollup.company_id == company_id).delete(synchronize_session=False)
+        db.query(LedgerMonth).filter(LedgerMonth.company_id == company_id).delete(synchronize_session=False)
+        return paths
+
+
+ledger = Ledger()
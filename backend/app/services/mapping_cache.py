@@ -0,0 +1,59 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.database import ColumnMapping
+
+
+class ColumnMappingCache:
+    """
+    Confirmed column mappings per company, keyed by header signature.
+    An in-process LRU of company -> {signature: mapped_columns} sits in front of
+    the column_mappings table so repeat layouts skip detection entirely.
+    """
+    def __init__(self, max_companies: int = None):
+        self.max_companies = max_companies or settings.COLUMN_MAPPING_CACHE_SIZE
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    def for_company(self, db: Session, company_id: int) -> Dict[str, Dict[str, str]]:
+        with self._lock:
+            if company_id in self._lru:
+                self._lru.move_to_end(company_id)
+                return dict(self._lru[company_id])
+
+        rows = db.query(ColumnMapping).filter(ColumnMapping.company_id == company_id).all()
+        mappings = {row.header_signature: row.mapped_columns for row in rows}
+        self._remember(company_id, mappings)
+        return dict(mappings)
+
+    def record(self, db: Session, company_id: int, signature: str, mapped_columns: Dict[str, str]):
+        """Persist a newly detected mapping, or bump usage of an existing one."""
+        row = db.query(ColumnMapping).filter(
+            ColumnMapping.company_id == company_id,
+            ColumnMapping.header_signature == signature
+        ).first()
+        if row:
+            row.last_used_at = datetime.utcnow()
+            row.use_count = (row.use_count or 0) + 1
+        else:
+            db.add(ColumnMapping(company_id=company_id, header_signature=signature, mapped_columns=mapped_columns))
+        db.commit()
+
+        with self._lock:
+            if company_id in self._lru:
+                self._lru[company_id].setdefault(signature, mapped_columns)
+
+    def _remember(self, company_id: int, mappings: Dict[str, Dict[str, str]]):
+        with self._lock:
+            self._lru[company_id] = mappings
+            self._lru.move_to_end(company_id)
+            while len(self._lru) > self.max_companies:
+                self._lru.popitem(last=False)
+
+
+column_mapping_cache = ColumnMappingCache()
@@ -0,0 +1,143 @@
+import json
+import logging
+import math
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+OTHER_CATEGORY = "Other"
+
+
+class TokenCounter:
+    """
+    Counts prompt tokens locally: exactly with tiktoken when it is installed and
+    its encoding loads, otherwise with a conservative estimate (about 3 ASCII
+    characters per token, one token per other character) that over-counts
+    rather than under-counts.
+    """
+    def __init__(self, model: str):
+        self.model = model
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def exact(self) -> bool:
+        return self._load() is not None
+
+    def count(self, text: str) -> int:
+        encoding = self._load()
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+        ascii_chars = len(text.encode("ascii", "ignore"))
+        return math.ceil(ascii_chars / 3) + (len(text) - ascii_chars)
+
+    def _load(self):
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                if tiktoken is not None:
+                    try:
+                        self._encoding = tiktoken.encoding_for_model(self.model)
+                    except Exception as e:
+                        # Unknown model or the encoding file cannot be fetched (offline)
+                        logger.warning("PROMPT: tiktoken unavailable for %s (%s); estimating tokens", self.model, e)
+            return self._encoding
+
+
+def compact_categories(categories: Dict[str, float], top_n: int) -> Dict[str, float]:
+    """The top_n categories by absolute amount, the rest summed into "Other"; amounts rounded to cents."""
+    ranked = sorted(categories.items(), key=lambda item: abs(item[1]), reverse=True)
+    kept = {name: round(amount, 2) for name, amount in ranked[:top_n] if name != OTHER_CATEGORY}
+    rest = sum(amount for name, amount in ranked if name not in kept)
+    if len(kept) < len(ranked):
+        kept[OTHER_CATEGORY] = round(rest, 2)
+    return kept
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+class PromptBuilder:
+    """
+    Keeps the analysis prompt within AI_PROMPT_TOKEN_BUDGET whatever the number
+    of ledger categories: categories go in as compact JSON, at most
+    AI_PROMPT_MAX_CATEGORIES of them by magnitude, and fewer (binary search on
+    the count, the remainder rolled into "Other") while the rendered prompt is
+    over budget. Token counts of every built prompt are recorded for stats().
+    """
+    COUNTERS = ("prompts", "tokens_total", "tokens_max", "trimmed", "over_budget")
+
+    def __init__(self, model: str, budget: int = None, max_categories: int = None):
+        self.counter = TokenCounter(model)
+        self.budget = settings.AI_PROMPT_TOKEN_BUDGET if budget is None else budget
+        self.max_categories = settings.AI_PROMPT_MAX_CATEGORIES if max_categories is None else max_categories
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(self.COUNTERS, 0)
+        self._last: Optional[Dict[str, Any]] = None
+
+    def fit(self, stage: str, render: Callable[[str], Tuple[str, ...]],
+            categories: Dict[str, float]) -> Tuple[Tuple[str, ...], int]:
+        """
+        render(categories_json) -> the prompt texts (e.g. system and user
+        message). Returns the texts for the most categories that fit the budget,
+        and their token count.
+        """
+        categories = categories or {}
+
+        def attempt(top_n: int):
+            texts = render(compact_json(compact_categories(categories, top_n)))
+            return texts, sum(self.counter.count(text) for text in texts)
+
+        high = min(len(categories), max(0, self.max_categories))
+        texts, tokens = attempt(high)
+        kept = high
+        if self.budget > 0 and tokens > self.budget:
+            # Largest category count whose prompt fits; 0 means everything is in "Other"
+            low, best = 0, None
+            while low < high:
+                mid = (low + high) // 2
+                candidate = attempt(mid)
+                if candidate[1] <= self.budget:
+                    best, kept, low = candidate, mid, mid + 1
+                else:
+                    high = mid
+            if best is None:
+                best, kept = attempt(0), 0
+            texts, tokens = best
+        self._record(stage, tokens, kept, len(categories))
+        return texts, tokens
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            last = dict(self._last) if self._last else None
+        return {
+            **counters,
+            "tokens_avg": round(counters["tokens_total"] / counters["prompts"], 1) if counters["prompts"] else None,
+            "budget": self.budget,
+            "max_categories": self.max_categories,
+            "exact_counts": self.counter.exact,
+            "last": last
+        }
+
+    def _record(self, stage: str, tokens: int, kept: int, total: int):
+        over = self.budget > 0 and tokens > self.budget
+        with self._lock:
+            self._counters["prompts"] += 1
+            self._counters["tokens_total"] += tokens
+            self._counters["tokens_max"] = max(self._counters["tokens_max"], tokens)
+            self._counters["trimmed"] += kept < total
+            self._counters["over_budget"] += over
+            self._last = {"stage": stage, "tokens": tokens, "categories": total, "categories_kept": kept}
+        logger.debug("AI PROMPT %s: %d tokens, %d/%d categories%s", stage, tokens, kept, total,
+                     f" (over the {self.budget}-token budget)" if over else "")
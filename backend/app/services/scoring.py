@@ -0,0 +1,109 @@
+from typing import Any, Dict
+
+import numpy as np
+
+# Rule-based health scoring, shared by AIEngine._rule_based_analysis (one upload)
+# and score_batch (a portfolio). Bump SCORING_VERSION when changing any of these
+# so scripts/rescore_uploads.py re-scores stored uploads.
+SCORING_VERSION = 1
+BASE_SCORE = 65
+MAX_SCORE = 92
+PROFIT_POINTS = 15              # net profit > 0
+GOOD_MARGIN_PCT = 20
+GOOD_MARGIN_POINTS = 10         # profit margin above GOOD_MARGIN_PCT
+AR_BELOW_AP_POINTS = 5          # 0 < receivables < payables
+HIGH_DEBT_REVENUE_SHARE = 0.4
+HIGH_DEBT_PENALTY = 20          # debt above that share of revenue
+LOW_MARGIN_PCT = 15
+LOW_MARGIN_PENALTY = 10         # profit margin below LOW_MARGIN_PCT
+HIGH_AR_REVENUE_SHARE = 0.2     # receivables above that share of revenue: collection risk
+HEALTHY_SCORE = 70              # scores above this are "healthy"
+CREDIT_SCORE_FACTOR = 0.9
+# Expense ratio (%) above which operating costs are flagged, and the savings target
+HIGH_EXPENSE_RATIO_PCT = 30
+VERY_HIGH_EXPENSE_RATIO_PCT = 50
+SAVINGS_TARGETS_PCT = (5, 10, 15)  # ratio <= 30, 30 < ratio < 50, ratio >= 50
+
+WORKING_CAPITAL_STATUSES = ("Good", "Warning", "Critical")
+PRODUCTS = ("working_capital_loan", "invoice_financing", "expansion_loan")
+
+
+def score(revenue: float, profit: float, margin: float, ar: float, ap: float, debt: float,
+          expense_ratio: float) -> Dict[str, Any]:
+    """Scores of one upload: the scalar reference score_batch must match exactly."""
+    is_high_ar = ar > (revenue * HIGH_AR_REVENUE_SHARE)
+    is_low_margin = margin < LOW_MARGIN_PCT
+    is_high_debt = debt > (revenue * HIGH_DEBT_REVENUE_SHARE)
+
+    points = BASE_SCORE
+    if profit > 0: points += PROFIT_POINTS
+    if margin > GOOD_MARGIN_PCT: points += GOOD_MARGIN_POINTS
+    if ar < ap and ar > 0: points += AR_BELOW_AP_POINTS
+    if is_high_debt: points -= HIGH_DEBT_PENALTY
+    if is_low_margin: points -= LOW_MARGIN_PENALTY
+    final_score = min(MAX_SCORE, max(0, points))
+    healthy = final_score > HEALTHY_SCORE
+
+    if is_high_ar:
+        working_capital, product = "Warning", "invoice_financing"
+    else:
+        working_capital = "Critical" if ap > ar and ar > 0 else "Good"
+        product = "expansion_loan" if profit > 0 and healthy else "working_capital_loan"
+
+    if expense_ratio > HIGH_EXPENSE_RATIO_PCT:
+        savings = SAVINGS_TARGETS_PCT[1] if expense_ratio < VERY_HIGH_EXPENSE_RATIO_PCT else SAVINGS_TARGETS_PCT[2]
+    else:
+        savings = SAVINGS_TARGETS_PCT[0]
+
+    return {
+        "health_score": final_score,
+        "healthy": healthy,
+        "high_ar": is_high_ar,
+        "working_capital_status": working_capital,
+        "product": product,
+        "creditworthiness_score": int(final_score * CREDIT_SCORE_FACTOR),
+        "savings_target": savings
+    }
+
+
+def score_batch(revenue, profit, margin, ar, ap, debt, expense_ratio) -> Dict[str, np.ndarray]:
+    """
+    score() over columnar inputs (array-likes of equal length) in vectorized
+    NumPy: the same keys, each an array with one entry per upload. Missing
+    values should be passed as 0 (as stored uploads default them); NaN compares
+    false exactly like in score().
+    """
+    revenue, profit, margin, ar, ap, debt, expense_ratio = (
+        np.asarray(values, dtype='float64') for values in (revenue, profit, margin, ar, ap, debt, expense_ratio)
+    )
+    high_ar = ar > revenue * HIGH_AR_REVENUE_SHARE
+    high_debt = debt > revenue * HIGH_DEBT_REVENUE_SHARE
+    low_margin = margin < LOW_MARGIN_PCT
+
+    points = np.full(revenue.shape, BASE_SCORE, dtype='int64')
+    points += np.where(profit > 0, PROFIT_POINTS, 0)
+    points += np.where(margin > GOOD_MARGIN_PCT, GOOD_MARGIN_POINTS, 0)
+    points += np.where((ar < ap) & (ar > 0), AR_BELOW_AP_POINTS, 0)
+    points -= np.where(high_debt, HIGH_DEBT_PENALTY, 0)
+    points -= np.where(low_margin, LOW_MARGIN_PENALTY, 0)
+    final_score = np.clip(points, 0, MAX_SCORE)
+    healthy = final_score > HEALTHY_SCORE
+
+    working_capital = np.select([high_ar, (ap > ar) & (ar > 0)], [1, 2], 0)
+    product = np.select([high_ar, (profit > 0) & healthy], [1, 2], 0)
+    savings = np.where(
+        expense_ratio > HIGH_EXPENSE_RATIO_PCT,
+        np.where(expense_ratio < VERY_HIGH_EXPENSE_RATIO_PCT, SAVINGS_TARGETS_PCT[1], SAVINGS_TARGETS_PCT[2]),
+        SAVINGS_TARGETS_PCT[0]
+    )
+
+    return {
+        "health_score": final_score,
+        "healthy": healthy,
+        "high_ar": high_ar,
+        "working_capital_status": np.asarray(WORKING_CAPITAL_STATUSES, dtype=object)[working_capital],
+        "product": np.asarray(PRODUCTS, dtype=object)[product],
+        # final_score >= 0, so floor == int() truncation
+        "creditworthiness_score": np.floor(final_score * CREDIT_SCORE_FACTOR).astype('int64'),
+        "savings_target": savings.astype('int64')
+    }
@@ -0,0 +1,90 @@
+import time
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+from app.services.scoring import score, score_batch
+
+# Scenario adjustments, in the order of the surface's dimensions:
+# share of expenses cut, share of receivables collected, share of debt repaid, revenue change
+SCENARIO_AXES = ("expense_cut", "ar_collected", "debt_paydown", "revenue_growth")
+PROJECTED = ("total_revenue", "total_expenses", "net_profit", "profit_margin", "expense_ratio",
+             "accounts_receivable", "accounts_payable", "total_debt")
+
+
+def project(metrics: Dict[str, float], expense_cut, ar_collected, debt_paydown, revenue_growth) -> Dict[str, np.ndarray]:
+    """
+    The upload's metrics after the adjustments (arrays broadcast together).
+    Profit moves by the revenue and expense changes; margin and expense ratio
+    are recomputed like DataProcessor does (0 without revenue).
+    """
+    revenue0 = float(metrics.get('total_revenue') or 0.0)
+    expenses0 = float(metrics.get('total_expenses') or 0.0)
+    revenue = revenue0 * (1 + np.asarray(revenue_growth, dtype='float64'))
+    expenses = expenses0 * (1 - np.asarray(expense_cut, dtype='float64'))
+    revenue, expenses = np.broadcast_arrays(revenue, expenses)
+    profit = float(metrics.get('net_profit') or 0.0) + (revenue - revenue0) - (expenses - expenses0)
+    has_revenue = revenue > 0
+    safe_revenue = np.where(has_revenue, revenue, 1.0)
+    return {
+        "total_revenue": revenue,
+        "total_expenses": expenses,
+        "net_profit": profit,
+        "profit_margin": np.where(has_revenue, profit / safe_revenue * 100, 0.0),
+        "expense_ratio": np.where(has_revenue, expenses / safe_revenue * 100, 0.0),
+        "accounts_receivable": np.broadcast_to(
+            float(metrics.get('accounts_receivable') or 0.0) * (1 - np.asarray(ar_collected, dtype='float64')), revenue.shape),
+        "accounts_payable": np.full(revenue.shape, float(metrics.get('accounts_payable') or 0.0)),
+        "total_debt": np.broadcast_to(
+            float(metrics.get('total_debt') or 0.0) * (1 - np.asarray(debt_paydown, dtype='float64')), revenue.shape),
+    }
+
+
+def simulate(metrics: Dict[str, float], axes: Dict[str, Sequence[float]], top: int = 10) -> Dict[str, Any]:
+    """
+    Score every combination of the scenario axes' values with the rule-based
+    scorer in one vectorized pass. Returns the baseline, the health score
+    surface (nested lists indexed in SCENARIO_AXES order) and the top scenarios:
+    highest score first, and among equal scores the smallest adjustments
+    (each axis's |value| relative to its largest, summed).
+    """
+    started = time.perf_counter()
+    values = [np.asarray(axes[name], dtype='float64') for name in SCENARIO_AXES]
+    grid = [g.ravel() for g in np.meshgrid(*values, indexing='ij')]
+    projected = project(metrics, *grid)
+    scores = score_batch(*(projected[name] for name in (
+        "total_revenue", "net_profit", "profit_margin", "accounts_receivable", "accounts_payable", "total_debt", "expense_ratio"
+    )))
+
+    scale = [np.abs(v).max() if v.size and np.abs(v).max() > 0 else 1.0 for v in values]
+    effort = sum(np.abs(g) / s for g, s in zip(grid, scale))
+    order = np.lexsort((effort, -scores["health_score"]))[:max(0, top)]
+
+    def scenario(i: int) -> Dict[str, Any]:
+        return {
+            "adjustments": {name: float(g[i]) for name, g in zip(SCENARIO_AXES, grid)},
+            "health_score": int(scores["health_score"][i]),
+            "status": "healthy" if scores["healthy"][i] else "at_risk",
+            "working_capital_status": scores["working_capital_status"][i],
+            "product": scores["product"][i],
+            "creditworthiness_score": int(scores["creditworthiness_score"][i]),
+            "projected": {name: round(float(projected[name][i]), 2) for name in PROJECTED}
+        }
+
+    baseline = score(*(float(metrics.get(name) or 0.0) for name in (
+        "total_revenue", "net_profit", "profit_margin", "accounts_receivable", "accounts_payable", "total_debt", "expense_ratio"
+    )))
+    return {
+        "baseline": {
+            "health_score": baseline["health_score"],
+            "status": "healthy" if baseline["healthy"] else "at_risk",
+            "working_capital_status": baseline["working_capital_status"],
+            "product": baseline["product"],
+            "creditworthiness_score": baseline["creditworthiness_score"],
+        },
+        "axes": {name: v.tolist() for name, v in zip(SCENARIO_AXES, values)},
+        "points": int(grid[0].size),
+        "surface": scores["health_score"].reshape([v.size for v in values]).tolist(),
+        "best": [scenario(int(i)) for i in order],
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
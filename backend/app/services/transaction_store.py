@@ -0,0 +1,173 @@
+import os
+import uuid
+from datetime import timedelta
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.parquet.encryption as pe
+
+from app.core.config import settings
+from app.core.security import encryption_service
+
+# Normalized transaction layout produced by DataProcessor._apply_column_mapping
+TRANSACTION_SCHEMA = pa.schema([
+    ("amount", pa.float64()),
+    ("type", pa.string()),
+    ("date", pa.timestamp("ns")),
+    ("category", pa.string()),
+    ("customer", pa.string()),
+    ("tax", pa.float64()),
+])
+TRANSACTION_COLUMNS = TRANSACTION_SCHEMA.names
+TEXT_COLUMNS = [field.name for field in TRANSACTION_SCHEMA if pa.types.is_string(field.type)]
+# Low-cardinality columns read back as categoricals
+DICTIONARY_COLUMNS = ["type", "category", "customer"]
+MASTER_KEY_ID = "finsight-transactions"
+# Files are written under this suffix and renamed into place once complete
+PARTIAL_SUFFIX = ".partial"
+
+
+def _is_text(values: pd.Series) -> bool:
+    if isinstance(values.dtype, pd.StringDtype):
+        return True
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.cat.categories
+    return pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty")
+
+
+def _as_text(values: pd.Series) -> pd.Series:
+    """values as str with nulls kept, e.g. a customer column mixing ids and names (123, 'abc')."""
+    return values.astype(str).where(values.notna(), None)
+
+
+class _FernetKmsClient(pe.KmsClient):
+    """Wraps Parquet data keys with the application's Fernet key, so no external KMS is needed."""
+    def __init__(self):
+        pe.KmsClient.__init__(self)
+
+    def wrap_key(self, key_bytes: bytes, master_key_identifier: str) -> str:
+        return encryption_service.fernet.encrypt(key_bytes).decode()
+
+    def unwrap_key(self, wrapped_key: str, master_key_identifier: str) -> bytes:
+        return encryption_service.fernet.decrypt(wrapped_key.encode())
+
+
+class TransactionWriter:
+    """
+    Appends normalized transaction frames to an encrypted Parquet file, one row
+    group per frame. The file is opened on the first write under path +
+    PARTIAL_SUFFIX and only renamed to path by close(), so an interrupted write
+    never leaves a half-written file at path; abort() removes it.
+    """
+    def __init__(self, store: "TransactionStore", path: str):
+        self.store = store
+        self.path = path
+        self.rows = 0
+        self._writer = None
+
+    def write(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        frame = df[TRANSACTION_COLUMNS]
+        dates = frame['date']
+        if isinstance(dates.dtype, pd.DatetimeTZDtype):
+            frame = frame.assign(date=dates.dt.tz_convert(None))
+        elif not pd.api.types.is_datetime64_any_dtype(dates):
+            frame = frame.assign(date=pd.to_datetime(dates, errors='coerce'))
+        mixed = {col: _as_text(frame[col]) for col in TEXT_COLUMNS if not _is_text(frame[col])}
+        if mixed:
+            frame = frame.assign(**mixed)
+        table = pa.Table.from_pandas(frame, preserve_index=False).cast(TRANSACTION_SCHEMA)
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._writer = pq.ParquetWriter(
+                self.path + PARTIAL_SUFFIX, TRANSACTION_SCHEMA,
+                compression=settings.TRANSACTION_STORE_COMPRESSION,
+                encryption_properties=self.store.encryption_properties()
+            )
+        self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self) -> Optional[dict]:
+        """Finish the file and return its link ({"path", "rows", "size_bytes"}), or None if nothing was written."""
+        if self._writer is None:
+            return None
+        self._writer.close()
+        self._writer = None
+        os.replace(self.path + PARTIAL_SUFFIX, self.path)
+        return {"path": self.path, "rows": self.rows, "size_bytes": os.path.getsize(self.path)}
+
+    def abort(self):
+        """Discard everything written so far; the writer can be reused from scratch."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self.rows = 0
+        self.store.delete(self.path)
+
+
+class TransactionStore:
+    """
+    Per-upload normalized transactions in compressed, encrypted Parquet files.
+
+    Every column is encrypted with Parquet modular encryption (AES-GCM data keys
+    wrapped by the app's Fernet key), so readers can memory-map a file and decrypt
+    only the columns they scan. Re-analysis never needs the original CSV/Excel.
+    """
+    def __init__(self, root: str = None):
+        self.root = root or settings.TRANSACTION_STORE_DIR
+        self._crypto = pe.CryptoFactory(lambda kms_connection_config: _FernetKmsClient())
+        self._kms = pe.KmsConnectionConfig()
+
+    def new_path(self, company_id: int) -> str:
+        return os.path.abspath(os.path.join(self.root, str(company_id), f"{uuid.uuid4().hex}.parquet"))
+
+    def writer(self, path: str) -> TransactionWriter:
+        return TransactionWriter(self, path)
+
+    def encryption_properties(self):
+        config = pe.EncryptionConfiguration(
+            footer_key=MASTER_KEY_ID,
+            column_keys={MASTER_KEY_ID: TRANSACTION_COLUMNS},
+            encryption_algorithm="AES_GCM_V1",
+            data_key_length_bits=256,
+            cache_lifetime=timedelta(minutes=10)
+        )
+        return self._crypto.file_encryption_properties(self._kms, config)
+
+    def decryption_properties(self):
+        config = pe.DecryptionConfiguration(cache_lifetime=timedelta(minutes=10))
+        return self._crypto.file_decryption_properties(self._kms, config)
+
+    def read(self, path: str, columns: Optional[List[str]] = None, filters=None) -> pd.DataFrame:
+        """
+        Load the given columns (default: all) of an upload's transactions. The file
+        is memory-mapped and only the requested column chunks are decrypted.
+        filters uses pyarrow's row-group predicate syntax, e.g. [("type", "==", "expense")].
+        """
+        columns = columns or TRANSACTION_COLUMNS
+        table = pq.read_table(
+            path,
+            columns=columns,
+            filters=filters,
+            memory_map=True,
+            read_dictionary=[col for col in DICTIONARY_COLUMNS if col in columns],
+            decryption_properties=self.decryption_properties()
+        )
+        return table.to_pandas()
+
+    @staticmethod
+    def delete(path: Optional[str]):
+        """Remove an upload's file, and its partial file if a write to it never finished."""
+        if not path:
+            return
+        for candidate in (path, path + PARTIAL_SUFFIX):
+            try:
+                os.remove(candidate)
+            except FileNotFoundError:
+                pass
+
+
+transaction_store = TransactionStore()
@@ -0,0 +1,102 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable
+
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.security import encryption_service
+from app.models.database import TranslationCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationCache:
+    """
+    Translated analysis strings keyed by the sha256 of the source text and the
+    target language, so each string is sent for translation once. An in-process
+    LRU sits in front of the translation_cache table (texts encrypted).
+    """
+    def __init__(self, max_entries: int = None):
+        self.max_entries = settings.TRANSLATION_CACHE_SIZE if max_entries is None else max_entries
+        self._lru = OrderedDict()  # (content_hash, language) -> translated text
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get_many(self, texts: Iterable[str], language: str) -> Dict[str, str]:
+        """Cached translations of the given texts; texts never translated are left out. Blocking."""
+        found, missing = {}, {}
+        with self._lock:
+            for text in texts:
+                key = (self.content_hash(text), language)
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    found[text] = self._lru[key]
+                else:
+                    missing[key[0]] = text
+        if not missing:
+            return found
+
+        try:
+            with SessionLocal() as db:
+                rows = db.query(TranslationCacheEntry.content_hash, TranslationCacheEntry.encrypted_text).filter(
+                    TranslationCacheEntry.language == language,
+                    TranslationCacheEntry.content_hash.in_(list(missing))
+                ).all()
+        except Exception as e:
+            logger.warning("TRANSLATION CACHE: lookup failed (%s)", e)
+            return found
+        for content_hash, sealed in rows:
+            translated = encryption_service.decrypt(sealed)
+            found[missing[content_hash]] = translated
+            self._remember((content_hash, language), translated)
+        return found
+
+    def put_many(self, translations: Dict[str, str], language: str):
+        """Store source text -> translation pairs. Blocking."""
+        if not translations:
+            return
+        for text, translated in translations.items():
+            self._remember((self.content_hash(text), language), translated)
+
+        def entry(text: str, translated: str) -> TranslationCacheEntry:
+            return TranslationCacheEntry(
+                content_hash=self.content_hash(text),
+                language=language,
+                encrypted_text=encryption_service.encrypt(translated)
+            )
+
+        try:
+            with SessionLocal() as db:
+                db.add_all([entry(text, translated) for text, translated in translations.items()])
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # Some were stored concurrently; keep the rest one by one
+                    db.rollback()
+                    for text, translated in translations.items():
+                        db.add(entry(text, translated))
+                        try:
+                            db.commit()
+                        except IntegrityError:
+                            db.rollback()
+        except Exception as e:
+            logger.warning("TRANSLATION CACHE: store failed (%s)", e)
+
+    def _remember(self, key, translated: str):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._lru[key] = translated
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+
+translation_cache = TranslationCache()
@@ -0,0 +1,127 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Every narrative string _rule_based_analysis can produce, per language.
+# {placeholders} carry pre-formatted values and must appear in every language.
+RULE_STRINGS: Dict[str, Dict[str, str]] = {
+    "status_healthy": {"en": "Healthy", "hi": "स्वस्थ"},
+    "status_at_risk": {"en": "At Risk", "hi": "जोखिम में"},
+    "status_critical": {"en": "Critical", "hi": "गंभीर"},
+    "summary_healthy": {
+        "en": "Business is Healthy with a score of {score}. Revenue is ${revenue}.",
+        "hi": "व्यवसाय {score} के स्कोर के साथ स्वस्थ है। राजस्व ${revenue} है।",
+    },
+    "summary_at_risk": {
+        "en": "Business is At Risk with a score of {score}. Revenue is ${revenue}.",
+        "hi": "व्यवसाय {score} के स्कोर के साथ जोखिम में है। राजस्व ${revenue} है।",
+    },
+    "cost_operating_area": {"en": "Operating Expenses", "hi": "परिचालन व्यय (Operating Expenses)"},
+    "cost_operating_suggestion": {
+        "en": "Operating expenses are {ratio}% of revenue. Recommended: reduce marketing & admin costs by {target}-{target_high}%.",
+        "hi": "व्यय अनुपात {ratio}% है। विपणन और व्यवस्थापक लागत को {target}-{target_high}% तक कम करने की सिफारिश की जाती है।",
+    },
+    "cost_fixed_area": {"en": "Fixed Costs", "hi": "फिक्स्ड कॉस्ट (Fixed Costs)"},
+    "cost_fixed_suggestion": {
+        "en": "Renegotiate utilities and rent for better margins.",
+        "hi": "बेहतर मार्जिन के लिए उपयोगिताओं और किराए पर फिर से बातचीत करें।",
+    },
+    "product_invoice_financing": {"en": "Invoice Financing", "hi": "चालान वित्तपोषण (Invoice Financing)"},
+    "product_invoice_financing_rationale": {
+        "en": "High receivables detected. Use invoice financing to unlock cash flow.",
+        "hi": "आपके पास उच्च प्राप्य खाते (AR) हैं। नकदी प्रवाह के लिए इनका उपयोग करें।",
+    },
+    "product_expansion_loan": {"en": "Business Expansion Loan", "hi": "व्यापार विस्तार ऋण (Business Expansion Loan)"},
+    "product_expansion_loan_rationale": {
+        "en": "Eligible for growth capital based on strong health score and profitability.",
+        "hi": "मजबूत स्वास्थ्य स्कोर और लाभप्रदता के आधार पर विकास के लिए पात्र।",
+    },
+    "product_working_capital_loan": {"en": "Working Capital Loan", "hi": "कार्यशील पूंजी ऋण (Working Capital Loan)"},
+    "product_working_capital_loan_rationale": {
+        "en": "To maintain smooth day-to-day operations.",
+        "hi": "दैनिक कार्यों को सुचारू रूप से चलाने के लिए।",
+    },
+    "working_capital_balanced": {"en": "Working capital cycle is balanced.", "hi": "कार्यशील पूंजी चक्र संतुलित है।"},
+    "working_capital_high_ar": {
+        "en": "High receivables indicate delays in collection - cash flow risk.",
+        "hi": "उच्च प्राप्य राशि (AR) संग्रह में देरी का संकेत देती है - नकदी प्रवाह जोखिम।",
+    },
+    "working_capital_payables": {
+        "en": "Payables exceed receivables. Supplier trust risk may increase.",
+        "hi": "देय राशि प्राप्य से अधिक है। आपूर्तिकर्ता विश्वास जोखिम बढ़ सकता है।",
+    },
+    "risk_liquidity": {"en": "Liquidity", "hi": "तरलता (Liquidity)"},
+    "risk_liquidity_message": {
+        "en": "Closely monitor collection cycle to maintain cash flow.",
+        "hi": "नकदी प्रवाह बनाए रखने के लिए संग्रह चक्र की बारीकी से निगरानी करें।",
+    },
+    "recommendation_tax_compliance": {"en": "Tax Compliance", "hi": "कर अनुपालन (Tax Compliance)"},
+    "recommendation_tax_compliance_impact": {"en": "Reduce legal risk", "hi": "कानूनी जोखिम कम करें"},
+    "bookkeeping_good": {"en": "Good", "hi": "अच्छी"},
+    "bookkeeping_needs_improvement": {"en": "Needs Improvement", "hi": "सुधार की आवश्यकता है"},
+    "tax_insights": {
+        "en": "Check GST returns and ensure TDS reconciliation.",
+        "hi": "जीएसटी रिटर्न की जांच करें और टीडीएस मिलान सुनिश्चित करें।",
+    },
+    "credit_rationale": {
+        "en": "Consistent income and debt management history.",
+        "hi": "स्थिर आय और ऋण प्रबंधन इतिहास।",
+    },
+    "benchmark_above_average": {"en": "Above Average", "hi": "औसत से ऊपर"},
+    "benchmark_average": {"en": "Average", "hi": "औसत"},
+    "forecast_growth": {
+        "en": "Expected 10-15% growth over 12 months.",
+        "hi": "12 महीनों में 10-15% विकास की उम्मीद है।",
+    },
+}
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+def rule_text(key: str, language: str, **values) -> str:
+    """A rule-based string in the given language (English when it has no entry)."""
+    entry = RULE_STRINGS[key]
+    return entry.get(language, entry["en"]).format(**values)
+
+
+class TranslationCatalog:
+    """
+    RULE_STRINGS compiled for lookups in the other direction: any rendered rule
+    string, in any language, is recognized and re-rendered in the target language
+    with the same placeholder values. Fixed strings are a dict lookup; templates
+    are matched against regexes compiled once at startup.
+    """
+    def __init__(self, strings: Dict[str, Dict[str, str]] = None):
+        self.strings = strings or RULE_STRINGS
+        self._exact: Dict[str, str] = {}
+        self._patterns: List[Tuple[re.Pattern, str]] = []
+        for key, variants in self.strings.items():
+            for text in variants.values():
+                if _PLACEHOLDER.search(text):
+                    self._patterns.append((self._compile(text), key))
+                else:
+                    self._exact[text] = key
+
+    @staticmethod
+    def _compile(template: str) -> re.Pattern:
+        parts, last = [], 0
+        for match in _PLACEHOLDER.finditer(template):
+            parts.append(re.escape(template[last:match.start()]))
+            parts.append(f"(?P<{match.group(1)}>.+?)")
+            last = match.end()
+        parts.append(re.escape(template[last:]))
+        return re.compile("".join(parts))
+
+    def translate(self, text: str, language: str) -> Optional[str]:
+        """The text in the target language, or None when it is not a catalog string."""
+        key = self._exact.get(text)
+        if key is not None:
+            return self.strings[key].get(language)
+        for pattern, key in self._patterns:
+            match = pattern.fullmatch(text)
+            if match:
+                target = self.strings[key].get(language)
+                return target.format(**match.groupdict()) if target else None
+        return None
+
+
+translation_catalog = TranslationCatalog()
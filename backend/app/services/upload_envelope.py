@@ -0,0 +1,121 @@
+import json
+import logging
+import zlib
+from datetime import datetime
+from typing import Any, Dict
+
+from cryptography.fernet import InvalidToken
+
+from app.core.security import encryption_service
+from app.models.database import FinancialUpload, UploadEnvelope
+
+# Sealed plaintext: one version byte, then the zlib-compressed JSON payload.
+# Bump ENVELOPE_VERSION when changing the layout or the fields so
+# scripts/seal_uploads.py re-seals stored uploads.
+ENVELOPE_VERSION = 1
+COMPRESSION_LEVEL = 6
+
+# Sealed field -> (the per-field FinancialUpload column it replaces, empty value)
+SEALED_FIELDS = {
+    "categories": ("encrypted_categories", dict),
+    "top_expenses": ("encrypted_top_expenses", list),
+    "monthly_breakdown": ("encrypted_monthly_breakdown", list),
+    "summary": ("encrypted_summary", str),
+    "risks": ("encrypted_risks", list),
+    "recommendations": ("encrypted_recommendations", list),
+    "working_capital_analysis": ("encrypted_working_capital_analysis", dict),
+    "cost_optimization": ("encrypted_cost_optimization", list),
+    "financial_products": ("encrypted_financial_products", list),
+    "bookkeeping_tax_compliance": ("encrypted_bookkeeping_tax", dict),
+    "credit_rationale": ("encrypted_credit_rationale", str),
+    # Only kept in the report content before envelopes
+    "generic_metadata": (None, dict),
+}
+LEGACY_COLUMNS = tuple(column for column, _ in SEALED_FIELDS.values() if column)
+
+logger = logging.getLogger(__name__)
+
+
+def seal(payload: Dict[str, Any]) -> str:
+    """The envelope token of payload (SEALED_FIELDS keys): one compression and one encryption."""
+    body = zlib.compress(json.dumps(payload, separators=(",", ":")).encode(), COMPRESSION_LEVEL)
+    return encryption_service.fernet.encrypt(bytes([ENVELOPE_VERSION]) + body).decode()
+
+
+def unseal(token: str) -> Dict[str, Any]:
+    """The payload of an envelope token, every SEALED_FIELDS key present; one decryption."""
+    try:
+        plaintext = encryption_service.fernet.decrypt(token.encode())
+    except InvalidToken:
+        raise ValueError("Upload envelope cannot be decrypted (was SECRET_KEY changed?)") from None
+    version = plaintext[0] if plaintext else None
+    if version != ENVELOPE_VERSION:
+        raise ValueError(f"Unsupported upload envelope version {version}")
+    payload = json.loads(zlib.decompress(plaintext[1:]))
+    return {field: payload[field] if field in payload else empty() for field, (_, empty) in SEALED_FIELDS.items()}
+
+
+def legacy_payload(upload: FinancialUpload) -> Dict[str, Any]:
+    """
+    The sealed fields of an upload stored before envelopes, decrypted column by
+    column. generic_metadata is missing: it lives in the upload's report.
+    """
+    payload = {}
+    for field, (column, empty) in SEALED_FIELDS.items():
+        if column is None:
+            continue
+        value = getattr(upload, column)
+        if empty is str:
+            payload[field] = encryption_service.decrypt(value)
+        else:
+            payload[field] = json.loads(encryption_service.decrypt(value)) if value else empty()
+    return payload
+
+
+def open_upload(upload: FinancialUpload) -> Dict[str, Any]:
+    """
+    Every sealed field of an upload: from its envelope (a single decryption) or,
+    until scripts/seal_uploads.py has run, from its per-field columns (see
+    legacy_payload). The upload must be attached to a session.
+    """
+    envelope = upload.envelope
+    if envelope is not None:
+        return unseal(envelope.sealed)
+    return legacy_payload(upload)
+
+
+def read_upload(upload: FinancialUpload) -> Dict[str, Any]:
+    """
+    open_upload for display, which must not fail on one unreadable upload: an
+    envelope this release cannot open (sealed under another SECRET_KEY, or a newer
+    ENVELOPE_VERSION) falls back to the per-field columns when they were kept
+    (store with drop_legacy=False), else to empty fields. Logs a warning.
+    """
+    try:
+        return open_upload(upload)
+    except ValueError as e:
+        logger.warning("Upload %s: %s; showing it without its envelope", upload.id, e)
+    if any(getattr(upload, column) for column in LEGACY_COLUMNS):
+        try:
+            return legacy_payload(upload)
+        except ValueError as e:
+            logger.warning("Upload %s: per-field columns unreadable too (%s)", upload.id, e)
+    return {field: empty() for field, (_, empty) in SEALED_FIELDS.items()}
+
+
+def store(upload: FinancialUpload, payload: Dict[str, Any], drop_legacy: bool = True):
+    """
+    Seal payload into the upload's envelope, created if it has none. The
+    per-field columns are cleared unless drop_legacy is False (which keeps an
+    older release able to read the upload).
+    """
+    token = seal(payload)
+    if upload.envelope is None:
+        upload.envelope = UploadEnvelope(sealed=token, version=ENVELOPE_VERSION)
+    else:
+        upload.envelope.sealed = token
+        upload.envelope.version = ENVELOPE_VERSION
+        upload.envelope.sealed_at = datetime.utcnow()
+    if drop_legacy:
+        for column in LEGACY_COLUMNS:
+            setattr(upload, column, None)
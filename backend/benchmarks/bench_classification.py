@@ -0,0 +1,78 @@
+"""
+Benchmark: row-wise lambda keyword matching vs KeywordClassifier.
+
+Run from the backend directory:
+    python -m benchmarks.bench_classification [rows]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from app.services.data_processor import DataProcessor, _SummaryAccumulator
+
+CATEGORIES = [
+    "Sales Revenue", "Office Rent", "Salaries", "Accounts Receivable", "Loan EMI",
+    "Raw Material Purchase", "Utilities", "Marketing", "Sundry Creditors Payable",
+    "Consulting Fee", "Inventory Adjustment", "Interest on Bank Loan",
+]
+TYPES = ["Income", "Expense", "Receipt", "Payment", "credit", "debit"]
+
+
+def build_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    return pd.DataFrame({
+        "amount": rng.integers(100, 100000, rows).astype("float64"),
+        "category": np.array(CATEGORIES, dtype=object)[rng.integers(0, len(CATEGORIES), rows)],
+        "type": np.array(TYPES, dtype=object)[rng.integers(0, len(TYPES), rows)],
+    })
+
+
+def legacy(df: pd.DataFrame):
+    income_keywords = ['income', 'revenue', 'credit', 'receipt', 'sale', 'sales']
+    standard_type = df['type'].astype(str).str.lower().apply(
+        lambda x: 'income' if any(k in x for k in income_keywords) else 'expense'
+    )
+    lowered = df['category'].astype(str).str.lower()
+    buckets = {}
+    for name, keywords in _SummaryAccumulator.BUCKET_KEYWORDS.items():
+        mask = lowered.apply(lambda x: any(k in x for k in keywords))
+        buckets[name] = float(df[mask]['amount'].sum())
+    return standard_type.to_numpy(), buckets
+
+
+def vectorized(df: pd.DataFrame):
+    is_income = DataProcessor.TYPE_CLASSIFIER.masks(df['type'])['income']
+    standard_type = np.where(is_income, 'income', 'expense')
+    buckets = _SummaryAccumulator.BUCKET_CLASSIFIER.bucket_sums(df['category'], df['amount'])
+    return standard_type, buckets
+
+
+def timed(fn, df, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = build_frame(rows)
+
+    legacy_time, (legacy_types, legacy_buckets) = timed(legacy, df)
+    fast_time, (fast_types, fast_buckets) = timed(vectorized, df)
+
+    assert (legacy_types == fast_types).all()
+    for name, total in legacy_buckets.items():
+        assert abs(total - fast_buckets[name]) <= 1e-6 * max(1.0, abs(total)), name
+
+    print(f"rows:       {rows:,}")
+    print(f"legacy:     {legacy_time * 1000:,.1f} ms")
+    print(f"vectorized: {fast_time * 1000:,.1f} ms")
+    print(f"speedup:    {legacy_time / fast_time:,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: pandas C parser vs the multithreaded Arrow CSV engine.
+
+Each ledger in 'Sample data/' is first checked for identical output: the parsed
+frames must be equal (values and dtypes) and process_file must return the same
+result with either engine. The ledgers are then repeated up to the requested
+row count and timed. Run from the backend directory:
+    python -m benchmarks.bench_csv_engine [rows]
+"""
+import os
+import sys
+import glob
+import json
+import time
+import tempfile
+import pandas as pd
+
+from app.core.config import settings
+from app.services.csv_reader import CSVReader
+from app.services.data_processor import DataProcessor
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "Sample data")
+
+
+def process(path: str, engine: str):
+    settings.CSV_ENGINE = engine
+    result = DataProcessor.process_file(path, os.path.basename(path))
+    result.pop('column_mapping', None)
+    return json.dumps(result, sort_keys=True, default=str)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    paths = sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.csv")))
+
+    for path in paths:
+        pd.testing.assert_frame_equal(CSVReader(path, "c").read(), CSVReader(path, "pyarrow").read())
+        assert process(path, "c") == process(path, "pyarrow"), path
+    print(f"{len(paths)} sample ledgers: identical frames and results with both engines\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'ledger':45} {'rows':>9} {'c':>8} {'pyarrow':>8} {'speedup':>8}")
+        for path in paths:
+            base = pd.read_csv(path)
+            big_path = os.path.join(tmp, os.path.basename(path))
+            pd.concat([base] * max(1, rows // len(base)), ignore_index=True).to_csv(big_path, index=False)
+
+            c_time, c_frame = timed(lambda: CSVReader(big_path, "c").read())
+            arrow_time, arrow_frame = timed(lambda: CSVReader(big_path, "pyarrow").read())
+            pd.testing.assert_frame_equal(c_frame, arrow_frame)
+
+            name = os.path.basename(path)
+            print(f"{name:45} {len(c_frame):>9,} {c_time:>7.2f}s {arrow_time:>7.2f}s {c_time / arrow_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
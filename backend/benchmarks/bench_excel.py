@@ -0,0 +1,59 @@
+"""
+Benchmark: pd.read_excel (full workbook) vs the read-only ExcelBatchReader path.
+
+Each ledger in 'Sample data/' is written to .xlsx, repeated up to the requested
+row count, and processed both ways. Run from the backend directory:
+    python -m benchmarks.bench_excel [rows]
+"""
+import os
+import sys
+import glob
+import time
+import tempfile
+import pandas as pd
+
+from app.services.data_processor import DataProcessor
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "Sample data")
+KEYS = ["total_revenue", "total_expenses", "net_profit", "row_count", "accounts_receivable", "total_debt"]
+
+
+def legacy(path: str, name: str):
+    df = pd.read_excel(path)
+    summary = DataProcessor._analyze_dataframe(df, name)
+    summary['generic_metadata'] = DataProcessor._analyze_generic_dataset(df)
+    return summary
+
+
+def streaming(path: str, name: str):
+    return DataProcessor.process_file(path, name)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'ledger':45} {'rows':>8} {'read_excel':>11} {'streaming':>10} {'speedup':>8}")
+        for csv_path in sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.csv"))):
+            base = pd.read_csv(csv_path)
+            repeat = max(1, rows // len(base))
+            frame = pd.concat([base] * repeat, ignore_index=True)
+            name = os.path.splitext(os.path.basename(csv_path))[0] + ".xlsx"
+            xlsx_path = os.path.join(tmp, name)
+            frame.to_excel(xlsx_path, index=False)
+
+            legacy_time, old = timed(legacy, xlsx_path, name)
+            fast_time, new = timed(streaming, xlsx_path, name)
+            for key in KEYS:
+                assert abs(old[key] - new[key]) <= 1e-6 * max(1.0, abs(old[key])), (name, key, old[key], new[key])
+
+            print(f"{name:45} {len(frame):>8,} {legacy_time:>10.2f}s {fast_time:>9.2f}s {legacy_time / fast_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Startup check: how long `import app.main` takes in a fresh interpreter, and
+which heavy modules it loads.
+
+Each run imports the app in a new subprocess, so nothing is already in
+sys.modules, and records the wall time; a `-X importtime` run gives the
+per-package breakdown. The check fails (exit status 1) when the median import
+time is over the budget or when a module that should only load on first use
+(DEFERRED_MODULES) is imported at startup. --report writes the breakdown as
+markdown (benchmarks/startup_report.md is the checked-in one). Run from the
+backend directory:
+    python -m benchmarks.bench_startup [--runs N] [--budget-ms MS] [--report PATH]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import date
+
+# Loaded by the first request that needs them, never by importing the app
+DEFERRED_MODULES = ("pandas", "pyarrow", "openpyxl", "reportlab", "openai")
+DEFAULT_BUDGET_MS = 1500
+TOP_MODULES = 15
+# The probes import the app from the backend directory, wherever this is run from
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = (time.perf_counter() - started) * 1000
+print(json.dumps({{"ms": elapsed, "loaded": [m for m in {DEFERRED_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def run_probe() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], capture_output=True, text=True, check=True, cwd=BACKEND_DIR
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_times() -> list:
+    """(module, self µs, cumulative µs) for every module `import app.main` loads, in import order."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"], capture_output=True, text=True, check=True,
+        cwd=BACKEND_DIR
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if self_us.isdigit():
+            rows.append((name, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def report(runs: list, rows: list, budget_ms: float) -> str:
+    by_package = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    total_us = sum(by_package.values())
+    timings = [run["ms"] for run in runs]
+    lines = [
+        "# Backend startup: import time",
+        "",
+        f"Generated by `python -m benchmarks.bench_startup --report` on {date.today().isoformat()}"
+        f" (Python {platform.python_version()}, {platform.machine()}).",
+        "",
+        f"- `import app.main`: median {statistics.median(timings):.0f} ms over {len(timings)} fresh interpreters"
+        f" (min {min(timings):.0f} ms, max {max(timings):.0f} ms); budget {budget_ms:.0f} ms",
+        f"- Deferred modules loaded at startup: {', '.join(runs[0]['loaded']) or 'none'}",
+        "",
+        "## Self time by top-level package (`-X importtime`)",
+        "",
+        "| package | ms | share |",
+        "| --- | ---: | ---: |",
+    ]
+    for package, self_us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:TOP_MODULES]:
+        lines.append(f"| {package} | {self_us / 1000:.1f} | {self_us / total_us:.0%} |")
+    lines += [
+        "",
+        f"## Slowest {TOP_MODULES} modules by cumulative time",
+        "",
+        "| module | self ms | cumulative ms |",
+        "| --- | ---: | ---: |",
+    ]
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: row[2], reverse=True)[:TOP_MODULES]:
+        lines.append(f"| {name} | {self_us / 1000:.1f} | {cumulative_us / 1000:.1f} |")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    parser.add_argument("--report", nargs="?", const=os.path.join("benchmarks", "startup_report.md"), default=None,
+                        help="write the markdown report (default path: benchmarks/startup_report.md)")
+    args = parser.parse_args()
+
+    runs = [run_probe() for _ in range(max(1, args.runs))]
+    timings = [run["ms"] for run in runs]
+    median_ms = statistics.median(timings)
+    loaded = sorted({module for run in runs for module in run["loaded"]})
+    print(f"import app.main: median {median_ms:.0f} ms over {len(runs)} runs "
+          f"({', '.join(f'{ms:.0f}' for ms in timings)} ms); budget {args.budget_ms:.0f} ms")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(report(runs, import_times(), args.budget_ms))
+        print(f"Report written to {args.report}")
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    if loaded:
+        failures.append(f"deferred modules imported at startup: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
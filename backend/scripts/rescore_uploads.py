@@ -0,0 +1,92 @@
+"""
+Backfill: re-score stored uploads with the vectorized rule-based scorer
+(app.services.scoring.score_batch) and write the results to portfolio_scores.
+
+Run from the backend directory:
+    python -m scripts.rescore_uploads [--batch-size N] [--all] [--company ID]
+
+Uploads are read in id order, batch_size rows per query, so memory stays flat
+however many there are. By default only uploads without a score for the
+current SCORING_VERSION are scored; --all re-scores every upload.
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy import delete, insert, or_, select
+
+from app.core.database import SessionLocal, init_db
+from app.models.database import FinancialUpload, PortfolioScore
+from app.services.scoring import SCORING_VERSION, score_batch
+
+# score_batch's positional inputs, in order
+INPUT_COLUMNS = (
+    FinancialUpload.total_revenue, FinancialUpload.net_profit, FinancialUpload.profit_margin,
+    FinancialUpload.accounts_receivable, FinancialUpload.accounts_payable, FinancialUpload.total_debt,
+    FinancialUpload.expense_ratio,
+)
+
+
+def rescore(batch_size: int = 5000, rescore_all: bool = False, company_id: Optional[int] = None) -> Dict[str, int]:
+    init_db()
+    scored = batches = 0
+    last_id = 0
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        while True:
+            query = select(FinancialUpload.id, FinancialUpload.company_id, *INPUT_COLUMNS).where(FinancialUpload.id > last_id)
+            if company_id is not None:
+                query = query.where(FinancialUpload.company_id == company_id)
+            if not rescore_all:
+                query = query.outerjoin(PortfolioScore, PortfolioScore.upload_id == FinancialUpload.id).where(or_(
+                    PortfolioScore.upload_id.is_(None), PortfolioScore.scoring_version != SCORING_VERSION
+                ))
+            rows = db.execute(query.order_by(FinancialUpload.id).limit(batch_size)).all()
+            if not rows:
+                break
+
+            upload_ids = [row[0] for row in rows]
+            # NULL columns read as NaN; stored uploads default them to 0
+            inputs = np.nan_to_num(np.array([row[2:] for row in rows], dtype='float64'), nan=0.0)
+            scores = {name: values.tolist() for name, values in score_batch(*inputs.T).items()}
+            now = datetime.utcnow()
+            db.execute(delete(PortfolioScore).where(PortfolioScore.upload_id.in_(upload_ids)))
+            db.execute(insert(PortfolioScore), [
+                {
+                    "upload_id": upload_id,
+                    "company_id": rows[i][1],
+                    "health_score": scores["health_score"][i],
+                    "status": "healthy" if scores["healthy"][i] else "at_risk",
+                    "working_capital_status": scores["working_capital_status"][i],
+                    "product": scores["product"][i],
+                    "creditworthiness_score": scores["creditworthiness_score"][i],
+                    "savings_target": scores["savings_target"][i],
+                    "scoring_version": SCORING_VERSION,
+                    "scored_at": now,
+                }
+                for i, upload_id in enumerate(upload_ids)
+            ])
+            db.commit()
+
+            last_id = upload_ids[-1]
+            scored += len(rows)
+            batches += 1
+            elapsed = time.perf_counter() - started
+            print(f"RESCORE: {scored} uploads in {batches} batches ({scored / elapsed:,.0f}/s)")
+    return {"scored": scored, "batches": batches}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--all", action="store_true", help="re-score uploads already scored with this SCORING_VERSION")
+    parser.add_argument("--company", type=int, default=None, help="only this company's uploads")
+    args = parser.parse_args()
+    result = rescore(args.batch_size, args.all, args.company)
+    print(f"RESCORE: done, {result['scored']} uploads scored (scoring version {SCORING_VERSION})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Migration: seal the sensitive fields of uploads stored before envelopes (the
+per-field encrypted_* columns of FinancialUpload, plus generic_metadata from
+the upload's report) into one upload_envelopes row each (app.services.upload_envelope).
+
+Run from the backend directory:
+    python -m scripts.seal_uploads [--batch-size N] [--drop-legacy] [--company ID]
+
+Uploads are read in id order, batch_size rows per query, and each batch is
+committed on its own, so the script can be stopped and run again. Uploads
+without an envelope, or with one of an older ENVELOPE_VERSION, are sealed.
+The per-field columns are kept so the previous release can still read them;
+--drop-legacy clears them too (also for uploads sealed by an earlier run).
+Readers use the envelope whenever there is one.
+"""
+import argparse
+import json
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import selectinload
+
+from app.core.database import SessionLocal, init_db
+from app.core.security import encryption_service
+from app.models.database import FinancialUpload, Report, UploadEnvelope
+from app.services import upload_envelope
+from app.services.upload_envelope import ENVELOPE_VERSION, LEGACY_COLUMNS
+
+
+def seal_uploads(batch_size: int = 500, drop_legacy: bool = False, company_id: Optional[int] = None) -> Dict[str, int]:
+    init_db()
+    sealed = batches = 0
+    last_id = 0
+    started = time.perf_counter()
+    pending = [UploadEnvelope.upload_id.is_(None), UploadEnvelope.version != ENVELOPE_VERSION]
+    if drop_legacy:
+        pending += [getattr(FinancialUpload, column).isnot(None) for column in LEGACY_COLUMNS]
+    with SessionLocal() as db:
+        while True:
+            query = (
+                select(FinancialUpload)
+                .outerjoin(UploadEnvelope, UploadEnvelope.upload_id == FinancialUpload.id)
+                .where(FinancialUpload.id > last_id, or_(*pending))
+                .options(selectinload(FinancialUpload.envelope))
+            )
+            if company_id is not None:
+                query = query.where(FinancialUpload.company_id == company_id)
+            uploads = db.scalars(query.order_by(FinancialUpload.id).limit(batch_size)).all()
+            if not uploads:
+                break
+
+            upload_ids = [upload.id for upload in uploads]
+            reports = {
+                report.upload_id: report
+                for report in db.scalars(select(Report).where(Report.upload_id.in_(upload_ids)))
+            }
+            for upload in uploads:
+                if upload.envelope is not None and upload.envelope.version == ENVELOPE_VERSION:
+                    # Already sealed; only the per-field columns are left to clear
+                    payload = None
+                elif upload.envelope is not None:
+                    payload = upload_envelope.open_upload(upload)
+                else:
+                    payload = upload_envelope.legacy_payload(upload)
+                    report = reports.get(upload.id)
+                    content = json.loads(encryption_service.decrypt(report.encrypted_content)) if report else {}
+                    payload['generic_metadata'] = content.get('financial_data', {}).get('generic_metadata', {})
+                if payload is not None:
+                    upload_envelope.store(upload, payload, drop_legacy=drop_legacy)
+                elif drop_legacy:
+                    for column in LEGACY_COLUMNS:
+                        setattr(upload, column, None)
+            db.commit()
+
+            last_id = upload_ids[-1]
+            sealed += len(uploads)
+            batches += 1
+            elapsed = time.perf_counter() - started
+            print(f"SEAL: {sealed} uploads in {batches} batches ({sealed / elapsed:,.0f}/s)")
+    return {"sealed": sealed, "batches": batches}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--drop-legacy", action="store_true", help="clear the per-field encrypted_* columns")
+    parser.add_argument("--company", type=int, default=None, help="only this company's uploads")
+    args = parser.parse_args()
+    result = seal_uploads(args.batch_size, args.drop_legacy, args.company)
+    print(f"SEAL: done, {result['sealed']} uploads sealed (envelope version {ENVELOPE_VERSION})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Point the app at throwaway storage before any test imports app.core.config
+_scratch = tempfile.mkdtemp(prefix="finsight-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_scratch, 'test.db')}")
+os.environ.setdefault("XDG_DATA_HOME", _scratch)
+os.environ.setdefault("UPLOAD_SPOOL_DIR", _scratch)
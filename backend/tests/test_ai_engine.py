@@ -0,0 +1,202 @@
+"""
+AIEngine against a local stand-in for the OpenAI API (OPENAI_BASE_URL points at
+it): each test scripts the stub's responses and checks what the engine returns.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.core.config import settings
+from app.services import ai_engine as ai_engine_module
+from app.services.ai_engine import AIEngine
+from app.services.analysis_cache import AnalysisCache
+
+MODEL_ANALYSIS = {
+    "health_score": 77,
+    "status": "Healthy",
+    "summary": "Stub model summary",
+    "risks": [{"type": "Liquidity", "severity": "High", "message": "Cash is {tight}, \"really\""}],
+    "recommendations": ["Collect receivables"],
+    "forecast": "Stable",
+}
+FINANCIAL_DATA = {
+    "total_revenue": 192700.0, "total_expenses": 70700.0, "net_profit": 122000.0,
+    "profit_margin": 63.3, "expense_ratio": 36.7, "accounts_receivable": 0.0,
+    "accounts_payable": 0.0, "inventory_value": 0.0, "total_debt": 0.0,
+    "categories": {"Sales": 192700.0, "Rent": -42000.0, "Salaries": -28700.0},
+}
+
+
+class OpenAIStub(ThreadingHTTPServer):
+    """POST /v1/chat/completions; each request takes the next scripted step (default: answer)."""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.script = []
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["content-length"])))
+        with self.server.lock:
+            self.server.requests.append(request)
+            step = self.server.script.pop(0) if self.server.script else {}
+        if self.path != "/v1/chat/completions":
+            return self._json(404, {"error": {"message": "not found"}})
+        if "status" in step:
+            return self._json(step["status"], {"error": {"message": "scripted failure", "type": "server_error"}},
+                              step.get("headers"))
+
+        content = json.dumps(MODEL_ANALYSIS, indent=2)
+        if not request.get("stream"):
+            return self._json(200, {
+                "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": request["model"],
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            })
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.end_headers()
+        for start in range(0, len(content), 9):
+            chunk = {
+                "id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": 0, "model": request["model"],
+                "choices": [{"index": 0, "delta": {"content": content[start:start + 9]}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server = OpenAIStub()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def engine(stub, monkeypatch):
+    """A fresh engine (its own breaker and clients) pointed at the stub, with a memory-only cache."""
+    stub.script.clear()
+    stub.requests.clear()
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    for name, value in {
+        "OPENAI_BASE_URL": stub.base_url, "AI_CALL_TIMEOUT_S": 5, "AI_DEADLINE_S": 10, "AI_MAX_RETRIES": 3,
+        "AI_RETRY_BACKOFF_S": 0.01, "AI_RETRY_BACKOFF_MAX_S": 0.05,
+        "AI_BREAKER_FAILURE_THRESHOLD": 2, "AI_BREAKER_COOLDOWN_S": 0.2,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    monkeypatch.setattr(ai_engine_module, "analysis_cache", AnalysisCache(db_ttl_s=0))
+    return AIEngine()
+
+
+def _stream(engine, industry="Retail"):
+    async def collect():
+        return [event async for event in engine.stream_analysis(FINANCIAL_DATA, industry)]
+    return asyncio.run(collect())
+
+
+def _breaker_logs(caplog):
+    return [record for record in caplog.records if record.name == "app.core.circuit_breaker"]
+
+
+def test_analysis_comes_from_the_model(engine, stub):
+    result = asyncio.run(engine.analyze_financials_async(FINANCIAL_DATA, "Retail"))
+    assert result == MODEL_ANALYSIS
+    (request,) = stub.requests
+    assert request["response_format"] == {"type": "json_object"}
+    assert "192" in request["messages"][-1]["content"]
+
+    # The blocking path shares the cache: no second call
+    assert engine.analyze_financials(FINANCIAL_DATA, "Retail") == MODEL_ANALYSIS
+    assert len(stub.requests) == 1
+    assert engine.analyze_financials(FINANCIAL_DATA, "Agriculture") == MODEL_ANALYSIS
+    assert len(stub.requests) == 2
+
+
+def test_streamed_analysis_yields_each_field(engine, stub):
+    events = _stream(engine)
+    assert events[0][0] == "placeholder"
+    fields = [data for event, data in events if event == "field"]
+    assert [field["field"] for field in fields] == list(MODEL_ANALYSIS)
+    assert {field["field"]: field["value"] for field in fields} == MODEL_ANALYSIS
+    assert events[-1] == ("done", {"source": "model", "analysis": MODEL_ANALYSIS})
+    assert stub.requests[0]["stream"] is True
+
+    # Replayed from the cache the second time
+    assert _stream(engine)[-1] == ("done", {"source": "cache", "analysis": MODEL_ANALYSIS})
+    assert len(stub.requests) == 1
+
+
+def test_retryable_errors_are_retried(engine, stub):
+    stub.script = [{"status": 500}, {"status": 429, "headers": {"retry-after": "0"}}, {"status": 503}]
+    result = asyncio.run(engine.analyze_financials_async(FINANCIAL_DATA, "Retail"))
+    assert result == MODEL_ANALYSIS
+    assert len(stub.requests) == 4
+    assert engine.breaker.snapshot()["state"] == "closed"
+
+    stub.script = [{"status": 502}]
+    assert _stream(engine, "Services")[-1][1]["source"] == "model"
+    assert len(stub.requests) == 6
+
+
+def test_bad_request_is_not_retried_and_falls_back(engine, stub):
+    stub.script = [{"status": 400}]
+    result = asyncio.run(engine.analyze_financials_async(FINANCIAL_DATA, "Retail"))
+    assert result == engine._rule_based_analysis(FINANCIAL_DATA, "Retail", "en")
+    assert len(stub.requests) == 1
+    # A 400 proves the API is answering: it does not count towards the breaker
+    assert engine.breaker.snapshot()["consecutive_failures"] == 0
+
+
+def test_breaker_opens_after_failed_calls_and_recovers(engine, stub, monkeypatch, caplog):
+    caplog.set_level(logging.INFO, logger="app.core.circuit_breaker")
+    monkeypatch.setattr(settings, "AI_MAX_RETRIES", 0)
+    rule_based = engine._rule_based_analysis(FINANCIAL_DATA, "Retail", "en")
+    stub.script = [{"status": 500}, {"status": 500}]
+    for _ in range(2):
+        assert asyncio.run(engine.analyze_financials_async(FINANCIAL_DATA, "Retail")) == rule_based
+    assert engine.breaker.snapshot()["state"] == "open"
+    assert len(stub.requests) == 2
+    assert _breaker_logs(caplog)[-1].levelno == logging.WARNING
+    assert _breaker_logs(caplog)[-1].getMessage().startswith("CIRCUIT openai: open for 0.2s after 2 failures")
+
+    # While open, analyses and streams take the fallback without calling the API
+    assert asyncio.run(engine.analyze_financials_async(FINANCIAL_DATA, "Retail")) == rule_based
+    assert _stream(engine)[-1] == ("done", {"source": "rule-based", "analysis": rule_based})
+    assert len(stub.requests) == 2
+    assert engine.breaker.snapshot()["short_circuited"] == 2
+
+    # After the cooldown a probe goes through and closes the circuit
+    time.sleep(settings.AI_BREAKER_COOLDOWN_S + 0.05)
+    assert asyncio.run(engine.analyze_financials_async(FINANCIAL_DATA, "Retail")) == MODEL_ANALYSIS
+    assert len(stub.requests) == 3
+    assert engine.breaker.snapshot()["state"] == "closed"
+    assert _breaker_logs(caplog)[-1].getMessage() == "CIRCUIT openai: closed"
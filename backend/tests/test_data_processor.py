@@ -0,0 +1,77 @@
+import json
+import logging
+import warnings
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from app.core.config import settings
+from app.services import data_processor
+from app.services.data_processor import DataProcessor
+
+SAMPLE_DIR = Path(__file__).resolve().parents[2] / "Sample data"
+SAMPLE_CSVS = sorted(SAMPLE_DIR.glob("*.csv"))
+
+
+def _canonical(result):
+    return json.loads(json.dumps(result, sort_keys=True, default=str))
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+@pytest.mark.parametrize("path", SAMPLE_CSVS, ids=[path.name for path in SAMPLE_CSVS])
+def test_streamed_matches_in_memory(path, engine, monkeypatch):
+    monkeypatch.setattr(settings, "CSV_ENGINE", engine)
+    content = path.read_bytes()
+    in_memory = DataProcessor.process_file(content, path.name)
+    streamed = DataProcessor.process_file(content, path.name, chunk_size=7)
+    assert "error" not in in_memory
+    assert _canonical(streamed) == _canonical(in_memory)
+
+
+@pytest.mark.parametrize("path", SAMPLE_CSVS, ids=[path.name for path in SAMPLE_CSVS])
+def test_generic_metadata_matches_across_csv_engines(path, monkeypatch):
+    metadata = {}
+    for engine in ("c", "pyarrow"):
+        monkeypatch.setattr(settings, "CSV_ENGINE", engine)
+        metadata[engine] = DataProcessor.process_file(path.read_bytes(), path.name)["generic_metadata"]
+    assert _canonical(metadata["pyarrow"]) == _canonical(metadata["c"])
+
+
+def test_string_columns_are_text_whatever_their_storage():
+    df = pd.DataFrame({
+        "object": pd.Series(["a", "b"], dtype=object),
+        "python": pd.Series(["a", "b"], dtype="string[python]"),
+        "arrow": pd.Series(["a", "b"], dtype="string[pyarrow]"),
+        "category": pd.Series(["a", "b"], dtype="category"),
+        "amount": [1.0, 2.0],
+    })
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        info = DataProcessor._column_info(df)
+    assert info["text_columns"] == ["object", "python", "arrow", "category"]
+    assert info["numeric_columns"] == ["amount"]
+
+
+def test_column_mapping_cache_sized_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "COLUMN_MAPPING_CACHE_SIZE", 2)
+    monkeypatch.setattr(data_processor, "_column_mapping_cache", None)
+    for header in (("date", "amount"), ("txn_date", "amount"), ("date", "debit")):
+        data_processor.detect_column_mapping(header)
+    info = data_processor._column_mapping_cache.cache_info()
+    assert info.maxsize == 2 and info.currsize == 2
+    assert data_processor.detect_column_mapping(("date", "debit"))["date"] == "date"
+
+
+def test_memory_report_is_debug_logging(monkeypatch, caplog):
+    path = SAMPLE_CSVS[0]
+    DataProcessor.process_file(path.read_bytes(), path.name)
+    assert not caplog.records
+
+    monkeypatch.setattr(settings, "INGEST_MEMORY_REPORT", True)
+    with caplog.at_level(logging.DEBUG, logger=data_processor.__name__):
+        DataProcessor.process_file(path.read_bytes(), path.name)
+    reports = [record for record in caplog.records if record.getMessage().startswith("MEMORY REPORT")]
+    assert len(reports) == 1 and reports[0].levelno == logging.DEBUG
+    assert path.name in reports[0].getMessage()
+
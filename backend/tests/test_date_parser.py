@@ -0,0 +1,50 @@
+import pandas as pd
+
+from app.services.data_processor import DataProcessor
+from app.services.date_parser import DateParser
+
+
+def test_mixed_format_column_keeps_every_date():
+    parser = DateParser()
+    values = pd.Series(['01-02-2024', '02-02-2024', '05/03/24', '06/03/24', '2024-04-01'])
+    fmt = parser.resolve_format(values)
+    assert fmt == '%d-%m-%Y'
+    parsed = parser.parse(values, fmt)
+    assert parsed.tolist() == [pd.Timestamp(d) for d in ('2024-02-01', '2024-02-02', '2024-03-05', '2024-03-06', '2024-04-01')]
+
+
+def test_only_unparseable_values_become_nat():
+    parser = DateParser()
+    values = pd.Series(['01-02-2024', 'not a date', '3 March 2024', '', None, '01-02-2024'], index=list('abcdef'))
+    parsed = parser.parse(values, parser.resolve_format(values))
+    assert list(parsed.index) == list('abcdef')
+    assert parsed['a'] == parsed['f'] == pd.Timestamp('2024-02-01')
+    assert parsed['c'] == pd.Timestamp('2024-03-03')
+    assert parsed[['b', 'd', 'e']].isna().all()
+
+
+def test_single_format_column_is_unchanged():
+    parser = DateParser()
+    values = pd.Series(['01/02/2024', '13/02/2024', '28/02/2024'])
+    fmt = parser.resolve_format(values)
+    assert fmt == '%d/%m/%Y'
+    assert parser.parse(values, fmt).tolist() == [pd.Timestamp(d) for d in ('2024-02-01', '2024-02-13', '2024-02-28')]
+
+
+def test_mixed_dates_reach_the_monthly_breakdown():
+    csv = (
+        "Date,Description,Category,Amount,Type\n"
+        "01-02-2024,Sale,Sales,100,Income\n"
+        "02-02-2024,Rent,Rent,40,Expense\n"
+        "05/03/24,Sale,Sales,200,Income\n"
+        "06/03/24,Rent,Rent,40,Expense\n"
+        "2024-04-01,Sale,Sales,300,Income\n"
+    ).encode()
+    for chunk_size in (None, 2):
+        result = DataProcessor.process_file(csv, "mixed.csv", chunk_size=chunk_size)
+        assert result['monthly_breakdown'] == [
+            {'month': '2024-02', 'sum': 140, 'count': 2},
+            {'month': '2024-03', 'sum': 240, 'count': 2},
+            {'month': '2024-04', 'sum': 300, 'count': 1},
+        ]
+        assert result['date_range'] == {'start': '2024-02-01', 'end': '2024-04-01'}
@@ -0,0 +1,40 @@
+import io
+import logging
+
+from openpyxl import Workbook
+
+from app.core.config import settings
+from app.services import excel_reader
+from app.services.excel_reader import ExcelBatchReader
+
+
+def _workbook(rows) -> io.BytesIO:
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def test_auto_streams_large_workbooks_with_openpyxl(monkeypatch):
+    source = _workbook([["Date", "Amount"], ["2024-01-01", 5]])
+    monkeypatch.setattr(excel_reader, "python_calamine", object())
+    assert ExcelBatchReader(source, engine="auto").engine == "calamine"
+    monkeypatch.setattr(settings, "EXCEL_CALAMINE_MAX_MB", 0)
+    reader = ExcelBatchReader(source, engine="auto")
+    assert reader.engine == "openpyxl"
+    assert source.tell() == 0
+    assert ExcelBatchReader(source, engine="calamine").engine == "calamine"
+
+
+def test_cells_beyond_the_header_are_dropped_with_a_warning(monkeypatch, caplog):
+    rows = [("Date", "Amount"), ("2024-01-01", 5, "stray", None), ("2024-01-02", 7)]
+    reader = ExcelBatchReader(_workbook([["unused"]]), engine="openpyxl")
+    monkeypatch.setattr(reader, "_openpyxl_sheets", lambda workbook: iter([("Sheet", iter(rows))]))
+    with caplog.at_level(logging.WARNING, logger=excel_reader.__name__):
+        frames = list(reader)
+    assert frames[0].to_dict(orient="list") == {"Date": ["2024-01-01", "2024-01-02"], "Amount": [5, 7]}
+    (record,) = caplog.records
+    assert "dropped 1 cells" in record.getMessage() and "'Sheet'" in record.getMessage()
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine, init_db
+from app.models.database import AnalysisJob, Company, FinancialUpload, TransactionFile
+from app.services import job_queue as job_queue_module
+from app.services.job_queue import JobAbandoned, JobQueue, job_queue, save_analysis
+from app.services.mapping_cache import column_mapping_cache
+
+PARAMS = {"lang": "en", "industry": "Retail", "sheet": None, "append": False}
+
+
+@pytest.fixture
+def db():
+    init_db()
+    session = SessionLocal()
+    company = Company(name="Dedup Test")
+    session.add(company)
+    session.commit()
+    session.company_id = company.id
+    yield session
+    session.close()
+
+
+def _content_hash(name: str) -> str:
+    return job_queue.content_hash(name.ljust(64, "0"), PARAMS)
+
+
+def test_identical_pending_upload_gets_the_existing_job(db):
+    content_hash = _content_hash("pending")
+    first = job_queue.enqueue(db, db.company_id, "a.csv", "/tmp/a.csv", PARAMS, content_hash)
+    # A concurrent upload that passed find_duplicate before the first was committed
+    second = job_queue.enqueue(db, db.company_id, "a.csv", "/tmp/b.csv", PARAMS, content_hash)
+    assert second.id == first.id and second.file_path == "/tmp/a.csv"
+    assert db.query(AnalysisJob).filter(AnalysisJob.content_hash == content_hash).count() == 1
+
+
+def test_finished_jobs_do_not_block_a_new_one(db):
+    content_hash = _content_hash("finished")
+    failed = job_queue.enqueue(db, db.company_id, "a.csv", "/tmp/a.csv", PARAMS, content_hash)
+    failed.status = "failed"
+    db.commit()
+    assert job_queue.find_duplicate(db, db.company_id, content_hash) is None
+    retried = job_queue.enqueue(db, db.company_id, "a.csv", "/tmp/b.csv", PARAMS, content_hash)
+    assert retried.id != failed.id and retried.status == "queued"
+
+
+def test_find_duplicate_is_read_only_and_touch_refreshes_the_upload(db):
+    content_hash = _content_hash("touch")
+    uploaded_at = datetime.utcnow() - timedelta(days=3)
+    upload = FinancialUpload(company_id=db.company_id, filename="a.csv", upload_date=uploaded_at)
+    db.add(upload)
+    db.commit()
+    job = job_queue.enqueue(db, db.company_id, "a.csv", "/tmp/a.csv", PARAMS, content_hash)
+    job.status, job.upload_id = "succeeded", upload.id
+    db.commit()
+
+    assert job_queue.find_duplicate(db, db.company_id, content_hash).id == job.id
+    db.expire_all()
+    assert db.get(FinancialUpload, upload.id).upload_date == uploaded_at
+
+    job_queue.touch(db, job)
+    db.expire_all()
+    assert db.get(FinancialUpload, upload.id).upload_date > uploaded_at
+
+
+def test_init_db_adds_the_index_to_an_existing_table():
+    init_db()
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_analysis_job_pending_content"))
+    assert "uq_analysis_job_pending_content" not in {ix["name"] for ix in inspect(engine).get_indexes("analysis_jobs")}
+    init_db()
+    assert "uq_analysis_job_pending_content" in {ix["name"] for ix in inspect(engine).get_indexes("analysis_jobs")}
+
+
+def test_mapping_record_failure_keeps_the_saved_analysis(db, tmp_path, monkeypatch, caplog):
+    spool = tmp_path / "mapped.csv"
+    spool.write_text("Date,Amount\n")
+    job = job_queue.enqueue(db, db.company_id, "mapped.csv", str(spool), PARAMS, _content_hash("mapped"))
+
+    def conflict(*args):
+        raise IntegrityError("INSERT INTO column_mappings", {}, Exception("uq_column_mapping_signature"))
+
+    monkeypatch.setattr(column_mapping_cache, "record", conflict)
+    financial_data = {"total_revenue": 10.0, "column_mapping": {"header_signature": "sig", "mapped_columns": {}}}
+    upload_id = save_analysis(job.id, financial_data, {"health_score": 50})
+
+    db.expire_all()
+    job = db.get(AnalysisJob, job.id)
+    assert job.status == "succeeded" and job.upload_id == upload_id
+    assert not spool.exists()
+    assert "column mapping not recorded" in caplog.text
+
+
+def test_save_timeout_leaves_the_outcome_to_the_save(db, tmp_path, monkeypatch):
+    spool = tmp_path / "slow.csv"
+    spool.write_text("Date,Description,Amount\n2024-01-05,Sales,100\n2024-01-09,Rent,-40\n")
+    job = job_queue.enqueue(db, db.company_id, "slow.csv", str(spool), PARAMS, _content_hash("slow"))
+    monkeypatch.setattr(settings, "CPU_POOL_WORKERS", 0)
+
+    # The save commits after the worker has stopped waiting for it
+    release, saved = threading.Event(), threading.Event()
+
+    def slow_save(*args):
+        release.wait(5)
+        try:
+            return save_analysis(*args)
+        finally:
+            saved.set()
+
+    run_io = job_queue_module.execution_layer.run_io
+
+    async def short_save_stage(stage, fn, *args, timeout=None, **kwargs):
+        return await run_io(stage, fn, *args, timeout=0.05 if stage == "save" else timeout, **kwargs)
+
+    monkeypatch.setattr(job_queue_module, "save_analysis", slow_save)
+    monkeypatch.setattr(job_queue_module.execution_layer, "run_io", short_save_stage)
+    with pytest.raises(JobAbandoned):
+        asyncio.run(JobQueue._analyze(db, job))
+    assert spool.exists()
+
+    release.set()
+    assert saved.wait(5)
+    db.expire_all()
+    job = db.get(AnalysisJob, job.id)
+    assert job.status == "succeeded"
+    stored = db.query(TransactionFile).filter(TransactionFile.upload_id == job.upload_id).one()
+    assert os.path.exists(stored.path)
+    assert not spool.exists()
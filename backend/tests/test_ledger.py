@@ -0,0 +1,50 @@
+import pytest
+
+from app.core.database import SessionLocal, init_db
+from app.models.database import Company, LedgerRollup
+from app.services.ledger import ledger
+
+
+@pytest.fixture
+def db():
+    init_db()
+    session = SessionLocal()
+    company = Company(name="Ledger Test")
+    session.add(company)
+    session.commit()
+    session.company_id = company.id
+    yield session
+    session.close()
+
+
+def _rollup(db, month, income, expense, category="Sales"):
+    db.add(LedgerRollup(
+        company_id=db.company_id, month=month, category_key=ledger.category_key(category),
+        amount=income + expense, income_amount=income, expense_amount=expense, txn_count=2
+    ))
+
+
+def test_trends_fill_gap_months_within_the_window(db):
+    # Nothing in 2024-03
+    for month in ("2024-01", "2024-02", "2024-04"):
+        _rollup(db, month, 100.0, -40.0)
+    db.commit()
+
+    series = ledger.trends(db, db.company_id, 3)
+    assert [point["month"] for point in series] == ["2024-02", "2024-03", "2024-04"]
+    assert series[1] == {"month": "2024-03", "revenue": 0.0, "expenses": 0.0, "net_profit": 0.0, "sum": 0.0, "count": 0}
+    assert series[2]["revenue"] == 100.0 and series[2]["expenses"] == 40.0
+
+    series = ledger.trends(db, db.company_id, 6, end="2024-05")
+    assert [point["month"] for point in series] == ["2023-12", "2024-01", "2024-02", "2024-03", "2024-04", "2024-05"]
+    assert [point["count"] for point in series] == [0, 2, 2, 0, 2, 0]
+
+
+def test_trends_for_a_category_and_without_data(db):
+    _rollup(db, "2024-01", 100.0, 0.0)
+    _rollup(db, "2024-06", 0.0, -30.0, category="Rent")
+    db.commit()
+
+    series = ledger.trends(db, db.company_id, 2, category="Sales")
+    assert [point["month"] for point in series] == ["2023-12", "2024-01"]
+    assert ledger.trends(db, db.company_id, 2, category="Payroll") == []
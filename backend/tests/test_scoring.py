@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from app.services import scoring
+
+FIELDS = ("revenue", "profit", "margin", "ar", "ap", "debt", "expense_ratio")
+# Values on and around every threshold in scoring, plus zeros, negatives and NaN
+EDGES = np.array([0.0, -0.0, -1.0, 1.0, 15.0, 20.0, 30.0, 50.0, 1e-9, -1e-9, 1e6, np.nan, 14.999999, 20.000001])
+
+
+def _fuzzed_inputs(seed: int, n: int = 5000):
+    rng = np.random.default_rng(seed)
+    revenue = np.where(rng.random(n) < 0.1, rng.choice(EDGES, n), rng.uniform(-1e5, 1e7, n))
+    columns = {"revenue": revenue}
+    for field in FIELDS[1:]:
+        scale = 100.0 if field in ("margin", "expense_ratio") else 1e6
+        values = rng.uniform(-scale, scale * 2, n)
+        # Some rows sit exactly on the threshold relative to revenue
+        if field == "ar":
+            values = np.where(rng.random(n) < 0.1, revenue * scoring.HIGH_AR_REVENUE_SHARE, values)
+        if field == "debt":
+            values = np.where(rng.random(n) < 0.1, revenue * scoring.HIGH_DEBT_REVENUE_SHARE, values)
+        columns[field] = np.where(rng.random(n) < 0.1, rng.choice(EDGES, n), values)
+    columns["ap"] = np.where(rng.random(n) < 0.1, columns["ar"], columns["ap"])
+    return columns
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_score_batch_matches_score(seed):
+    columns = _fuzzed_inputs(seed)
+    batch = {key: values.tolist() for key, values in scoring.score_batch(*(columns[field] for field in FIELDS)).items()}
+    for i in range(len(columns["revenue"])):
+        expected = scoring.score(*(float(columns[field][i]) for field in FIELDS))
+        actual = {key: values[i] for key, values in batch.items()}
+        assert actual == expected, {field: columns[field][i] for field in FIELDS}
+
+
+def test_score_batch_empty():
+    batch = scoring.score_batch(*([[]] * len(FIELDS)))
+    assert set(batch) == set(scoring.score(0, 0, 0, 0, 0, 0, 0))
+    assert all(len(values) == 0 for values in batch.values())
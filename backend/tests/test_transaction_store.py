@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from app.services.transaction_store import TransactionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TransactionStore(str(tmp_path))
+
+
+def _frame(**columns):
+    frame = pd.DataFrame({
+        "amount": [10.0, -4.5, 7.0],
+        "type": ["income", "expense", "income"],
+        "date": pd.to_datetime(["2024-01-05", "2024-01-09", "2024-02-01"]),
+        "category": ["Sales", "Rent", "Sales"],
+        "customer": ["acme", "globex", None],
+        "tax": [0.0, 0.0, 1.0],
+    })
+    return frame.assign(**columns)
+
+
+@pytest.mark.parametrize("customers", [
+    pd.Series([123, "abc", None], dtype=object),
+    pd.Series([123, "abc", None], dtype="category"),
+], ids=["object", "category"])
+def test_mixed_type_text_columns_are_stored_as_strings(store, customers):
+    path = store.new_path(1)
+    writer = store.writer(path)
+    writer.write(_frame(customer=customers, category=pd.Series([1.5, "Rent", None], dtype=object)))
+    writer.close()
+
+    stored = store.read(path, columns=["category", "customer"])
+    assert stored["customer"].tolist()[:2] == ["123", "abc"]
+    assert stored["category"].tolist()[:2] == ["1.5", "Rent"]
+    assert stored[["category", "customer"]].iloc[2].isna().all()
+
+
+def test_text_columns_round_trip(store):
+    path = store.new_path(1)
+    writer = store.writer(path)
+    writer.write(_frame())
+    assert writer.close()["rows"] == 3
+    stored = store.read(path)
+    assert stored["customer"].tolist()[:2] == ["acme", "globex"]
+    assert stored["amount"].tolist() == [10.0, -4.5, 7.0]
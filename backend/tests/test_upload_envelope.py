@@ -0,0 +1,69 @@
+import json
+import logging
+import zlib
+
+import pytest
+from cryptography.fernet import Fernet
+from fastapi.testclient import TestClient
+
+from app.core.database import SessionLocal, init_db
+from app.core.security import encryption_service
+from app.main import app
+from app.models.database import Company, FinancialUpload
+from app.services import upload_envelope
+
+PAYLOAD = {"summary": "Sealed summary", "risks": [{"message": "Cash is tight"}], "categories": {"Sales": 10.0}}
+
+
+@pytest.fixture
+def db():
+    init_db()
+    session = SessionLocal()
+    company = Company(name="Envelope Test")
+    session.add(company)
+    session.commit()
+    session.company_id = company.id
+    yield session
+    session.close()
+
+
+def _upload(db, **columns):
+    upload = FinancialUpload(company_id=db.company_id, filename="a.csv", total_revenue=10.0, **columns)
+    upload_envelope.store(upload, PAYLOAD, drop_legacy=False)
+    db.add(upload)
+    db.commit()
+    return upload
+
+
+def test_envelope_under_another_key_reads_as_empty_fields(db, caplog):
+    upload = _upload(db)
+    assert upload_envelope.read_upload(upload)["summary"] == "Sealed summary"
+
+    # e.g. SECRET_KEY changed since the upload was sealed
+    upload.envelope.sealed = Fernet(Fernet.generate_key()).encrypt(b"\x01").decode()
+    db.commit()
+    with pytest.raises(ValueError):
+        upload_envelope.open_upload(upload)
+    payload = upload_envelope.read_upload(upload)
+    assert payload["summary"] == "" and payload["risks"] == [] and payload["generic_metadata"] == {}
+    assert "cannot be decrypted" in caplog.text
+
+    response = TestClient(app).get(f"/api/v1/financial/dashboard?id={db.company_id}&lang=original")
+    assert response.status_code == 200
+    assert response.json()["financial_data"]["total_revenue"] == 10.0
+    assert response.json()["ai_analysis"]["summary"] == ""
+
+
+def test_newer_envelope_falls_back_to_kept_columns(db, caplog):
+    caplog.set_level(logging.WARNING, logger="app.services.upload_envelope")
+    upload = _upload(db, encrypted_summary=encryption_service.encrypt("Legacy summary"),
+                     encrypted_risks=encryption_service.encrypt(json.dumps(PAYLOAD["risks"])))
+    # Sealed by a release with a newer envelope layout that kept the per-field columns
+    upload.envelope.sealed = encryption_service.fernet.encrypt(
+        bytes([upload_envelope.ENVELOPE_VERSION + 1]) + zlib.compress(b"{}")).decode()
+    db.commit()
+
+    payload = upload_envelope.read_upload(upload)
+    assert payload["summary"] == "Legacy summary"
+    assert payload["risks"] == PAYLOAD["risks"]
+    assert "Unsupported upload envelope version" in caplog.text
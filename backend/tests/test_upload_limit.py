@@ -0,0 +1,98 @@
+import asyncio
+import os
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import financial
+from app.core.config import settings
+from app.core.middleware import UploadSizeLimitMiddleware
+from app.main import app
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def one_mb_limit(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE_MB", 1)
+
+
+def _multipart(size: int, chunk: int = 64 * 1024):
+    boundary = b"finsight"
+    yield (b"--" + boundary + b"\r\nContent-Disposition: form-data; name=\"file\"; filename=\"big.csv\"\r\n"
+           b"Content-Type: text/csv\r\n\r\n")
+    for _ in range(size // chunk):
+        yield b"x" * chunk
+    yield b"\r\n--" + boundary + b"--\r\n"
+
+
+def test_chunked_upload_over_limit_gets_413_with_cors(one_mb_limit):
+    client = TestClient(app)
+    response = client.post(
+        "/api/v1/financial/upload",
+        content=_multipart(2 * MB),
+        headers={"content-type": "multipart/form-data; boundary=finsight", "origin": "http://localhost:5173"},
+    )
+    assert response.status_code == 413
+    assert "File too large" in response.json()["detail"]
+    assert "access-control-allow-origin" in response.headers
+
+
+def test_declared_length_over_limit_gets_413_with_cors(one_mb_limit):
+    client = TestClient(app)
+    response = client.post(
+        "/api/v1/financial/upload",
+        content=b"x" * (MB + 1),
+        headers={"content-type": "text/csv", "origin": "http://localhost:5173"},
+    )
+    assert response.status_code == 413
+    assert "access-control-allow-origin" in response.headers
+
+
+def test_body_is_not_read_past_the_limit(one_mb_limit):
+    chunk = 256 * 1024
+    pulled = 0
+
+    async def receive():
+        nonlocal pulled
+        pulled += 1
+        return {"type": "http.request", "body": b"x" * chunk, "more_body": True}
+
+    async def app_reading_everything(scope, receive, send):
+        while (await receive()).get("more_body"):
+            pass
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": []}
+    asyncio.run(UploadSizeLimitMiddleware(app_reading_everything)(scope, receive, send))
+    assert pulled == MB // chunk + 1
+    assert sent[0]["status"] == 413
+    assert len(sent) == 2
+
+
+def test_enqueue_timeout_leaves_the_spooled_file(monkeypatch):
+    # The enqueue outlives the request: it may still queue a job that reads the file
+    release = threading.Event()
+    spooled = []
+
+    def slow_enqueue(company_id, filename, spool_path, *args):
+        spooled.append(spool_path)
+        release.wait(5)
+        return {"status": "queued", "job_id": 1}
+
+    monkeypatch.setattr(financial, "_enqueue_upload", slow_enqueue)
+    monkeypatch.setattr(settings, "STAGE_TIMEOUT_DB_S", 0.1)
+    try:
+        response = TestClient(app).post("/api/v1/financial/upload", files={"file": ("slow.csv", b"Date,Amount\n")})
+        assert response.status_code == 503
+        assert os.path.exists(spooled[0])
+    finally:
+        release.set()
+        os.remove(spooled[0])
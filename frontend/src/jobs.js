@@ -0,0 +1,15 @@
+import axios from 'axios';
+import API_BASE_URL from './apiConfig';
+
+// Uploads are analyzed in the background; poll the job until it finishes.
+// Resolves with the finished job, rejects with the job's error message.
+export const waitForJob = async (jobId, companyId, { interval = 1500, timeout = 15 * 60 * 1000 } = {}) => {
+    const deadline = Date.now() + timeout;
+    while (Date.now() < deadline) {
+        const { data } = await axios.get(`${API_BASE_URL}/financial/jobs/${jobId}?id=${companyId}`);
+        if (data.status === 'succeeded') return data;
+        if (data.status === 'failed') throw new Error(data.error || 'Analysis failed');
+        await new Promise((resolve) => setTimeout(resolve, interval));
+    }
+    throw new Error('Analysis is taking longer than expected. Please check the dashboard again shortly.');
+};
@@ -18,6 +18,7 @@ import { useLanguage } from '../context/LanguageContext';
 import { useDropzone } from 'react-dropzone';
 
 import API_BASE_URL from '../apiConfig';
+import { waitForJob } from '../jobs';
 
 const Dashboard = () => {
     const { language } = useLanguage();
@@ -153,11 +154,12 @@ const Dashboard = () => {
 
         try {
             setLoading(true);
-            await axios.post(
+            const { data } = await axios.post(
                 `${API_BASE_URL}/financial/upload?lang=${currentLang}&id=${companyId}`,
                 formData,
                 { headers: { 'Content-Type': 'multipart/form-data' } }
             );
+            await waitForJob(data.job_id, companyId);
             sessionStorage.removeItem('dash_reset');
             await fetchDashboardData();
         } catch (err) {
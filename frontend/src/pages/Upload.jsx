@@ -8,6 +8,7 @@ import axios from 'axios';
 import { useLanguage } from '../context/LanguageContext';
 
 import API_BASE_URL from '../apiConfig';
+import { waitForJob } from '../jobs';
 
 const UploadPage = () => {
     const { language } = useLanguage();
@@ -88,8 +89,8 @@ const UploadPage = () => {
         const companyId = localStorage.getItem('company_id');
 
         try {
-            // Upload, process, analyze, and store in database - all in one call
-            await axios.post(
+            // Upload returns a job id; processing, analysis and saving run in the background
+            const { data } = await axios.post(
                 `${API_BASE_URL}/financial/upload?lang=${lang}&industry=${industry}&id=${companyId}`,
                 formData,
                 {
@@ -98,6 +99,7 @@ const UploadPage = () => {
                     },
                 }
             );
+            await waitForJob(data.job_id, companyId);
 
             setStatus('success');
             setProgress('Analysis complete and saved to database!');